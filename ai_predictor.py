@@ -1,58 +1,31 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import ta
 from sklearn.ensemble import RandomForestClassifier
 import streamlit as st
+import market_data as md
+import indicators
+import model_store
+import news
+
+# Model inputs; changing any of these forces stored models to be retrained
+FEATURES = ['RSI', 'MACD', 'MACD_Signal', 'SMA_50', 'SMA_200', 'EMA_20', 'Stoch_K', 'ATR', 'OBV_Flow']
+# Reduced estimators and depth to save memory
+MODEL_PARAMS = dict(n_estimators=30, max_depth=10, min_samples_split=10, random_state=42)
+# Bump "version" when a feature's definition changes without its name changing
+MODEL_SCHEMA = {"version": 2, "features": FEATURES, "params": MODEL_PARAMS}
+# Bars in the OBV_Flow window
+OBV_WINDOW = 20
 
 def fetch_news_sentiment(ticker):
     """
-    Fetches recent news headlines for the ticker and calculates a simple sentiment score.
+    Rolling sentiment and recent headlines stored by the background news
+    ingestor (one indexed query, no network call).
     Returns:
         sentiment_score (float): -1 to 1 (negative to positive)
         headlines (list): List of recent headlines
     """
     try:
-        # Use yfinance news
-        stock = yf.Ticker(ticker)
-        news = stock.news
-        
-        # Fallback for Indian stocks if no news found directly
-        if not news and ".NS" in ticker:
-            stock_alt = yf.Ticker(ticker.replace(".NS", ""))
-            news = stock_alt.news
-
-        headlines = []
-        sentiment_score = 0
-        
-        if news:
-            for item in news[:5]: # Analyze top 5 news items
-                title = item.get('title', '')
-                # Handle nested content if present (some yf versions)
-                if not title and 'content' in item:
-                     title = item['content'].get('title', '')
-
-                link = item.get('link', '')
-                if not link and 'content' in item:
-                    link = item['content'].get('clickThroughUrl', {}).get('url', '')
-                elif not link and 'canonicalUrl' in item.get('content', {}):
-                    link = item['content']['canonicalUrl'].get('url', '')
-
-                if title:
-                    headlines.append({"title": title, "link": link})
-                    
-                    # Very basic keyword sentiment (replace with NLP model for better results)
-                    title_lower = title.lower()
-                    if any(w in title_lower for w in ['surge', 'jump', 'gain', 'record', 'bull', 'buy', 'profit', 'growth', 'beat', 'strong']):
-                        sentiment_score += 1
-                    elif any(w in title_lower for w in ['drop', 'fall', 'loss', 'crash', 'bear', 'sell', 'miss', 'down', 'weak', 'risk']):
-                        sentiment_score -= 1
-            
-            # Normalize score
-            if headlines:
-                sentiment_score = sentiment_score / len(headlines)
-                
-        return sentiment_score, headlines
+        return news.stored_sentiment(ticker)
     except Exception as e:
         print(f"News Error: {e}")
         return 0, []
@@ -90,105 +63,122 @@ def generate_reasoning(row):
 
 import gc
 
+def train_model(X_train, y_train, n_jobs=-1):
+    model = RandomForestClassifier(**MODEL_PARAMS, n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+    return model
+
+def build_features(ticker, df):
+    """Indicator features + 5-day forward Target for a history frame, NaN rows dropped"""
+    # SMA/EMA/MACD (trend), RSI/Stoch (momentum), Bollinger/ATR (volatility), OBV (volume).
+    # Per-symbol engine: only bars that arrived since the last call are computed.
+    df = df.join(indicators.engine.update(ticker, df))
+    
+    # OBV is a running total from wherever the history starts, so the model uses
+    # its change over OBV_WINDOW bars relative to the volume traded, which does not
+    # depend on the origin (0 where nothing traded, e.g. indices)
+    volume = df['Volume'].rolling(OBV_WINDOW).sum()
+    df['OBV_Flow'] = (df['OBV'].diff(OBV_WINDOW) / volume.where(volume > 0)).fillna(0.0)
+    
+    # Target: 1 if price rises in next 5 days, else 0
+    df['Target'] = (df['Close'].shift(-5) > df['Close']).astype(int)
+    
+    return df.dropna()
+
+def classify_signal(probability):
+    if probability > 0.70:
+        return "STRONG BUY"
+    elif probability > 0.55:
+        return "BUY"
+    elif probability < 0.30:
+        return "STRONG SELL"
+    elif probability < 0.45:
+        return "SELL"
+    return "HOLD"
+
 @st.cache_data(ttl=3600) # Cache for 1 hour
-def predict_signal(ticker):
+def technical_signal(ticker):
+    """Model probability, reasoning and metrics from price history alone (no news)"""
     try:
         # 1. Fetch Data (Reduced to 2 years for memory efficiency)
-        stock = yf.Ticker(ticker)
-        df = stock.history(period="2y")
+        df = md.get_history(ticker, "2y")
         
         if len(df) < 200:
             return {"signal": "NEUTRAL", "confidence": 0, "reason": "Insufficient data for analysis.", "metrics": {}, "news": []}
         
         # 2. Feature Engineering
-        # Trend Indicators
-        df['SMA_50'] = ta.trend.sma_indicator(df['Close'], window=50)
-        df['SMA_200'] = ta.trend.sma_indicator(df['Close'], window=200)
-        df['EMA_20'] = ta.trend.ema_indicator(df['Close'], window=20)
-        df['MACD'] = ta.trend.macd(df['Close'])
-        df['MACD_Signal'] = ta.trend.macd_signal(df['Close'])
-        
-        # Momentum Indicators
-        df['RSI'] = ta.momentum.rsi(df['Close'], window=14)
-        df['Stoch_K'] = ta.momentum.stoch(df['High'], df['Low'], df['Close'], window=14, smooth_window=3)
-        
-        # Volatility Indicators
-        df['BB_Upper'] = ta.volatility.bollinger_hband(df['Close'], window=20, window_dev=2)
-        df['BB_Lower'] = ta.volatility.bollinger_lband(df['Close'], window=20, window_dev=2)
-        df['ATR'] = ta.volatility.average_true_range(df['High'], df['Low'], df['Close'], window=14)
-        
-        # Volume Indicators
-        df['OBV'] = ta.volume.on_balance_volume(df['Close'], df['Volume'])
-        
-        # Target: 1 if price rises in next 5 days, else 0
-        df['Target'] = (df['Close'].shift(-5) > df['Close']).astype(int)
-        
-        # Drop NaNs
-        df.dropna(inplace=True)
-        
-        # 3. Train Model (Random Forest) - Optimized for Memory
-        features = ['RSI', 'MACD', 'MACD_Signal', 'SMA_50', 'SMA_200', 'EMA_20', 'Stoch_K', 'ATR', 'OBV']
-        X = df[features]
+        df = build_features(ticker, df)
+        
+        # 3. Load or Train Model (Random Forest)
+        X = df[FEATURES]
         y = df['Target']
         
         # Train on all data except last 5 rows
         X_train = X.iloc[:-5]
         y_train = y.iloc[:-5]
         
-        # Reduced estimators and depth to save memory
-        model = RandomForestClassifier(n_estimators=30, max_depth=10, min_samples_split=10, random_state=42, n_jobs=-1)
-        model.fit(X_train, y_train)
+        # Persisted per symbol; only retrained once enough new bars arrive
+        model = model_store.get_or_train(ticker, X_train, y_train, train_model, MODEL_SCHEMA)
         
         # 4. Predict Current State
         latest_features = X.iloc[[-1]]
         rf_probability = model.predict_proba(latest_features)[0][1] # Probability of Class 1 (Buy)
         
-        # 5. Get News Sentiment
-        sentiment_score, headlines = fetch_news_sentiment(ticker)
-        
-        # Integrate News
-        sentiment_adjustment = np.clip(sentiment_score * 0.1, -0.2, 0.2)
-        final_probability = np.clip(rf_probability + sentiment_adjustment, 0, 1)
-        
-        # Determine Signal
-        if final_probability > 0.70:
-            signal = "STRONG BUY"
-        elif final_probability > 0.55:
-            signal = "BUY"
-        elif final_probability < 0.30:
-            signal = "STRONG SELL"
-        elif final_probability < 0.45:
-            signal = "SELL"
-        else:
-            signal = "HOLD"
-            
-        # Generate Reasoning
         latest_row = df.iloc[-1]
         reason = generate_reasoning(latest_row)
-        reason += f"\n\n🤖 **Model Confidence:** {final_probability:.1%} (Technical: {rf_probability:.1%}, News Adj: {sentiment_adjustment:+.1%})"
         
-        if sentiment_score != 0:
-            sentiment_str = "Bullish" if sentiment_score > 0 else "Bearish"
-            reason += f"\n📰 **News Sentiment:** {sentiment_str} (Score: {sentiment_score})"
-        elif not headlines:
-             reason += f"\n📰 **News:** No recent news found."
-        
-        # Cleanup
+        # Cleanup (the model itself stays in the model store)
         del df, X, y, X_train, y_train, model
         gc.collect()
-            
+        
         return {
-            "signal": signal,
-            "confidence": final_probability * 100,
+            "probability": float(rf_probability),
             "reason": reason,
             "metrics": {
                 "RSI": latest_row["RSI"],
                 "MACD": latest_row["MACD"],
                 "SMA_200": latest_row["SMA_200"],
                 "Close": latest_row["Close"]
-            },
-            "news": headlines
+            }
         }
         
     except Exception as e:
         return {"signal": "ERROR", "confidence": 0, "reason": str(e), "metrics": {}, "news": []}
+
+def predict_signal(ticker):
+    """
+    Technical model signal adjusted by news sentiment. The two are cached
+    separately, so refreshed headlines never re-run the model.
+    """
+    technical = technical_signal(ticker)
+    if "probability" not in technical:
+        return technical
+    rf_probability = technical["probability"]
+    
+    # 5. Get News Sentiment
+    sentiment_score, headlines = fetch_news_sentiment(ticker)
+    
+    # Integrate News
+    sentiment_adjustment = np.clip(sentiment_score * 0.1, -0.2, 0.2)
+    final_probability = np.clip(rf_probability + sentiment_adjustment, 0, 1)
+    
+    # Determine Signal
+    signal = classify_signal(final_probability)
+        
+    # Generate Reasoning
+    reason = technical["reason"]
+    reason += f"\n\n🤖 **Model Confidence:** {final_probability:.1%} (Technical: {rf_probability:.1%}, News Adj: {sentiment_adjustment:+.1%})"
+    
+    if sentiment_score != 0:
+        sentiment_str = "Bullish" if sentiment_score > 0 else "Bearish"
+        reason += f"\n📰 **News Sentiment:** {sentiment_str} (Score: {sentiment_score:+.2f})"
+    elif not headlines:
+         reason += f"\n📰 **News:** No recent news found."
+        
+    return {
+        "signal": signal,
+        "confidence": final_probability * 100,
+        "reason": reason,
+        "metrics": technical["metrics"],
+        "news": headlines
+    }
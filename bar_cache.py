@@ -0,0 +1,146 @@
+"""
+Persistent on-disk bar cache backing market_data.BarStore.
+
+Daily OHLCV is kept per symbol as Arrow IPC segment files under
+BAR_CACHE_DIR/<interval>/<symbol>/. A full download writes one base segment;
+each tail refresh appends a small segment (later segments win on overlapping
+bars) and segments are compacted back into one once there are too many.
+Reads memory-map the segments and hand the mapped columns to pandas without
+copying them, so a freshly started process gets its history from the page
+cache instead of re-downloading it.
+"""
+import os
+import re
+import time
+
+import pandas as pd
+
+BAR_CACHE_DIR = os.getenv("BAR_CACHE_DIR", "bar_cache")
+
+# Compact a symbol's segments into one file past this many
+MAX_SEGMENTS = 8
+
+
+class DiskBarCache:
+    def __init__(self, directory=BAR_CACHE_DIR, intervals=("1d",)):
+        self.directory = directory
+        self.intervals = tuple(intervals)
+        self.stats = {"loads": 0, "writes": 0, "appends": 0, "compactions": 0}
+
+    def _dir(self, symbol, interval):
+        safe = re.sub(r"[^A-Za-z0-9._^=-]", "_", symbol)
+        return os.path.join(self.directory, interval, safe)
+
+    def _segments(self, symbol, interval):
+        path = self._dir(symbol, interval)
+        if not os.path.isdir(path):
+            return []
+        return [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".arrow")]
+
+    def load(self, symbol, interval):
+        """
+        (bars, covered_from, saved_at) from disk, or None when nothing is stored.
+        covered_from is None for full history; saved_at is the last write time.
+        """
+        if interval not in self.intervals:
+            return None
+        segments = self._segments(symbol, interval)
+        if not segments:
+            return None
+        try:
+            import pyarrow as pa
+
+            frames, covered_from = [], None
+            for i, path in enumerate(segments):
+                with pa.memory_map(path) as source:
+                    table = pa.ipc.open_file(source).read_all()
+                if i == 0:
+                    meta = table.schema.metadata or {}
+                    covered = meta.get(b"covered_from", b"").decode()
+                    covered_from = pd.Timestamp(covered) if covered else None
+                # One block per column lets numeric columns stay views of the mapped
+                # file instead of being copied into a consolidated block
+                frames.append(table.to_pandas(split_blocks=True))
+            bars = frames[0]
+            for tail in frames[1:]:
+                bars = _merge(bars, tail)
+            self.stats["loads"] += 1
+            return bars, covered_from, os.path.getmtime(segments[-1])
+        except Exception as e:
+            print(f"Bar cache read failed for {symbol}: {e}")
+            return None
+
+    def write(self, symbol, interval, bars, covered_from):
+        """Replace everything stored for symbol with `bars` (one base segment)."""
+        if interval not in self.intervals or bars is None or bars.empty:
+            return
+        old = self._segments(symbol, interval)
+        if self._write_segment(symbol, interval, bars, covered_from):
+            self.stats["writes"] += 1
+            _remove(old)
+
+    def append(self, symbol, interval, tail):
+        """Append freshly fetched tail bars as a new segment, compacting if needed."""
+        if interval not in self.intervals or tail is None or tail.empty:
+            return
+        segments = self._segments(symbol, interval)
+        if not segments:
+            return  # nothing to append to; the next full fetch writes a base segment
+        if len(segments) + 1 > MAX_SEGMENTS:
+            loaded = self.load(symbol, interval)
+            if loaded is not None:
+                bars, covered_from, _ = loaded
+                if self._write_segment(symbol, interval, _merge(bars, tail), covered_from):
+                    self.stats["compactions"] += 1
+                    _remove(segments)
+                return
+        if self._write_segment(symbol, interval, tail, None):
+            self.stats["appends"] += 1
+
+    def _write_segment(self, symbol, interval, bars, covered_from):
+        try:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(bars, preserve_index=True)
+            meta = dict(table.schema.metadata or {})
+            meta[b"covered_from"] = b"" if covered_from is None else pd.Timestamp(covered_from).isoformat().encode()
+            table = table.replace_schema_metadata(meta)
+
+            directory = self._dir(symbol, interval)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{time.time_ns():020d}.arrow")
+            tmp = f"{path}.tmp"
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)  # atomic: readers never see a half-written segment
+            return True
+        except Exception as e:
+            print(f"Bar cache write failed for {symbol}: {e}")
+            return False
+
+    def clear(self, symbol=None):
+        """Delete stored bars for symbol (all intervals), or everything."""
+        for interval in self.intervals:
+            if symbol is not None:
+                _remove(self._segments(symbol, interval))
+            elif os.path.isdir(os.path.join(self.directory, interval)):
+                for name in os.listdir(os.path.join(self.directory, interval)):
+                    _remove([os.path.join(self.directory, interval, name, f)
+                             for f in os.listdir(os.path.join(self.directory, interval, name))])
+
+
+def _merge(old, new):
+    """Append `new` on top of `old`; bars in `new` replace overlapping ones."""
+    if old.empty:
+        return new
+    if new.empty:
+        return old
+    return pd.concat([old[old.index < new.index[0]], new])
+
+
+def _remove(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
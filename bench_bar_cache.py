@@ -0,0 +1,93 @@
+"""
+Benchmark: stock-page history after a restart.
+Compares re-downloading `period="max"` daily bars, loading them from the
+on-disk Arrow cache (memory-mapped), and a warm in-memory BarStore.
+Upstream is a FixtureFetcher with a simulated round trip.
+
+Usage: python bench_bar_cache.py [symbols] [latency_ms]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import market_data as md
+from bar_cache import DiskBarCache
+
+SYMBOLS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+LATENCY = (int(sys.argv[2]) if len(sys.argv) > 2 else 800) / 1000
+BARS = 7000  # ~28 years of sessions, a typical "max" history
+
+
+def make_frames(n):
+    rng = np.random.default_rng(7)
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=BARS, tz="Asia/Kolkata")
+    frames = {}
+    for i in range(n):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, BARS)))
+        frames[f"SYM{i}.NS"] = pd.DataFrame({
+            "Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+            "Volume": rng.integers(1e5, 1e6, BARS).astype(float),
+            "Dividends": 0.0, "Stock Splits": 0.0,
+        }, index=idx)
+    return frames
+
+
+def load_pages(store, symbols):
+    """Per-page latency of the P/L + chart lookups a stock page makes."""
+    times = []
+    for symbol in symbols:
+        t0 = time.perf_counter()
+        store.get_history(symbol, "max")
+        store.get_history(symbol, "1y")
+        times.append(time.perf_counter() - t0)
+    return np.array(times)
+
+
+frames = make_frames(SYMBOLS)
+symbols = list(frames)
+directory = tempfile.mkdtemp()
+disk = DiskBarCache(directory)
+
+fetcher = md.FixtureFetcher(frames, latency=LATENCY)
+cold = load_pages(md.BarStore(fetcher, disk=disk), symbols)  # also populates the disk cache
+downloads = fetcher.calls
+
+fetcher = md.FixtureFetcher(frames, latency=LATENCY)
+restarted = md.BarStore(fetcher, disk=disk)
+from_disk = load_pages(restarted, symbols)
+disk_calls = fetcher.calls
+
+warm = load_pages(restarted, symbols)
+
+# Cache written an hour ago: pages are served from disk while each tail is re-fetched in the background
+hour_ago = time.time() - 3600
+for root, _, files in os.walk(directory):
+    for f in files:
+        os.utime(os.path.join(root, f), (hour_ago, hour_ago))
+fetcher = md.FixtureFetcher(frames, latency=LATENCY)
+store = md.BarStore(fetcher, disk=disk)
+stale = load_pages(store, symbols)
+store.wait()  # the tail fetches run in the background; count them once they land
+stale_calls = fetcher.calls
+
+size = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(directory) for f in files)
+
+print("=" * 70)
+print(f"BAR CACHE BENCHMARK ({SYMBOLS} symbols x {BARS} bars, {LATENCY * 1000:.0f} ms upstream)")
+print("=" * 70)
+print(f"{'':28s} {'mean ms':>9s} {'max ms':>9s} {'upstream':>9s}")
+for label, times, calls in [
+    ("re-download (no cache)", cold, downloads),
+    ("restart, disk cache", from_disk, disk_calls),
+    ("restart, disk + tail fetch", stale, stale_calls),
+    ("warm (in memory)", warm, 0),
+]:
+    print(f"{label:28s} {times.mean() * 1000:9.2f} {times.max() * 1000:9.2f} {calls:9d}")
+print(f"\nOn disk: {size / 1e6:.1f} MB ({size / SYMBOLS / 1e3:.0f} KB per symbol)")
+
+shutil.rmtree(directory)
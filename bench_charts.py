@@ -0,0 +1,79 @@
+"""
+Benchmark: chart payloads, every bar vs fitted to the chart width.
+Builds the stock-page candlestick (+ MA20) and the NIFTY area chart from
+synthetic history, then reports the Plotly JSON size and the time to
+prepare and serialize it, as st.plotly_chart does.
+
+Usage: python bench_charts.py [chart_width_px]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import chart_data
+
+WIDTH = int(sys.argv[1]) if len(sys.argv) > 1 else chart_data.CHART_WIDTH
+REPEATS = 5
+# Daily sessions per timeframe; Max is ~28 years
+RANGES = {"1Y": 250, "5Y": 1250, "Max": 7000}
+
+
+def make_history(bars):
+    rng = np.random.default_rng(3)
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=bars, tz="Asia/Kolkata")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.003, bars)), "High": close * 1.01, "Low": close * 0.99,
+        "Close": close, "Volume": rng.integers(1e5, 1e6, bars).astype(float),
+    }, index=idx)
+
+
+def candle_figure(bars, ma):
+    fig = go.Figure(data=[go.Candlestick(x=bars.index, open=bars['Open'], high=bars['High'],
+                                         low=bars['Low'], close=bars['Close'])])
+    fig.add_trace(go.Scatter(x=ma.index, y=ma, mode='lines', name='MA20'))
+    return fig
+
+
+def full_candles(df):
+    return candle_figure(df, df['Close'].rolling(window=20).mean())
+
+
+def fitted_candles(df):
+    plot = chart_data.prepare_candles(df, WIDTH)
+    return candle_figure(plot['bars'], plot['ma'])
+
+
+def full_area(df):
+    return go.Figure(go.Scatter(x=df.index, y=df['Close'], mode='lines', fill='tozeroy'))
+
+
+def fitted_area(df):
+    area = chart_data.prepare_line(df, WIDTH)
+    return go.Figure(go.Scatter(x=area.index, y=area, mode='lines', fill='tozeroy'))
+
+
+def measure(build, df):
+    """(payload bytes, median ms to build the figure and serialize it)"""
+    times = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        payload = build(df).to_json()
+        times.append(time.perf_counter() - t0)
+    return len(payload.encode()), np.median(times) * 1000
+
+
+print("=" * 70)
+print(f"CHART PAYLOAD BENCHMARK (chart width {WIDTH}px)")
+print("=" * 70)
+print(f"{'':18s} {'bars':>6s} {'before KB':>10s} {'after KB':>9s} {'before ms':>10s} {'after ms':>9s}")
+for tf, bars in RANGES.items():
+    df = make_history(bars)
+    for kind, full, fitted in [("candles", full_candles, fitted_candles), ("area", full_area, fitted_area)]:
+        before_bytes, before_ms = measure(full, df)
+        after_bytes, after_ms = measure(fitted, df)
+        print(f"{tf + ' ' + kind:18s} {bars:6d} {before_bytes / 1e3:10.1f} {after_bytes / 1e3:9.1f} "
+              f"{before_ms:10.1f} {after_ms:9.1f}")
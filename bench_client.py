@@ -0,0 +1,95 @@
+"""
+Load benchmark: many sessions requesting the same symbols, plain
+`requests.get` per call vs the asyncio MarketDataClient (pooling, limits,
+coalescing), against the local fake server.
+
+Usage: python bench_client.py [sessions] [latency_ms]
+"""
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+from fake_market_server import FakeMarketServer
+from market_client import MarketDataClient
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+LATENCY = (int(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+SYMBOLS = ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ITC.NS",
+           "SBIN.NS", "LT.NS", "WIPRO.NS", "TITAN.NS", "CIPLA.NS"]
+
+
+def run_sessions(work):
+    """Run `work(latencies)` in SESSIONS threads at once; returns (wall, latencies)."""
+    latencies = []
+    lock = threading.Lock()
+    start = threading.Barrier(SESSIONS)
+
+    def session():
+        local = []
+        start.wait()
+        work(local)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session) for _ in range(SESSIONS)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, latencies
+
+
+def plain(server):
+    def work(latencies):
+        for symbol in SYMBOLS:
+            t0 = time.perf_counter()
+            requests.get(f"{server.url}/v8/finance/chart/{symbol}", params={"range": "max", "interval": "1d"}, timeout=30).json()
+            latencies.append(time.perf_counter() - t0)
+    return work
+
+
+def pooled(client):
+    def work(latencies):
+        for symbol in SYMBOLS:
+            t0 = time.perf_counter()
+            client.history_sync(symbol)
+            latencies.append(time.perf_counter() - t0)
+    return work
+
+
+def report(label, wall, latencies, hits):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:24s} {wall:8.2f}s {statistics.median(latencies) * 1000:9.1f} {p99 * 1000:9.1f} {hits:8d}")
+
+
+print("=" * 70)
+print(f"MARKET CLIENT LOAD ({SESSIONS} sessions x {len(SYMBOLS)} symbols, {LATENCY * 1000:.0f} ms upstream)")
+print("=" * 70)
+print(f"{'':24s} {'wall':>9s} {'p50 ms':>9s} {'p99 ms':>9s} {'upstream':>8s}")
+
+server = FakeMarketServer(latency=LATENCY).start()
+wall, lat = run_sessions(plain(server))
+report("requests.get per call", wall, lat, sum(server.hits.values()))
+server.stop()
+
+server = FakeMarketServer(latency=LATENCY).start()
+client = MarketDataClient(base_url=server.url)
+wall, lat = run_sessions(pooled(client))
+report("MarketDataClient", wall, lat, sum(server.hits.values()))
+print(f"  coalesced {client.stats['coalesced']} of {client.stats['calls']} calls")
+client.close()
+server.stop()
+
+# Flaky upstream: every call should still succeed through jittered retries
+server = FakeMarketServer(latency=LATENCY, fail_rate=0.2, seed=1).start()
+client = MarketDataClient(base_url=server.url, retries=4, backoff=0.05)
+wall, lat = run_sessions(pooled(client))
+report("client, 20% HTTP 503", wall, lat, sum(server.hits.values()))
+print(f"  retries {client.stats['retries']}, failures {client.stats['failures']}")
+client.close()
+server.stop()
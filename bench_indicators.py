@@ -0,0 +1,82 @@
+"""
+Benchmark: predict_signal feature engineering.
+Compares the original per-indicator `ta` calls, the fused batch mode and the
+incremental one-bar update, and checks that all three agree.
+
+Usage: python bench_indicators.py [bars]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import ta
+
+import indicators
+
+BARS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+REPEAT = 20
+
+
+def make_bars(n):
+    rng = np.random.default_rng(7)
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n, tz="Asia/Kolkata")
+    close = 1000 + rng.standard_normal(n).cumsum() * 10
+    return pd.DataFrame({
+        'Open': close,
+        'High': close + rng.random(n) * 10,
+        'Low': close - rng.random(n) * 10,
+        'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, n).astype(float),
+    }, index=idx)
+
+
+def ta_indicators(df):
+    """The feature block predict_signal used before the indicator engine."""
+    out = pd.DataFrame(index=df.index)
+    out['SMA_50'] = ta.trend.sma_indicator(df['Close'], window=50)
+    out['SMA_200'] = ta.trend.sma_indicator(df['Close'], window=200)
+    out['EMA_20'] = ta.trend.ema_indicator(df['Close'], window=20)
+    out['MACD'] = ta.trend.macd(df['Close'])
+    out['MACD_Signal'] = ta.trend.macd_signal(df['Close'])
+    out['RSI'] = ta.momentum.rsi(df['Close'], window=14)
+    out['Stoch_K'] = ta.momentum.stoch(df['High'], df['Low'], df['Close'], window=14, smooth_window=3)
+    out['BB_Upper'] = ta.volatility.bollinger_hband(df['Close'], window=20, window_dev=2)
+    out['BB_Lower'] = ta.volatility.bollinger_lband(df['Close'], window=20, window_dev=2)
+    out['ATR'] = ta.volatility.average_true_range(df['High'], df['Low'], df['Close'], window=14)
+    out['OBV'] = ta.volume.on_balance_volume(df['Close'], df['Volume'])
+    return out
+
+
+def timed(fn, repeat=REPEAT):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat, result
+
+
+df = make_bars(BARS)
+
+t_ta, ref = timed(lambda: ta_indicators(df))
+t_batch, batch = timed(lambda: indicators.compute_indicators(df))
+
+# Incremental: state warmed on all but the last bar, then one update
+_, state = indicators.compute_indicators(df.iloc[:-1], return_state=True)
+last = df.iloc[-1]
+t_inc, row = timed(lambda: state.copy().update(last['High'], last['Low'], last['Close'], last['Volume']), 1000)
+
+print("=" * 70)
+print(f"INDICATOR BENCHMARK ({BARS} bars)")
+print("=" * 70)
+print(f"ta (11 separate calls):   {t_ta * 1000:8.3f} ms")
+print(f"fused batch:              {t_batch * 1000:8.3f} ms")
+print(f"incremental (1 new bar):  {t_inc * 1000:8.3f} ms  (incl. state copy)")
+
+print("\nMax relative error vs ta:")
+for i, col in enumerate(indicators.COLUMNS):
+    a, b = batch[col].to_numpy(), ref[col].to_numpy()
+    mask = ~np.isnan(b)
+    assert (np.isnan(a) == np.isnan(b)).all(), f"NaN layout differs for {col}"
+    err = np.max(np.abs(a[mask] - b[mask]) / np.maximum(1.0, np.abs(b[mask])))
+    inc_err = abs(row[i] - b[-1]) / max(1.0, abs(b[-1]))
+    print(f"  {col:12s} batch {err:.2e}  incremental {inc_err:.2e}")
@@ -0,0 +1,99 @@
+"""
+Benchmark: ledger replay.
+Times ledger.replay on a synthetic transaction history and checks the
+average-cost and FIFO results against a one-trade-at-a-time Python replay.
+
+Usage: python bench_ledger.py [transactions]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import ledger
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+SYMBOLS = 500
+
+
+def make_transactions(n):
+    """Random BUY/SELL history that never sells more than is held."""
+    rng = np.random.default_rng(7)
+    symbols = rng.integers(0, SYMBOLS, n)
+    qty = rng.integers(1, 100, n)
+    price = np.round(rng.uniform(50, 5000, n), 2)
+    want_sell = rng.random(n) < 0.4
+    held = np.zeros(SYMBOLS, dtype=np.int64)
+    types = np.empty(n, dtype=object)
+    for i in range(n):
+        s = symbols[i]
+        if want_sell[i] and held[s] > 0:
+            qty[i] = min(qty[i], held[s])
+            held[s] -= qty[i]
+            types[i] = "SELL"
+        else:
+            held[s] += qty[i]
+            types[i] = "BUY"
+    return pd.DataFrame({
+        "symbol": [f"SYM{s}.NS" for s in symbols],
+        "type": types,
+        "quantity": qty,
+        "price": price,
+    })
+
+
+def python_replay(tx):
+    """Reference: the trade form's incremental average cost plus FIFO lots."""
+    out = {}
+    for symbol, kind, q, p in zip(tx["symbol"], tx["type"], tx["quantity"], tx["price"]):
+        qty, avg, realized, lots, fifo_realized = out.get(symbol, (0, 0.0, 0.0, [], 0.0))
+        if kind == "BUY":
+            avg = (qty * avg + q * p) / (qty + q)
+            qty += q
+            lots.append([q, p])
+        else:
+            realized += q * (p - avg)
+            qty -= q
+            remaining, cost = q, 0.0
+            while remaining:
+                take = min(remaining, lots[0][0])
+                cost += take * lots[0][1]
+                lots[0][0] -= take
+                remaining -= take
+                if lots[0][0] == 0:
+                    lots.pop(0)
+            fifo_realized += q * p - cost
+            if qty == 0:
+                avg = 0.0
+        out[symbol] = (qty, avg, realized, lots, fifo_realized)
+    return out
+
+
+tx = make_transactions(ROWS)
+
+t0 = time.perf_counter()
+result = ledger.replay(tx)
+t_vec = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+ref = python_replay(tx)
+t_py = time.perf_counter() - t0
+
+print("=" * 70)
+print(f"LEDGER REPLAY ({ROWS:,} transactions, {SYMBOLS} symbols)")
+print("=" * 70)
+print(f"python loop:   {t_py:8.3f} s")
+print(f"vectorized:    {t_vec:8.3f} s  ({t_py / t_vec:.1f}x)")
+
+worst = {"quantity": 0.0, "avg_cost": 0.0, "realized_pnl": 0.0, "fifo_realized_pnl": 0.0}
+for symbol, (qty, avg, realized, lots, fifo_realized) in ref.items():
+    row = result.loc[symbol]
+    worst["quantity"] = max(worst["quantity"], abs(row["quantity"] - qty))
+    worst["avg_cost"] = max(worst["avg_cost"], abs(row["avg_cost"] - avg))
+    worst["realized_pnl"] = max(worst["realized_pnl"], abs(row["realized_pnl"] - realized))
+    worst["fifo_realized_pnl"] = max(worst["fifo_realized_pnl"], abs(row["fifo_realized_pnl"] - fifo_realized))
+
+print("\nMax absolute difference vs python loop:")
+for col, err in worst.items():
+    print(f"  {col:18s} {err:.2e}")
@@ -0,0 +1,69 @@
+"""
+Benchmark: watchlist quote refresh, serial per-symbol vs batched get_quotes.
+Uses a stubbed fetcher with configurable latency instead of Yahoo.
+
+Usage: python bench_quotes.py [latency_seconds]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import market_data as md
+
+LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+SIZES = [5, 10, 20, 40, 80]
+
+
+def make_frames(n):
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=600, tz="Asia/Kolkata")
+    rng = np.random.default_rng(42)
+    return {
+        f"SYM{i}.NS": pd.DataFrame({"Close": 100 + rng.standard_normal(len(idx)).cumsum()}, index=idx)
+        for i in range(n)
+    }
+
+
+def serial_refresh(fetcher, symbols):
+    """Old get_stock_data pattern: history('1d') then history('5d') per symbol."""
+    for sym in symbols:
+        fetcher(sym, start=md.period_start("1d"))
+        fetcher(sym, start=md.period_start("5d"))
+
+
+class FanoutFetcher(md.FixtureFetcher):
+    """Same stub without a bulk mode, to exercise the thread fan-out path."""
+    fetch_many = None
+
+
+print("=" * 70)
+print(f"QUOTE REFRESH BENCHMARK (stub latency {LATENCY * 1000:.0f} ms)")
+print("=" * 70)
+print(f"{'symbols':>8} {'serial':>10} {'fan-out':>10} {'bulk':>10} {'calls s/f/b':>14}")
+
+for n in SIZES:
+    frames = make_frames(n)
+    symbols = list(frames)
+
+    serial = md.FixtureFetcher(frames, latency=LATENCY)
+    t0 = time.perf_counter()
+    serial_refresh(serial, symbols)
+    t_serial = time.perf_counter() - t0
+
+    fanout = FanoutFetcher(frames, latency=LATENCY)
+    md.set_fetcher(fanout)
+    t0 = time.perf_counter()
+    md.get_quotes(symbols)
+    t_fanout = time.perf_counter() - t0
+
+    bulk = md.FixtureFetcher(frames, latency=LATENCY)
+    md.set_fetcher(bulk)
+    t0 = time.perf_counter()
+    md.get_quotes(symbols)
+    t_bulk = time.perf_counter() - t0
+
+    calls = f"{serial.calls}/{fanout.calls}/{bulk.calls}"
+    print(f"{n:>8} {t_serial:>9.3f}s {t_fanout:>9.3f}s {t_bulk:>9.3f}s {calls:>14}")
+
+md.set_fetcher(None)
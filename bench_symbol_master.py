@@ -0,0 +1,100 @@
+"""
+Benchmark: symbol universe at startup.
+Indexing a listings CSV into the in-memory SymbolIndex (the fallback when
+the CSV cannot be compiled), compiling the CSV on first start, and opening
+an already compiled, memory-mapped symbol master, on a synthetic universe.
+
+Usage: python bench_symbol_master.py [symbols]
+"""
+import csv
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import symbol_master
+import symbol_search
+
+SYMBOLS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+WORDS = ["India", "Tech", "Bank", "Power", "Steel", "Pharma", "Motors", "Finance", "Energy", "Capital",
+         "Industries", "Cement", "Chemicals", "Infra", "Textiles", "Foods", "Agro", "Global", "Ventures"]
+# Search-as-you-type budget for the compiled master (what symbol_search serves from)
+TARGET_P50_MS = 1.0
+QUERIES = ["reli", "tata mot", "bank", "infosys", "relaince", "a", "hdfc bank", "pharma ind"]
+
+
+def write_listings(path, n):
+    rng = random.Random(0)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["SYMBOL", "NAME OF COMPANY", "SERIES", "ISIN NUMBER", "INDUSTRY"])
+        for i in range(n):
+            symbol = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 9))) + str(i)
+            name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))) + " Ltd"
+            writer.writerow([symbol, name, "EQ", f"INE{i:06d}01", rng.choice(WORDS)])
+
+
+def measure(load):
+    """(object, seconds, peak Python heap bytes); timed without tracemalloc."""
+    t0 = time.perf_counter()
+    obj = load()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, elapsed, peak
+
+
+def query_ms(index):
+    times = []
+    for _ in range(5):
+        for q in QUERIES:
+            t0 = time.perf_counter()
+            index.search(q)
+            times.append(time.perf_counter() - t0)
+    return np.median(times) * 1000, np.max(times) * 1000
+
+
+directory = tempfile.mkdtemp()
+listings = os.path.join(directory, "symbols.csv")
+compiled = os.path.join(directory, "symbols.bin")
+write_listings(listings, SYMBOLS)
+
+t0 = time.perf_counter()
+symbol_master.build(symbol_search.load_master(listings), compiled)
+build_time = time.perf_counter() - t0
+
+in_memory, csv_time, csv_peak = measure(lambda: symbol_search.SymbolIndex(symbol_search.load_master(listings)))
+
+def first_start():
+    os.remove(compiled)
+    return symbol_search.open_master(listings, compiled)
+
+
+first, first_time, first_peak = measure(first_start)
+mapped, map_time, map_peak = measure(lambda: symbol_master.SymbolMaster(compiled))
+
+print("=" * 70)
+print(f"SYMBOL MASTER BENCHMARK ({SYMBOLS} symbols)")
+print("=" * 70)
+print(f"{'':26s} {'startup ms':>11s} {'heap MB':>9s} {'p50 ms':>8s} {'max ms':>8s}")
+for label, index, elapsed, peak in [
+    ("CSV -> SymbolIndex", in_memory, csv_time, csv_peak),
+    ("CSV compiled on first start", first, first_time, first_peak),
+    ("compiled master (mmap)", mapped, map_time, map_peak),
+]:
+    p50, worst = query_ms(index)
+    print(f"{label:26s} {elapsed * 1000:11.1f} {peak / 1e6:9.1f} {p50:8.2f} {worst:8.2f}")
+    if index is mapped:
+        print(f"{'':26s} p50 target < {TARGET_P50_MS:.1f} ms: {'met' if p50 < TARGET_P50_MS else 'MISSED'}")
+print(f"\nCompiled file: {os.path.getsize(compiled) / 1e6:.1f} MB "
+      f"(CSV {os.path.getsize(listings) / 1e6:.1f} MB), built in {build_time:.2f}s")
+
+shutil.rmtree(directory)
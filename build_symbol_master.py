@@ -0,0 +1,36 @@
+"""
+Compile listings CSVs (NSE EQUITY_L, BSE equity list, ...) plus
+nifty_stocks.STOCKS into the memory-mapped symbol master read by
+symbol_search.
+
+Usage: python build_symbol_master.py [listings.csv ...] [-o data/symbols.bin]
+"""
+import sys
+import time
+
+import nifty_stocks
+import symbol_master
+import symbol_search
+
+
+def main(args):
+    output = symbol_master.SYMBOL_MASTER_BIN
+    if "-o" in args:
+        i = args.index("-o")
+        output = args[i + 1]
+        args = args[:i] + args[i + 2:]
+    paths = args or [symbol_search.SYMBOL_MASTER_PATH]
+
+    entries = list(nifty_stocks.STOCKS)
+    for path in paths:
+        loaded = symbol_search.load_master(path)
+        print(f"{path}: {len(loaded)} listings")
+        entries.extend(loaded)
+
+    t0 = time.perf_counter()
+    rows = symbol_master.build(entries, output)
+    print(f"Wrote {rows} symbols to {output} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,159 @@
+"""
+Chart payload preparation: fit price history to a point budget before it
+goes to Plotly.
+
+A chart `width` pixels wide shows at most width / CANDLE_PX candles and
+width / LINE_PX line points; anything more is bytes the browser has to
+parse and draw for no visible detail. Candles are aggregated to the finest
+of daily / weekly / monthly / quarterly / yearly bars that fits the budget
+(true OHLC: first open, max high, min low, last close, summed volume), and
+line/area series are reduced with Largest-Triangle-Three-Buckets, which
+keeps the visual peaks and troughs.
+
+Results are cached per (symbol, period, interval, width) and recomputed only
+when the underlying history changes.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import market_data as md
+
+CHART_WIDTH = 1200
+CANDLE_PX = 3
+LINE_PX = 1
+MA_WINDOW = 20
+MAX_ENTRIES = 256
+
+# Candle aggregation levels, finest first (pandas period aliases)
+OHLC_RULES = [("W", "Weekly"), ("M", "Monthly"), ("Q", "Quarterly"), ("Y", "Yearly")]
+OHLC_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _periods(index, rule):
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_period(rule)
+
+
+def resample_ohlc(df, rule):
+    """OHLCV bars aggregated per `rule` period, labelled with each period's first bar date."""
+    keys = _periods(df.index, rule)
+    columns = {c: f for c, f in OHLC_AGG.items() if c in df.columns}
+    grouped = df[list(columns)].groupby(keys, sort=True)
+    out = grouped.agg(columns)
+    out.index = df.index.to_series().groupby(keys, sort=True).first().to_numpy()
+    out.index.name = df.index.name
+    return out
+
+
+def fit_candles(df, budget):
+    """(bars, label) with at most `budget` candles; label is None when no aggregation was needed."""
+    if len(df) <= budget:
+        return df, None
+    for rule, label in OHLC_RULES:
+        if _periods(df.index, rule).nunique() <= budget or rule == OHLC_RULES[-1][0]:
+            return resample_ohlc(df, rule), label
+
+
+def lttb(x, y, threshold):
+    """
+    Positions of the `threshold` points of (x, y) chosen by Largest-Triangle-
+    Three-Buckets; first and last points are always kept.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket i covers [edges[i], edges[i + 1]); the first and last points are their own buckets
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    cx = np.concatenate([[0.0], np.cumsum(x)])
+    cy = np.concatenate([[0.0], np.cumsum(y)])
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = (end, edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        count = next_end - next_start
+        avg_x = (cx[next_end] - cx[next_start]) / count
+        avg_y = (cy[next_end] - cy[next_start]) / count
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(series, threshold):
+    """Series reduced to `threshold` points with LTTB (x = index position in time)."""
+    series = series.dropna()
+    if len(series) <= threshold:
+        return series
+    x = series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else np.arange(len(series))
+    return series.iloc[lttb(x, series.to_numpy(dtype=float), threshold)]
+
+
+def prepare_candles(df, width=CHART_WIDTH):
+    """
+    Candles and MA20 for a chart `width` pixels wide:
+    {"bars", "ma", "label", "source_bars"}. The moving average is computed
+    on the full-resolution closes, then downsampled.
+    """
+    bars, label = fit_candles(df, max(width // CANDLE_PX, 3))
+    ma = df["Close"].rolling(window=MA_WINDOW).mean() if len(df) >= MA_WINDOW else pd.Series(dtype=float)
+    return {
+        "bars": bars,
+        "ma": downsample(ma, max(width // LINE_PX, 3)),
+        "label": label,
+        "source_bars": len(df),
+    }
+
+
+def prepare_line(df, width=CHART_WIDTH, column="Close"):
+    """`column` of df downsampled for a line/area chart `width` pixels wide."""
+    return downsample(df[column], max(width // LINE_PX, 3))
+
+
+def _cached(key, df, build):
+    # Same length and last bar -> same history; intraday updates move the last close
+    stamp = (len(df), df.index[-1] if len(df) else None, float(df["Close"].iloc[-1]) if len(df) else None)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            _cache.move_to_end(key)
+            return hit[1]
+    value = build(df)
+    with _lock:
+        _cache[key] = (stamp, value)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return value
+
+
+def candles(symbol, period, interval="1d", width=CHART_WIDTH):
+    """Cached prepare_candles for symbol's bar-store history."""
+    df = md.get_history(symbol, period, interval)
+    return _cached(("candles", symbol, period, interval, width), df, lambda d: prepare_candles(d, width))
+
+
+def line(symbol, period, interval="1d", width=CHART_WIDTH):
+    """Cached prepare_line (Close) for symbol's bar-store history."""
+    df = md.get_history(symbol, period, interval)
+    return _cached(("line", symbol, period, interval, width), df, lambda d: prepare_line(d, width))
+
+
+def clear():
+    with _lock:
+        _cache.clear()
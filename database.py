@@ -1,8 +1,11 @@
 import os
+import threading
+import time
 # from dotenv import load_dotenv # Removed to avoid UnicodeDecodeError
 from datetime import datetime
 import bcrypt
-from sqlalchemy import create_engine, text, MetaData, Table, Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, DECIMAL
+from sqlalchemy import create_engine, event, text, MetaData, Table, Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index, DECIMAL, Float
+from sqlalchemy.pool import QueuePool, StaticPool
 
 # load_dotenv() # Replaced with robust loader below
 
@@ -60,9 +63,97 @@ elif DATABASE_URL.startswith("postgres://"):
     # Fix for SQLAlchemy expecting postgresql://
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL)
+# --- Connection Pool ---
+# Tunable via env so the pool can be sized under load without code changes
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+SQLITE_SHARED_CACHE = os.getenv("SQLITE_SHARED_CACHE", "false").lower() in ("1", "true", "yes")
+
+_pool_stats = {"checkouts": 0, "wait_total": 0.0, "wait_max": 0.0, "connects": 0}
+_pool_stats_lock = threading.Lock()
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with _pool_stats_lock:
+                _pool_stats["checkouts"] += 1
+                _pool_stats["wait_total"] += waited
+                _pool_stats["wait_max"] = max(_pool_stats["wait_max"], waited)
+
+def _create_engine(url):
+    if url.startswith("sqlite"):
+        if ":memory:" in url or url.rstrip("/") == "sqlite:":
+            # One shared in-memory database for every thread
+            return create_engine(
+                "sqlite:///file::memory:?cache=shared&uri=true",
+                poolclass=StaticPool,
+                connect_args={"check_same_thread": False},
+            )
+        if SQLITE_SHARED_CACHE:
+            path = url.split("///", 1)[1]
+            url = f"sqlite:///file:{path}?cache=shared&uri=true"
+        engine = create_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
+            connect_args={"check_same_thread": False, "timeout": POOL_TIMEOUT},
+        )
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_conn, _record):
+            # WAL lets readers run alongside the writer; NORMAL is durable enough under WAL
+            cur = dbapi_conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute(f"PRAGMA busy_timeout={int(POOL_TIMEOUT * 1000)}")
+            cur.execute("PRAGMA temp_store=MEMORY")
+            cur.close()
+    else:
+        engine = create_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
+            pool_recycle=POOL_RECYCLE,
+            pool_pre_ping=POOL_PRE_PING,
+        )
+
+    @event.listens_for(engine, "connect")
+    def _count_connect(_dbapi_conn, _record):
+        with _pool_stats_lock:
+            _pool_stats["connects"] += 1
+
+    return engine
+
+engine = _create_engine(DATABASE_URL)
 metadata = MetaData()
 
+def pool_stats():
+    """Pool occupancy and checkout wait times, for sizing the pool under load"""
+    pool = engine.pool
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+    stats["wait_avg"] = stats["wait_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    return stats
+
 # --- Table Definitions (SQLAlchemy Core) ---
 # --- Table Definitions (SQLAlchemy Core) ---
 users = Table('users', metadata,
@@ -78,7 +169,8 @@ watchlist_names = Table('watchlist_names', metadata,
     Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE')),
     Column('name', String(50)),
     Column('created_at', DateTime),
-    UniqueConstraint('user_id', 'name', name='unique_wl_name')
+    UniqueConstraint('user_id', 'name', name='unique_wl_name'),
+    Index('ix_watchlist_names_user', 'user_id')
 )
 
 watchlist_items = Table('watchlist_items', metadata,
@@ -86,7 +178,9 @@ watchlist_items = Table('watchlist_items', metadata,
     Column('watchlist_id', Integer, ForeignKey('watchlist_names.id', ondelete='CASCADE')),
     Column('symbol', String(20)),
     Column('added_at', DateTime),
-    UniqueConstraint('watchlist_id', 'symbol', name='unique_stock')
+    UniqueConstraint('watchlist_id', 'symbol', name='unique_stock'),
+    # get_tracked_symbols walks the distinct symbols off this index
+    Index('ix_watchlist_items_symbol', 'symbol')
 )
 
 portfolio_names = Table('portfolio_names', metadata,
@@ -94,7 +188,8 @@ portfolio_names = Table('portfolio_names', metadata,
     Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE')),
     Column('name', String(50)),
     Column('created_at', DateTime),
-    UniqueConstraint('user_id', 'name', name='unique_pf_name')
+    UniqueConstraint('user_id', 'name', name='unique_pf_name'),
+    Index('ix_portfolio_names_user', 'user_id')
 )
 
 portfolio_holdings = Table('portfolio_holdings', metadata,
@@ -103,7 +198,10 @@ portfolio_holdings = Table('portfolio_holdings', metadata,
     Column('symbol', String(20)),
     Column('quantity', Integer),
     Column('avg_price', DECIMAL(10, 2)),
-    UniqueConstraint('portfolio_id', 'symbol', name='unique_holding')
+    UniqueConstraint('portfolio_id', 'symbol', name='unique_holding'),
+    # Covers get_portfolio_holdings without touching the table rows
+    Index('ix_holdings_portfolio_cover', 'portfolio_id', 'symbol', 'quantity', 'avg_price'),
+    Index('ix_holdings_symbol', 'symbol')
 )
 
 transactions = Table('transactions', metadata,
@@ -113,7 +211,33 @@ transactions = Table('transactions', metadata,
     Column('type', String(10)),
     Column('quantity', Integer),
     Column('price', DECIMAL(10, 2)),
-    Column('date', DateTime)
+    Column('date', DateTime),
+    # get_transactions and the (date, id) keyset pages: per-portfolio and global "newest first"
+    Index('ix_transactions_portfolio_date_id', 'portfolio_id', 'date', 'id'),
+    Index('ix_transactions_date', 'date')
+)
+
+# Ledger adjustments, not trades: positions carried in or out at book cost
+# (holdings entered or removed by hand). The ledger replays them, History and
+# exports leave them out, and performance.py values them at the day's close.
+TRANSFER_IN = "XFER_IN"
+TRANSFER_OUT = "XFER_OUT"
+
+news_headlines = Table('news_headlines', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('story_id', String(40)),
+    Column('symbol', String(20)),
+    Column('title', String(500)),
+    Column('link', String(1000)),
+    Column('publisher', String(100)),
+    Column('published_at', DateTime),
+    Column('sentiment', Float),
+    Column('fetched_at', DateTime),
+    UniqueConstraint('story_id', 'symbol', name='unique_story_symbol'),
+    # Rolling sentiment reads (symbol, published_at >= since) straight off the index
+    Index('ix_news_symbol_published', 'symbol', 'published_at', 'sentiment'),
+    # prune_headlines deletes by age across all symbols
+    Index('ix_news_published', 'published_at')
 )
 
 def get_connection():
@@ -122,6 +246,10 @@ def get_connection():
 def init_db():
     try:
         metadata.create_all(engine)
+        # create_all skips indexes on tables that already exist; add any missing ones
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
         print("Database initialized successfully.")
     except Exception as e:
         print(f"DB Init Error: {e}")
@@ -189,14 +317,64 @@ def create_user_by_mobile(mobile):
     except Exception as e:
         return False, f"Error: {str(e)}"
 
+# --- Read-through Cache ---
+# Per-user/per-list query results, invalidated precisely by the write helpers below.
+# Each scope (e.g. ("holdings", portfolio_id)) has a version; a read only stores its
+# result if no write bumped the version while it was querying, and invalidating a
+# scope drops every entry stored under it. The TTL is a backstop for writes made
+# outside this process (scripts, other workers).
+CACHE_TTL = float(os.getenv("DB_CACHE_TTL", "300"))
+
+_cache = {}
+_cache_keys = {}  # scope -> keys stored under it
+_cache_versions = {}
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+def _read_through(scope, key, loader):
+    now = time.time()
+    with _cache_lock:
+        version = _cache_versions.get(scope, 0)
+        hit = _cache.get(key)
+        if hit and hit[0] == version and now - hit[1] < CACHE_TTL:
+            _cache_stats["hits"] += 1
+            return [dict(row) if isinstance(row, dict) else row for row in hit[2]]
+        _cache_stats["misses"] += 1
+
+    value = loader()
+    with _cache_lock:
+        if _cache_versions.get(scope, 0) == version:
+            _cache[key] = (version, now, value)
+            _cache_keys.setdefault(scope, set()).add(key)
+    return [dict(row) if isinstance(row, dict) else row for row in value]
+
+def _invalidate(*scopes):
+    with _cache_lock:
+        for scope in scopes:
+            _cache_versions[scope] = _cache_versions.get(scope, 0) + 1
+            for key in _cache_keys.pop(scope, ()):
+                _cache.pop(key, None)
+            _cache_stats["invalidations"] += 1
+
+def _cache_version(scope):
+    """Current version of a cache scope; it changes whenever a write invalidates the scope."""
+    with _cache_lock:
+        return _cache_versions.get(scope, 0)
+
+def cache_stats():
+    with _cache_lock:
+        return dict(_cache_stats, entries=len(_cache))
+
 # --- Watchlist Management ---
 def get_watchlists(user_id):
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("SELECT * FROM watchlist_names WHERE user_id = :user_id"),
-            {"user_id": user_id}
-        ).mappings().fetchall()
-    return [dict(row) for row in result]
+    def load():
+        with engine.connect() as conn:
+            result = conn.execute(
+                text("SELECT * FROM watchlist_names WHERE user_id = :user_id"),
+                {"user_id": user_id}
+            ).mappings().fetchall()
+        return [dict(row) for row in result]
+    return _read_through(("watchlists", user_id), ("watchlists", user_id), load)
 
 def create_watchlist(name, user_id):
     try:
@@ -205,24 +383,32 @@ def create_watchlist(name, user_id):
                 text("INSERT INTO watchlist_names (name, user_id, created_at) VALUES (:name, :user_id, :created_at)"),
                 {"name": name, "user_id": user_id, "created_at": datetime.now()}
             )
+        _invalidate(("watchlists", user_id))
         return True
     except:
         return False
 
 def delete_watchlist(watchlist_id):
     with engine.begin() as conn:
+        user_id = conn.execute(
+            text("SELECT user_id FROM watchlist_names WHERE id = :id"),
+            {"id": watchlist_id}
+        ).scalar()
         conn.execute(
             text("DELETE FROM watchlist_names WHERE id = :id"),
             {"id": watchlist_id}
         )
+    _invalidate(("watchlists", user_id), ("watchlist_items", watchlist_id))
 
 def get_watchlist_items(watchlist_id):
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("SELECT symbol FROM watchlist_items WHERE watchlist_id = :watchlist_id"),
-            {"watchlist_id": watchlist_id}
-        ).fetchall()
-    return [row[0] for row in result]
+    def load():
+        with engine.connect() as conn:
+            result = conn.execute(
+                text("SELECT symbol FROM watchlist_items WHERE watchlist_id = :watchlist_id"),
+                {"watchlist_id": watchlist_id}
+            ).fetchall()
+        return [row[0] for row in result]
+    return _read_through(("watchlist_items", watchlist_id), ("watchlist_items", watchlist_id), load)
 
 def add_to_watchlist(watchlist_id, symbol):
     try:
@@ -231,6 +417,7 @@ def add_to_watchlist(watchlist_id, symbol):
                 text("INSERT INTO watchlist_items (watchlist_id, symbol, added_at) VALUES (:watchlist_id, :symbol, :added_at)"),
                 {"watchlist_id": watchlist_id, "symbol": symbol, "added_at": datetime.now()}
             )
+        _invalidate(("watchlist_items", watchlist_id))
         return True
     except:
         return False
@@ -241,15 +428,18 @@ def remove_from_watchlist(watchlist_id, symbol):
             text("DELETE FROM watchlist_items WHERE watchlist_id = :watchlist_id AND symbol = :symbol"),
             {"watchlist_id": watchlist_id, "symbol": symbol}
         )
+    _invalidate(("watchlist_items", watchlist_id))
 
 # --- Portfolio Management ---
 def get_portfolios(user_id):
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("SELECT * FROM portfolio_names WHERE user_id = :user_id"),
-            {"user_id": user_id}
-        ).mappings().fetchall()
-    return [dict(row) for row in result]
+    def load():
+        with engine.connect() as conn:
+            result = conn.execute(
+                text("SELECT * FROM portfolio_names WHERE user_id = :user_id"),
+                {"user_id": user_id}
+            ).mappings().fetchall()
+        return [dict(row) for row in result]
+    return _read_through(("portfolios", user_id), ("portfolios", user_id), load)
 
 def create_portfolio(name, user_id):
     try:
@@ -258,24 +448,60 @@ def create_portfolio(name, user_id):
                 text("INSERT INTO portfolio_names (name, user_id, created_at) VALUES (:name, :user_id, :created_at)"),
                 {"name": name, "user_id": user_id, "created_at": datetime.now()}
             )
+        _invalidate(("portfolios", user_id))
         return True
     except:
         return False
 
 def delete_portfolio(portfolio_id):
     with engine.begin() as conn:
+        user_id = conn.execute(
+            text("SELECT user_id FROM portfolio_names WHERE id = :id"),
+            {"id": portfolio_id}
+        ).scalar()
         conn.execute(
             text("DELETE FROM portfolio_names WHERE id = :id"),
             {"id": portfolio_id}
         )
+    _invalidate(("portfolios", user_id), ("holdings", portfolio_id),
+                ("transactions", portfolio_id), ("transactions", None))
 
 def get_portfolio_holdings(portfolio_id):
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("SELECT symbol, quantity, avg_price FROM portfolio_holdings WHERE portfolio_id = :portfolio_id"),
-            {"portfolio_id": portfolio_id}
-        ).mappings().fetchall()
-    return [dict(row) for row in result]
+    def load():
+        with engine.connect() as conn:
+            result = conn.execute(
+                text("SELECT symbol, quantity, avg_price FROM portfolio_holdings WHERE portfolio_id = :portfolio_id"),
+                {"portfolio_id": portfolio_id}
+            ).mappings().fetchall()
+        return [dict(row) for row in result]
+    return _read_through(("holdings", portfolio_id), ("holdings", portfolio_id), load)
+
+def _holding_upsert_sql(accumulate=False):
+    """
+    Single-statement upsert into portfolio_holdings for the current dialect.
+    accumulate=False overwrites quantity/avg_price; accumulate=True adds the
+    incoming quantity and folds its price into a weighted average.
+    avg_price is assigned before quantity because MySQL evaluates SET left to right.
+    """
+    insert = "INSERT INTO portfolio_holdings (portfolio_id, symbol, quantity, avg_price) VALUES (:portfolio_id, :symbol, :quantity, :avg_price)"
+    if engine.dialect.name == "mysql":
+        new_qty, new_price, old_qty, old_price = "VALUES(quantity)", "VALUES(avg_price)", "quantity", "avg_price"
+        conflict = " ON DUPLICATE KEY UPDATE "
+    else:
+        # SQLite (3.24+) and PostgreSQL
+        new_qty, new_price = "excluded.quantity", "excluded.avg_price"
+        old_qty, old_price = "portfolio_holdings.quantity", "portfolio_holdings.avg_price"
+        conflict = " ON CONFLICT (portfolio_id, symbol) DO UPDATE SET "
+
+    if accumulate:
+        assignments = (
+            # * 1.0: SQLite stores whole-rupee prices as INTEGER and would otherwise divide as integers
+            f"avg_price = (({old_qty} * {old_price}) + ({new_qty} * {new_price})) * 1.0 / ({old_qty} + {new_qty}), "
+            f"quantity = {old_qty} + {new_qty}"
+        )
+    else:
+        assignments = f"avg_price = {new_price}, quantity = {new_qty}"
+    return text(insert + conflict + assignments)
 
 def update_portfolio_holding(portfolio_id, symbol, quantity, avg_price):
     with engine.begin() as conn:
@@ -285,23 +511,75 @@ def update_portfolio_holding(portfolio_id, symbol, quantity, avg_price):
                 {"portfolio_id": portfolio_id, "symbol": symbol}
             )
         else:
-            # Check if exists to decide INSERT or UPDATE (SQLite doesn't support ON DUPLICATE KEY UPDATE same as MySQL)
-            # Using a simple check-then-act approach for broad compatibility
-            existing = conn.execute(
-                text("SELECT 1 FROM portfolio_holdings WHERE portfolio_id = :portfolio_id AND symbol = :symbol"),
-                {"portfolio_id": portfolio_id, "symbol": symbol}
+            conn.execute(
+                _holding_upsert_sql(),
+                {"portfolio_id": portfolio_id, "symbol": symbol, "quantity": quantity, "avg_price": avg_price}
+            )
+    _invalidate(("holdings", portfolio_id))
+
+def remove_holding(portfolio_id, symbol, date=None):
+    """
+    Drop a holding and record a TRANSFER_OUT at its average price (a ledger
+    adjustment, not a sale), keeping the transactions ledger in step with
+    portfolio_holdings. Returns (success, message).
+    """
+    params = {"portfolio_id": portfolio_id, "symbol": symbol}
+    try:
+        with engine.begin() as conn:
+            held = conn.execute(
+                text("SELECT quantity, avg_price FROM portfolio_holdings WHERE portfolio_id = :portfolio_id AND symbol = :symbol"),
+                params
             ).fetchone()
-            
-            if existing:
+            conn.execute(
+                text("DELETE FROM portfolio_holdings WHERE portfolio_id = :portfolio_id AND symbol = :symbol"),
+                params
+            )
+            if held is not None and held.quantity > 0:
                 conn.execute(
-                    text("UPDATE portfolio_holdings SET quantity = :quantity, avg_price = :avg_price WHERE portfolio_id = :portfolio_id AND symbol = :symbol"),
-                    {"quantity": quantity, "avg_price": avg_price, "portfolio_id": portfolio_id, "symbol": symbol}
+                    text("INSERT INTO transactions (portfolio_id, symbol, type, quantity, price, date) VALUES (:portfolio_id, :symbol, :type, :quantity, :price, :date)"),
+                    {**params, "type": TRANSFER_OUT, "quantity": held.quantity, "price": float(held.avg_price), "date": date or datetime.now()}
                 )
+    except Exception as e:
+        return False, f"Error: {str(e)}"
+    finally:
+        _invalidate(("holdings", portfolio_id), ("transactions", portfolio_id), ("transactions", None))
+    return True, f"Removed {symbol}"
+
+def record_trade(portfolio_id, symbol, type, quantity, price, date):
+    """
+    Record a trade and apply it to the holding in one transaction.
+    BUY folds the price into the weighted average inside the database;
+    SELL reduces quantity only if enough is held (average cost is unchanged).
+    Returns (success, message).
+    """
+    params = {"portfolio_id": portfolio_id, "symbol": symbol, "quantity": quantity, "avg_price": price}
+    try:
+        with engine.begin() as conn:
+            if type == "BUY":
+                conn.execute(_holding_upsert_sql(accumulate=True), params)
             else:
+                sold = conn.execute(
+                    text("UPDATE portfolio_holdings SET quantity = quantity - :quantity WHERE portfolio_id = :portfolio_id AND symbol = :symbol AND quantity >= :quantity"),
+                    params
+                )
+                if sold.rowcount == 0:
+                    held = conn.execute(
+                        text("SELECT quantity FROM portfolio_holdings WHERE portfolio_id = :portfolio_id AND symbol = :symbol"),
+                        params
+                    ).scalar() or 0
+                    return False, f"Insufficient Quantity! You only have {held}."
                 conn.execute(
-                    text("INSERT INTO portfolio_holdings (portfolio_id, symbol, quantity, avg_price) VALUES (:portfolio_id, :symbol, :quantity, :avg_price)"),
-                    {"portfolio_id": portfolio_id, "symbol": symbol, "quantity": quantity, "avg_price": avg_price}
+                    text("DELETE FROM portfolio_holdings WHERE portfolio_id = :portfolio_id AND symbol = :symbol AND quantity <= 0"),
+                    params
                 )
+            conn.execute(
+                text("INSERT INTO transactions (portfolio_id, symbol, type, quantity, price, date) VALUES (:portfolio_id, :symbol, :type, :quantity, :price, :date)"),
+                {"portfolio_id": portfolio_id, "symbol": symbol, "type": type, "quantity": quantity, "price": price, "date": date}
+            )
+        _invalidate(("holdings", portfolio_id), ("transactions", portfolio_id), ("transactions", None))
+        return True, f"{'Bought' if type == 'BUY' else 'Sold'} {quantity} {symbol} at ₹{price}"
+    except Exception as e:
+        return False, f"Error: {str(e)}"
 
 # --- Transaction Operations ---
 def add_transaction(portfolio_id, symbol, type, quantity, price, date):
@@ -310,17 +588,187 @@ def add_transaction(portfolio_id, symbol, type, quantity, price, date):
             text("INSERT INTO transactions (portfolio_id, symbol, type, quantity, price, date) VALUES (:portfolio_id, :symbol, :type, :quantity, :price, :date)"),
             {"portfolio_id": portfolio_id, "symbol": symbol, "type": type, "quantity": quantity, "price": price, "date": date}
         )
+    _invalidate(("transactions", portfolio_id), ("transactions", None))
 
 def get_transactions(portfolio_id=None, limit=50):
-    with engine.connect() as conn:
-        if portfolio_id:
-            result = conn.execute(
-                text("SELECT * FROM transactions WHERE portfolio_id = :portfolio_id ORDER BY date DESC LIMIT :limit"),
-                {"portfolio_id": portfolio_id, "limit": limit}
-            ).mappings().fetchall()
-        else:
+    def load():
+        with engine.connect() as conn:
+            if portfolio_id:
+                result = conn.execute(
+                    text("SELECT * FROM transactions WHERE portfolio_id = :portfolio_id AND type IN ('BUY', 'SELL') ORDER BY date DESC LIMIT :limit"),
+                    {"portfolio_id": portfolio_id, "limit": limit}
+                ).mappings().fetchall()
+            else:
+                result = conn.execute(
+                    text("SELECT * FROM transactions WHERE type IN ('BUY', 'SELL') ORDER BY date DESC LIMIT :limit"),
+                    {"limit": limit}
+                ).mappings().fetchall()
+        return [dict(row) for row in result]
+    scope = ("transactions", portfolio_id or None)
+    return _read_through(scope, scope + (limit,), load)
+
+# --- Keyset-paginated History ---
+# A cursor is the (date, id) of the last row seen; the next page is everything
+# strictly older. The row-value predicate is a single range on
+# ix_transactions_portfolio_date_id, so the planner seeks straight to the
+# cursor instead of filtering an OR over everything newer. Only trades are
+# listed; TRANSFER_IN/OUT adjustments stay in the ledger.
+TRANSACTION_COLUMNS = ["id", "portfolio_id", "symbol", "type", "quantity", "price", "date"]
+
+def _keyset_query(before, limit=True):
+    sql = "SELECT id, portfolio_id, symbol, type, quantity, price, date FROM transactions WHERE portfolio_id = :portfolio_id AND type IN ('BUY', 'SELL')"
+    if before is not None:
+        sql += " AND (date, id) < (:before_date, :before_id)"
+    sql += " ORDER BY date DESC, id DESC"
+    if limit:
+        sql += " LIMIT :limit"
+    return text(sql)
+
+def _keyset_params(portfolio_id, before, **extra):
+    params = {"portfolio_id": portfolio_id, **extra}
+    if before is not None:
+        params["before_date"], params["before_id"] = before
+    return params
+
+def get_transactions_page(portfolio_id, before=None, page_size=50):
+    """
+    One page of a portfolio's history, newest first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Pages are cached per cursor until the portfolio's transactions change.
+    """
+    def load():
+        with engine.connect() as conn:
             result = conn.execute(
-                text("SELECT * FROM transactions ORDER BY date DESC LIMIT :limit"),
-                {"limit": limit}
+                _keyset_query(before),
+                _keyset_params(portfolio_id, before, limit=page_size + 1)
             ).mappings().fetchall()
-    return [dict(row) for row in result]
+        return [dict(row) for row in result]
+    scope = ("transactions", portfolio_id)
+    result = _read_through(scope, scope + ("page", before, page_size), load)
+    rows = result[:page_size]
+    next_cursor = (rows[-1]["date"], rows[-1]["id"]) if len(result) > page_size else None
+    return rows, next_cursor
+
+def iter_transactions(portfolio_id, before=None, page_size=1000):
+    """
+    Stream a portfolio's history (newest first) as dicts with a server-side
+    cursor, fetching page_size rows at a time. Never materializes the full history.
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=page_size).execute(
+            _keyset_query(before, limit=False),
+            _keyset_params(portfolio_id, before)
+        ).mappings()
+        for row in result:
+            yield dict(row)
+
+def export_transactions(portfolio_id, fileobj, format="csv", page_size=10000):
+    """
+    Write a portfolio's full history to fileobj in constant memory.
+    format: "csv" (text file object) or "parquet" (binary file object, needs pyarrow).
+    """
+    rows = iter_transactions(portfolio_id, page_size=page_size)
+    if format == "csv":
+        import csv
+        writer = csv.DictWriter(fileobj, fieldnames=TRANSACTION_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+        return
+
+    if format != "parquet":
+        raise ValueError(f"Unsupported export format: {format}")
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("portfolio_id", pa.int64()), ("symbol", pa.string()),
+        ("type", pa.string()), ("quantity", pa.int64()), ("price", pa.float64()),
+        ("date", pa.string()),
+    ])
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        batch = []
+        for row in rows:
+            row["price"] = float(row["price"]) if row["price"] is not None else None
+            row["date"] = str(row["date"])
+            batch.append(row)
+            if len(batch) >= page_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+# --- News Headlines ---
+# Loose index scan: each step seeks the next distinct symbol on the symbol index,
+# so the cost follows the number of distinct symbols rather than the row count
+_DISTINCT_SYMBOLS = """
+    {name}(symbol) AS (
+        SELECT MIN(symbol) FROM {table}
+        UNION ALL
+        SELECT (SELECT MIN(symbol) FROM {table} WHERE symbol > {name}.symbol) FROM {name} WHERE {name}.symbol IS NOT NULL
+    )"""
+
+def get_tracked_symbols():
+    """Every symbol in any user's watchlist or portfolio"""
+    sql = ("WITH RECURSIVE"
+           + _DISTINCT_SYMBOLS.format(name="w", table="watchlist_items") + ","
+           + _DISTINCT_SYMBOLS.format(name="h", table="portfolio_holdings")
+           + " SELECT symbol FROM w UNION SELECT symbol FROM h")
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql)).fetchall()
+    return sorted({row[0] for row in rows if row[0]})
+
+def save_headlines(symbol, stories):
+    """
+    Store scored stories ({id, title, link, publisher, published, sentiment})
+    for symbol; stories already stored for it are skipped. Returns rows inserted.
+    """
+    if not stories:
+        return 0
+    if engine.dialect.name == "mysql":
+        insert, conflict = "INSERT IGNORE INTO", ""
+    else:
+        insert, conflict = "INSERT INTO", " ON CONFLICT (story_id, symbol) DO NOTHING"
+    now = datetime.now()
+    params = [{
+        "story_id": s["id"], "symbol": symbol, "title": s["title"][:500], "link": s["link"][:1000],
+        "publisher": (s.get("publisher") or "")[:100],
+        "published_at": datetime.fromtimestamp(s["published"]) if s["published"] else now,
+        "sentiment": s["sentiment"], "fetched_at": now,
+    } for s in stories]
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(f"{insert} news_headlines (story_id, symbol, title, link, publisher, published_at, sentiment, fetched_at) "
+                 f"VALUES (:story_id, :symbol, :title, :link, :publisher, :published_at, :sentiment, :fetched_at){conflict}"),
+            params
+        )
+    return max(result.rowcount, 0)
+
+def get_headlines(symbol, since, limit=None):
+    """Stored headlines for symbol published at or after `since`, newest first"""
+    sql = ("SELECT title, link, publisher, published_at, sentiment FROM news_headlines "
+           "WHERE symbol = :symbol AND published_at >= :since ORDER BY published_at DESC")
+    params = {"symbol": symbol, "since": since}
+    if limit:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    with engine.connect() as conn:
+        return [dict(row) for row in conn.execute(text(sql), params).mappings()]
+
+def get_sentiment_series(symbol, since):
+    """(published_at, sentiment) rows for symbol since `since`; served by ix_news_symbol_published"""
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT published_at, sentiment FROM news_headlines WHERE symbol = :symbol AND published_at >= :since"),
+            {"symbol": symbol, "since": since}
+        ).fetchall()
+
+def prune_headlines(before):
+    """Delete headlines published before `before`; returns rows removed"""
+    with engine.begin() as conn:
+        return conn.execute(
+            text("DELETE FROM news_headlines WHERE published_at < :before"), {"before": before}
+        ).rowcount
@@ -0,0 +1,142 @@
+"""
+Local fake of the Yahoo Finance chart and search endpoints, for exercising
+market_client without the network.
+
+Serves deterministic random-walk daily bars at /v8/finance/chart/<symbol>
+and NIFTY-list matches at /v1/finance/search, with configurable latency and
+a failure rate (HTTP 503) to drive the retry path; `fail_next` makes the next
+N requests fail outright. `hits` counts upstream requests per path and
+`queries` records each request's (path, params).
+
+Usage:
+    server = FakeMarketServer(latency=0.05, fail_rate=0.1).start()
+    client = MarketDataClient(base_url=server.url)
+    ...
+    server.stop()
+Or standalone: python fake_market_server.py [port]
+"""
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import nifty_stocks
+
+DAY = 86400
+
+
+def fake_chart(symbol, period1=None, period2=None, bars=750):
+    """Chart payload with `bars` daily closes ending today (IST midnight labels)."""
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    end = int(time.time()) // DAY * DAY - 19800  # 00:00 IST
+    timestamps = [end - (bars - 1 - i) * DAY for i in range(bars)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    if period1 is not None:
+        keep = [i for i, ts in enumerate(timestamps) if period1 <= ts <= (period2 or ts)]
+        timestamps = [timestamps[i] for i in keep]
+        close = close[keep]
+    close = np.round(close, 2).tolist()
+    return {"chart": {"result": [{
+        "meta": {"symbol": symbol, "exchangeTimezoneName": "Asia/Kolkata"},
+        "timestamp": timestamps,
+        "indicators": {"quote": [{
+            "open": close, "high": close, "low": close, "close": close,
+            "volume": [100000] * len(close),
+        }]},
+    }], "error": None}}
+
+
+def fake_search(query, count=10):
+    q = query.lower()
+    quotes = [
+        {"symbol": s["symbol"], "shortname": s["name"], "exchange": "NSI"}
+        for s in nifty_stocks.STOCKS
+        if q in s["symbol"].lower() or q in s["name"].lower()
+    ]
+    return {"quotes": quotes[:count], "news": []}
+
+
+class FakeMarketServer:
+    def __init__(self, port=0, latency=0.0, fail_rate=0.0, fail_next=0, seed=0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_next = fail_next
+        self.hits = Counter()
+        self.queries = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                with server._lock:
+                    server.hits[parts.path] += 1
+                    server.queries.append((parts.path, params))
+                    fail = server.fail_next > 0 or server._random.random() < server.fail_rate
+                    server.fail_next = max(server.fail_next - 1, 0)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if fail:
+                    return self._send(503, {"error": "unavailable"})
+                if parts.path.startswith("/v8/finance/chart/"):
+                    symbol = parts.path.rsplit("/", 1)[-1]
+                    p1 = int(params["period1"]) if "period1" in params else None
+                    p2 = int(params["period2"]) if "period2" in params else None
+                    return self._send(200, fake_chart(symbol, p1, p2))
+                if parts.path == "/v1/finance/search":
+                    return self._send(200, fake_search(params.get("q", ""), int(params.get("quotesCount", 10))))
+                self._send(404, {"error": "not found"})
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client timed out and hung up
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-market", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = FakeMarketServer(port=port)
+    print(f"Fake market server on {server.url}")
+    server._server.serve_forever()
@@ -0,0 +1,335 @@
+"""
+Technical indicator engine for ai_predictor feature engineering.
+
+Two modes producing the same values as the `ta` calls they replace:
+- compute_indicators(df): fused NumPy batch over contiguous float64 arrays,
+  used on a cold start.
+- IndicatorState.update(...): O(1) rolling state (running sums, EMA state,
+  Wilder smoothing) for appending one new bar.
+
+IndicatorEngine ties them together per symbol.
+"""
+import copy
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+COLUMNS = ['SMA_50', 'SMA_200', 'EMA_20', 'MACD', 'MACD_Signal', 'RSI', 'Stoch_K',
+           'BB_Upper', 'BB_Lower', 'ATR', 'OBV']
+
+# Windows, matching the ta calls in predict_signal
+SMA_FAST, SMA_SLOW, EMA_WINDOW = 50, 200, 20
+MACD_FAST, MACD_SLOW, MACD_SIGN = 12, 26, 9
+RSI_WINDOW, STOCH_WINDOW, ATR_WINDOW = 14, 14, 14
+BB_WINDOW, BB_DEV = 20, 2
+
+
+def _alpha(span):
+    return 2.0 / (span + 1)
+
+
+def _rolling_mean(x, window):
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        cs = np.cumsum(x)
+        out[window - 1:] = (cs[window - 1:] - np.concatenate(([0.0], cs[:-window]))) / window
+    return out
+
+
+def _rolling(x, window, reduce):
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = reduce(sliding_window_view(x, window), axis=1)
+    return out
+
+
+class IndicatorState:
+    """Rolling indicator state after consuming a sequence of bars."""
+    __slots__ = ('n', 'closes', 'highs', 'lows', 'sum_fast', 'sum_slow', 'sum_bb', 'sumsq_bb',
+                 'ema_fast', 'ema_slow', 'ema20', 'signal', 'macd_count',
+                 'avg_up', 'avg_dn', 'atr', 'tr_seed', 'obv', 'prev_close')
+
+    def __init__(self):
+        self.n = 0
+        self.closes = deque(maxlen=SMA_SLOW)
+        self.highs = deque(maxlen=STOCH_WINDOW)
+        self.lows = deque(maxlen=STOCH_WINDOW)
+        self.sum_fast = self.sum_slow = self.sum_bb = self.sumsq_bb = 0.0
+        self.ema_fast = self.ema_slow = self.ema20 = self.signal = 0.0
+        self.macd_count = 0
+        self.avg_up = self.avg_dn = 0.0
+        self.atr = self.tr_seed = 0.0
+        self.obv = 0.0
+        self.prev_close = None
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def update(self, high, low, close, volume):
+        """Consume one bar and return the indicator values for it (COLUMNS order)."""
+        n = self.n
+        closes = self.closes
+        prev = self.prev_close
+
+        # Windowed sums: drop the value leaving each window before appending
+        if len(closes) >= SMA_FAST:
+            self.sum_fast -= closes[-SMA_FAST]
+        if len(closes) >= SMA_SLOW:
+            self.sum_slow -= closes[0]
+        if len(closes) >= BB_WINDOW:
+            old = closes[-BB_WINDOW]
+            self.sum_bb -= old
+            self.sumsq_bb -= old * old
+        closes.append(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.sum_fast += close
+        self.sum_slow += close
+        self.sum_bb += close
+        self.sumsq_bb += close * close
+
+        # EMAs (adjust=False, seeded with the first value)
+        if n == 0:
+            self.ema_fast = self.ema_slow = self.ema20 = close
+        else:
+            self.ema_fast += _alpha(MACD_FAST) * (close - self.ema_fast)
+            self.ema_slow += _alpha(MACD_SLOW) * (close - self.ema_slow)
+            self.ema20 += _alpha(EMA_WINDOW) * (close - self.ema20)
+
+        macd = signal = np.nan
+        if n + 1 >= MACD_SLOW:
+            macd = self.ema_fast - self.ema_slow
+            if self.macd_count == 0:
+                self.signal = macd
+            else:
+                self.signal += _alpha(MACD_SIGN) * (macd - self.signal)
+            self.macd_count += 1
+            if self.macd_count >= MACD_SIGN:
+                signal = self.signal
+
+        # RSI: Wilder smoothing of gains/losses, first diff counts as 0
+        diff = 0.0 if prev is None else close - prev
+        up, dn = max(diff, 0.0), max(-diff, 0.0)
+        if n == 0:
+            self.avg_up, self.avg_dn = up, dn
+        else:
+            self.avg_up += (up - self.avg_up) / RSI_WINDOW
+            self.avg_dn += (dn - self.avg_dn) / RSI_WINDOW
+        rsi = np.nan
+        if n + 1 >= RSI_WINDOW:
+            rsi = 100.0 if self.avg_dn == 0 else 100.0 - 100.0 / (1.0 + self.avg_up / self.avg_dn)
+
+        # ATR: mean of the first window true ranges, then Wilder; 0 before that (as ta)
+        tr = high - low if prev is None else max(high - low, abs(high - prev), abs(low - prev))
+        if n < ATR_WINDOW:
+            self.tr_seed += tr
+            if n == ATR_WINDOW - 1:
+                self.atr = self.tr_seed / ATR_WINDOW
+        else:
+            self.atr = (self.atr * (ATR_WINDOW - 1) + tr) / ATR_WINDOW
+
+        # OBV
+        self.obv += -volume if prev is not None and close < prev else volume
+
+        count = n + 1
+        sma_fast = self.sum_fast / SMA_FAST if count >= SMA_FAST else np.nan
+        sma_slow = self.sum_slow / SMA_SLOW if count >= SMA_SLOW else np.nan
+        ema20 = self.ema20 if count >= EMA_WINDOW else np.nan
+
+        stoch = np.nan
+        if count >= STOCH_WINDOW:
+            lo, hi = min(self.lows), max(self.highs)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                stoch = 100 * np.float64(close - lo) / np.float64(hi - lo)
+
+        bb_upper = bb_lower = np.nan
+        if count >= BB_WINDOW:
+            mean = self.sum_bb / BB_WINDOW
+            std = np.sqrt(max(self.sumsq_bb / BB_WINDOW - mean * mean, 0.0))
+            bb_upper, bb_lower = mean + BB_DEV * std, mean - BB_DEV * std
+
+        self.n = count
+        self.prev_close = close
+        return (sma_fast, sma_slow, ema20, macd, signal, rsi, stoch,
+                bb_upper, bb_lower, self.atr, self.obv)
+
+
+def compute_indicators(df, return_state=False):
+    """
+    All indicators for an OHLCV frame in one fused pass.
+    Returns a DataFrame of COLUMNS aligned to df.index (and the IndicatorState
+    after the last bar when return_state=True).
+    """
+    close = np.ascontiguousarray(df['Close'].to_numpy(dtype=np.float64))
+    high = np.ascontiguousarray(df['High'].to_numpy(dtype=np.float64))
+    low = np.ascontiguousarray(df['Low'].to_numpy(dtype=np.float64))
+    volume = np.ascontiguousarray(df['Volume'].to_numpy(dtype=np.float64))
+    n = len(close)
+
+    # Windowed statistics, vectorized
+    sma_fast = _rolling_mean(close, SMA_FAST)
+    sma_slow = _rolling_mean(close, SMA_SLOW)
+    bb_mid = _rolling(close, BB_WINDOW, np.mean)
+    bb_std = _rolling(close, BB_WINDOW, np.std)
+    lows = _rolling(low, STOCH_WINDOW, np.min)
+    highs = _rolling(high, STOCH_WINDOW, np.max)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stoch = 100 * (close - lows) / (highs - lows)
+
+    prev = np.concatenate(([np.nan], close[:-1]))
+    diff = close - prev
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    obv = np.cumsum(np.where(close < prev, -volume, volume))
+
+    # Recursive indicators share one loop over the bars
+    ema_fast = np.empty(n)
+    ema_slow = np.empty(n)
+    ema20 = np.empty(n)
+    signal = np.full(n, np.nan)
+    avg_up = np.empty(n)
+    avg_dn = np.empty(n)
+    atr = np.zeros(n)
+    a_fast, a_slow, a20, a_sig = _alpha(MACD_FAST), _alpha(MACD_SLOW), _alpha(EMA_WINDOW), _alpha(MACD_SIGN)
+    ef = es = e20 = sig = up_s = dn_s = atr_s = 0.0
+    for i in range(n):
+        c = close[i]
+        d = 0.0 if i == 0 else diff[i]
+        up = d if d > 0 else 0.0
+        dn = -d if d < 0 else 0.0
+        if i == 0:
+            ef = es = e20 = c
+            up_s, dn_s = up, dn
+        else:
+            ef += a_fast * (c - ef)
+            es += a_slow * (c - es)
+            e20 += a20 * (c - e20)
+            up_s += (up - up_s) / RSI_WINDOW
+            dn_s += (dn - dn_s) / RSI_WINDOW
+        if i == MACD_SLOW - 1:
+            sig = ef - es
+        elif i >= MACD_SLOW:
+            sig += a_sig * ((ef - es) - sig)
+        if i == ATR_WINDOW - 1:
+            atr_s = tr[:ATR_WINDOW].mean()
+        elif i >= ATR_WINDOW:
+            atr_s = (atr_s * (ATR_WINDOW - 1) + tr[i]) / ATR_WINDOW
+        ema_fast[i], ema_slow[i], ema20[i] = ef, es, e20
+        avg_up[i], avg_dn[i], atr[i] = up_s, dn_s, atr_s
+        signal[i] = sig
+
+    macd = ema_fast - ema_slow
+    macd[:MACD_SLOW - 1] = np.nan
+    signal[:MACD_SLOW + MACD_SIGN - 2] = np.nan
+    ema20[:EMA_WINDOW - 1] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(avg_dn == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_up / avg_dn))
+    rsi[:RSI_WINDOW - 1] = np.nan
+
+    out = pd.DataFrame({
+        'SMA_50': sma_fast,
+        'SMA_200': sma_slow,
+        'EMA_20': ema20,
+        'MACD': macd,
+        'MACD_Signal': signal,
+        'RSI': rsi,
+        'Stoch_K': stoch,
+        'BB_Upper': bb_mid + BB_DEV * bb_std,
+        'BB_Lower': bb_mid - BB_DEV * bb_std,
+        'ATR': atr,
+        'OBV': obv,
+    }, index=df.index)
+
+    if not return_state:
+        return out
+
+    state = IndicatorState()
+    if n:
+        state.n = n
+        state.closes.extend(close[-SMA_SLOW:].tolist())
+        state.highs.extend(high[-STOCH_WINDOW:].tolist())
+        state.lows.extend(low[-STOCH_WINDOW:].tolist())
+        state.sum_fast = float(close[-SMA_FAST:].sum())
+        state.sum_slow = float(close[-SMA_SLOW:].sum())
+        state.sum_bb = float(close[-BB_WINDOW:].sum())
+        state.sumsq_bb = float((close[-BB_WINDOW:] ** 2).sum())
+        state.ema_fast, state.ema_slow, state.ema20 = ef, es, e20
+        state.signal = sig
+        state.macd_count = max(n - MACD_SLOW + 1, 0)
+        state.avg_up, state.avg_dn = up_s, dn_s
+        state.atr = atr_s
+        state.tr_seed = float(tr[:ATR_WINDOW].sum())
+        state.obv = float(obv[-1])
+        state.prev_close = float(close[-1])
+    return out, state
+
+
+class IndicatorEngine:
+    """
+    Per-symbol indicator cache. The first call for a symbol runs the batch
+    mode; later calls only push the bars that arrived since through
+    IndicatorState.update. The last bar is treated as live (it can still
+    change intraday) and is re-applied on a copy of the committed state.
+    """
+    def __init__(self):
+        self._symbols = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol, df):
+        """Indicator frame (COLUMNS) aligned to df.index."""
+        with self._lock:
+            cached = self._symbols.get(symbol)
+            if cached is None or not self._can_extend(cached, df):
+                cached = self._cold_start(df)
+            else:
+                cached = self._extend(cached, df)
+            self._symbols[symbol] = cached
+        return cached['frame'].reindex(df.index)
+
+    @staticmethod
+    def _can_extend(cached, df):
+        # History rewritten (e.g. dividend adjustment) or window moved past us: rebuild
+        ts, close = cached['committed_ts'], cached['committed_close']
+        if ts is None or ts not in df.index:
+            return False
+        return np.isclose(df.at[ts, 'Close'], close)
+
+    @staticmethod
+    def _cold_start(df):
+        if len(df) < 2:
+            return {'frame': compute_indicators(df), 'state': IndicatorState(),
+                    'committed_ts': None, 'committed_close': None}
+        frame, state = compute_indicators(df.iloc[:-1], return_state=True)
+        live = state.copy()
+        row = df.iloc[-1]
+        values = live.update(row['High'], row['Low'], row['Close'], row['Volume'])
+        frame.loc[df.index[-1]] = values
+        return {'frame': frame, 'state': state,
+                'committed_ts': df.index[-2], 'committed_close': df['Close'].iloc[-2]}
+
+    @staticmethod
+    def _extend(cached, df):
+        new = df[df.index > cached['committed_ts']]
+        state = cached['state']
+        frame = cached['frame'][cached['frame'].index <= cached['committed_ts']]
+
+        rows = []
+        bars = new[['High', 'Low', 'Close', 'Volume']].to_numpy(dtype=np.float64)
+        for i, (high, low, close, volume) in enumerate(bars):
+            if i == len(bars) - 1:
+                state_for_bar = state.copy()  # live bar: don't commit
+            else:
+                state_for_bar = state
+            rows.append(state_for_bar.update(high, low, close, volume))
+
+        if rows:
+            frame = pd.concat([frame, pd.DataFrame(rows, index=new.index, columns=COLUMNS)])
+        committed_ts = new.index[-2] if len(new) >= 2 else cached['committed_ts']
+        return {'frame': frame, 'state': state, 'committed_ts': committed_ts,
+                'committed_close': df.at[committed_ts, 'Close']}
+
+
+# Shared per-process engine used by predict_signal
+engine = IndicatorEngine()
@@ -0,0 +1,254 @@
+"""
+Ledger engine: rebuild holdings from the transactions table.
+
+Replays a portfolio's whole transaction history at once with NumPy (no
+per-trade Python loop) and produces, per symbol, quantity, cost basis,
+average cost and realized P&L under both the average-cost method (what the
+trade form maintains incrementally) and FIFO lots. The result can be
+reconciled against portfolio_holdings or written back over it.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+import database as db
+
+# Holdings store avg_price as DECIMAL(10, 2)
+AVG_TOLERANCE = 0.01
+
+# Rebase the average-cost scan whenever the running sell ratio decays by e^-300
+LOG_BLOCK = 300.0
+
+
+def load_transactions(portfolio_id, conn=None, after_id=None):
+    """All transactions of a portfolio in replay order (date, id); only ids > after_id if given."""
+    df = pd.read_sql(
+        text("SELECT id, symbol, type, quantity, price, date FROM transactions WHERE portfolio_id = :portfolio_id AND id > :after_id ORDER BY date, id"),
+        conn if conn is not None else db.engine,
+        params={"portfolio_id": portfolio_id, "after_id": after_id or 0},
+    )
+    df["price"] = df["price"].astype(float)
+    return df
+
+
+def _group_starts(codes):
+    """Boolean mask marking the first row of each run of equal codes (codes sorted)."""
+    starts = np.ones(len(codes), dtype=bool)
+    starts[1:] = codes[1:] != codes[:-1]
+    return starts
+
+
+def _group_cumsum_int(values, starts):
+    """Exact grouped cumulative sum for int64 values, groups given by start mask."""
+    cs = np.cumsum(values)
+    idx = np.flatnonzero(starts)
+    offsets = cs[idx] - values[idx]
+    lengths = np.diff(np.append(idx, len(values)))
+    return cs - np.repeat(offsets, lengths)
+
+
+def _group_cumsum_float(values, groups):
+    # Per-group accumulation avoids the cancellation of a global cumsum minus offsets
+    return pd.Series(values).groupby(groups).cumsum().to_numpy()
+
+
+def replay(tx):
+    """
+    Replay transactions (columns symbol, type, quantity, price; in time order).
+    Returns a DataFrame indexed by symbol with columns:
+        quantity, avg_cost, cost_basis, realized_pnl            (average cost)
+        fifo_avg_cost, fifo_cost_basis, fifo_realized_pnl       (FIFO lots)
+        oversold  (rows that sold more than was held; the ledger is invalid there)
+    TRANSFER_IN/OUT rows move quantity and cost like a BUY/SELL but realize no P&L.
+    """
+    columns = ["quantity", "avg_cost", "cost_basis", "realized_pnl",
+               "fifo_avg_cost", "fifo_cost_basis", "fifo_realized_pnl", "oversold"]
+    if tx.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name="symbol"))
+
+    # Group by symbol, keeping time order within each symbol
+    symbols, codes = np.unique(tx["symbol"].to_numpy(), return_inverse=True)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    qty = tx["quantity"].to_numpy(dtype=np.int64)[order]
+    price = tx["price"].to_numpy(dtype=np.float64)[order]
+    types = tx["type"].to_numpy()[order]
+    is_buy = (types == "BUY") | (types == db.TRANSFER_IN)
+    is_transfer = (types == db.TRANSFER_IN) | (types == db.TRANSFER_OUT)
+    n = len(codes)
+
+    sym_start = _group_starts(codes)
+    sym_last = np.append(sym_start[1:], True)
+    signed = np.where(is_buy, qty, -qty)
+    position = _group_cumsum_int(signed, sym_start)
+    prev_position = position - signed
+
+    # --- Average cost ---
+    # Cost basis C follows C_t = r_t * C_{t-1} + b_t, with b = qty*price on buys and
+    # r = Q_t / Q_{t-1} on sells (selling keeps the average). Within an episode
+    # (a run where the position stays open) this is solved with grouped cumsums:
+    # C_t = P_t * sum(b_k / P_k), P = exp(cumsum(log r)).
+    # P shrinks without bound over long histories, so episodes are cut into
+    # blocks spanning at most e^-LOG_BLOCK of decay and P is rebased per block;
+    # only the previous block's cost carries over (older ones decayed by > e^-LOG_BLOCK).
+    episode_start = sym_start | (prev_position <= 0)
+    episode = np.cumsum(episode_start)
+    closing = ~is_buy & (position <= 0)
+    ratio = np.ones(n)
+    partial = ~is_buy & ~closing & (prev_position > 0)
+    ratio[partial] = position[partial] / prev_position[partial]
+    log_p = _group_cumsum_float(np.log(ratio), episode)
+
+    band = np.floor(-log_p / LOG_BLOCK)
+    block_start = episode_start.copy()
+    block_start[1:] |= band[1:] != band[:-1]
+    block_idx = np.flatnonzero(block_start)
+    block_len = np.diff(np.append(block_idx, n))
+    block = np.cumsum(block_start)
+    first = np.repeat(block_idx, block_len)
+
+    scale = np.exp(log_p - log_p[first])
+    buys_cost = np.where(is_buy, qty * price, 0.0)
+    cost = scale * _group_cumsum_float(buys_cost / scale, block)
+    # Carry the previous block's closing cost into continuation blocks
+    carried = np.repeat(~episode_start[block_idx], block_len)
+    prev_end = np.maximum(first - 1, 0)
+    cost[carried] += cost[prev_end[carried]] * np.exp(log_p[carried] - log_p[prev_end[carried]])
+    cost[closing] = 0.0
+
+    prev_cost = np.empty(n)
+    prev_cost[0] = 0.0
+    prev_cost[1:] = cost[:-1]
+    prev_cost[sym_start] = 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prev_avg = np.where(prev_position > 0, prev_cost / prev_position, 0.0)
+    realized = np.where(is_buy | is_transfer, 0.0, qty * (price - prev_avg))
+
+    # --- FIFO ---
+    # F(x) = cost of the first x units ever bought of a symbol (piecewise linear over lots).
+    # Sold units (S_before, S_after] cost F(S_after) - F(S_before).
+    buy_codes = codes[is_buy]
+    buy_qty = qty[is_buy]
+    buy_price = price[is_buy]
+    buy_cum_qty = _group_cumsum_int(buy_qty, _group_starts(buy_codes)) if len(buy_qty) else buy_qty
+    buy_cum_cost = _group_cumsum_float(buy_qty * buy_price, buy_codes) if len(buy_qty) else buy_price
+
+    total_bought = np.zeros(len(symbols), dtype=np.int64)
+    np.add.at(total_bought, buy_codes, buy_qty)
+    offset = int(total_bought.max()) + 1
+    buy_keys = buy_codes.astype(np.int64) * offset + buy_cum_qty
+
+    def units_cost(sym_codes, units):
+        units = np.minimum(units, total_bought[sym_codes])
+        out = np.zeros(len(units))
+        live = units > 0
+        if not live.any():
+            return out
+        c, u = sym_codes[live], units[live]
+        j = np.searchsorted(buy_keys, c.astype(np.int64) * offset + u, side="left")
+        has_prev = (j > 0) & (buy_codes[np.maximum(j - 1, 0)] == c)
+        prev_qty = np.where(has_prev, buy_cum_qty[np.maximum(j - 1, 0)], 0)
+        prev_cost_ = np.where(has_prev, buy_cum_cost[np.maximum(j - 1, 0)], 0.0)
+        out[live] = prev_cost_ + (u - prev_qty) * buy_price[j]
+        return out
+
+    sell_qty = np.where(is_buy, 0, qty)
+    sold_after = _group_cumsum_int(sell_qty, sym_start)
+    sold_before = sold_after - sell_qty
+    sell_rows = ~is_buy & ~is_transfer
+    fifo_realized = np.zeros(n)
+    fifo_realized[sell_rows] = qty[sell_rows] * price[sell_rows] - (
+        units_cost(codes[sell_rows], sold_after[sell_rows])
+        - units_cost(codes[sell_rows], sold_before[sell_rows])
+    )
+
+    # --- Per-symbol results ---
+    all_codes = np.arange(len(symbols))
+    final_qty = position[sym_last]
+    final_cost = np.where(final_qty > 0, cost[sym_last], 0.0)
+    total_sold = sold_after[sym_last]
+    fifo_cost = units_cost(all_codes, total_bought) - units_cost(all_codes, total_sold)
+    fifo_cost = np.where(final_qty > 0, fifo_cost, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = pd.DataFrame({
+            "quantity": final_qty,
+            "avg_cost": np.where(final_qty > 0, final_cost / final_qty, 0.0),
+            "cost_basis": final_cost,
+            "realized_pnl": np.bincount(codes, weights=realized, minlength=len(symbols)),
+            "fifo_avg_cost": np.where(final_qty > 0, fifo_cost / final_qty, 0.0),
+            "fifo_cost_basis": fifo_cost,
+            "fifo_realized_pnl": np.bincount(codes, weights=fifo_realized, minlength=len(symbols)),
+            "oversold": np.bincount(codes, weights=(position < 0), minlength=len(symbols)).astype(int),
+        }, index=pd.Index(symbols, name="symbol"))
+    return result[columns]
+
+
+def reconcile(portfolio_id, method="average"):
+    """
+    Compare the ledger replay with portfolio_holdings.
+    Returns one row per symbol in either side with ledger/held quantity and
+    average and a status: ok, qty_mismatch, avg_mismatch, missing (in ledger
+    only), extra (in holdings only) or oversold.
+    """
+    ledger = replay(load_transactions(portfolio_id))
+    ledger = ledger[(ledger["quantity"] > 0) | (ledger["oversold"] > 0)]
+    avg_col = "avg_cost" if method == "average" else "fifo_avg_cost"
+
+    held = pd.DataFrame(db.get_portfolio_holdings(portfolio_id), columns=["symbol", "quantity", "avg_price"])
+    held = held.set_index("symbol")
+    held["avg_price"] = held["avg_price"].astype(float)
+
+    out = pd.DataFrame({
+        "ledger_qty": ledger["quantity"],
+        "ledger_avg": ledger[avg_col],
+        "oversold": ledger["oversold"],
+    }).join(held.rename(columns={"quantity": "held_qty", "avg_price": "held_avg"}), how="outer")
+
+    status = np.full(len(out), "ok", dtype=object)
+    status[(out["ledger_avg"] - out["held_avg"]).abs().to_numpy() > AVG_TOLERANCE] = "avg_mismatch"
+    status[(out["ledger_qty"] != out["held_qty"]).to_numpy()] = "qty_mismatch"
+    status[out["held_qty"].isna().to_numpy()] = "missing"
+    status[out["ledger_qty"].isna().to_numpy()] = "extra"
+    status[(out["oversold"].fillna(0) > 0).to_numpy()] = "oversold"
+    out["status"] = status
+    return out.rename_axis("symbol").reset_index()
+
+
+def rebuild_holdings(portfolio_id, method="average", symbols=None, conn=None):
+    """
+    Overwrite portfolio_holdings from the ledger replay in one transaction.
+    `symbols` limits the rebuild to those symbols (e.g. after an import).
+    Pass `conn` to run inside a caller's open transaction.
+    Returns the number of holdings written.
+    """
+    if conn is None:
+        with db.engine.begin() as conn:
+            written = rebuild_holdings(portfolio_id, method, symbols, conn)
+        db._invalidate(("holdings", portfolio_id))
+        return written
+
+    ledger = replay(load_transactions(portfolio_id, conn))
+    avg_col = "avg_cost" if method == "average" else "fifo_avg_cost"
+    if symbols is not None:
+        ledger = ledger[ledger.index.isin(list(symbols))]
+    rows = [
+        {"portfolio_id": portfolio_id, "symbol": symbol, "quantity": int(r["quantity"]), "avg_price": round(float(r[avg_col]), 2)}
+        for symbol, r in ledger[ledger["quantity"] > 0].iterrows()
+    ]
+
+    if symbols is None:
+        conn.execute(
+            text("DELETE FROM portfolio_holdings WHERE portfolio_id = :portfolio_id"),
+            {"portfolio_id": portfolio_id}
+        )
+    else:
+        conn.execute(
+            db.portfolio_holdings.delete().where(
+                (db.portfolio_holdings.c.portfolio_id == portfolio_id)
+                & db.portfolio_holdings.c.symbol.in_(list(symbols))
+            )
+        )
+    if rows:
+        conn.execute(db.portfolio_holdings.insert(), rows)
+    return len(rows)
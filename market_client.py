@@ -0,0 +1,250 @@
+"""
+Asyncio market-data client for the Yahoo Finance HTTP endpoints.
+
+One event loop (on a daemon thread) owns every upstream request, so callers
+from any Streamlit session share:
+  - one pooled `requests.Session` (keep-alive connection reuse),
+  - a global and a per-host concurrency limit,
+  - timeouts and retries with jittered exponential backoff,
+  - in-flight coalescing: identical requests issued while one is pending
+    await the same result instead of hitting upstream again.
+
+Blocking I/O runs in the loop's thread pool (the stdlib has no async HTTP
+client), which keeps the dependency set unchanged. Sync code calls the
+`*_sync` helpers; `client.fetcher` plugs into market_data.set_fetcher.
+"""
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://query2.finance.yahoo.com"
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# How far back "max" history reaches per interval, as yfinance requests it (seconds)
+MAX_LOOKBACK = {
+    "1m": 691200,                                                   # 8 days
+    **dict.fromkeys(("2m", "5m", "15m", "30m", "90m"), 5184000),    # 60 days
+    **dict.fromkeys(("1h", "60m"), 63072000),                       # 730 days
+    "1d": 3122064000,                                               # 99 years (all daily+ intervals)
+}
+
+# Responses worth retrying; other 4xx are the caller's problem
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class MarketDataError(Exception):
+    """Upstream request failed after all retries."""
+
+
+class MarketDataClient:
+    def __init__(self, base_url=BASE_URL, max_connections=20, per_host=6, timeout=10.0,
+                 retries=3, backoff=0.25):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = {"calls": 0, "requests": 0, "coalesced": 0, "retries": 0, "failures": 0}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(HEADERS)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="market-http")
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._inflight = {}
+        self._host_limits = {}
+        self._global_limit = None
+
+    # --- Event loop ---
+
+    @property
+    def loop(self):
+        """The client's event loop, started on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="market-client", daemon=True).start()
+            return self._loop
+
+    def run(self, coro):
+        """Run a coroutine on the client loop from synchronous code and wait for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    # --- Requests ---
+
+    async def get_json(self, path, params=None):
+        """
+        GET base_url + path and decode JSON. Concurrent identical requests
+        (same path and params) share one upstream call.
+        """
+        key = ("json", path, tuple(sorted((params or {}).items())))
+        return await self._shared(key, lambda: self._fetch(self.base_url + path, params))
+
+    async def _shared(self, key, factory):
+        """Await the in-flight task for key, starting it with factory() if there is none."""
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: one caller timing out must not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url, params):
+        host = urlsplit(url).netloc
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.max_connections)
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+        loop = asyncio.get_running_loop()
+        get = partial(self.session.get, url, params=params, timeout=self.timeout)
+
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                # Full jitter: spreads retries from many callers over the backoff window
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            try:
+                async with self._global_limit, limit:
+                    self.stats["requests"] += 1
+                    response = await asyncio.wait_for(loop.run_in_executor(self._executor, get), self.timeout + 1)
+                if response.status_code in RETRY_STATUS:
+                    last_error = MarketDataError(f"HTTP {response.status_code} from {url}")
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError) as e:
+                last_error = e
+            except requests.HTTPError as e:
+                self.stats["failures"] += 1
+                raise MarketDataError(str(e)) from e
+        self.stats["failures"] += 1
+        raise MarketDataError(f"{url} failed after {self.retries + 1} attempts: {last_error}")
+
+    # --- Endpoints ---
+
+    async def search(self, query, quotes=10, news=0):
+        """Raw search payload ({'quotes': [...], 'news': [...]})."""
+        return await self.get_json("/v1/finance/search", {"q": query, "quotesCount": quotes, "newsCount": news})
+
+    async def history(self, symbol, interval="1d", start=None):
+        """OHLCV DataFrame shaped like yfinance's Ticker.history (exchange-local index)."""
+        now = int(time.time())
+        # An explicit window even for "max": Yahoo may answer range=max with coarser bars
+        period1 = now - MAX_LOOKBACK.get(interval, MAX_LOOKBACK["1d"]) if start is None else int(pd.Timestamp(start).timestamp())
+        params = {"interval": interval, "events": "div,splits", "period1": period1, "period2": now}
+        key = ("history", symbol, interval, None if start is None else period1)
+        df = await self._shared(key, lambda: self._history(symbol, interval, params))
+        return df.copy()
+
+    async def _history(self, symbol, interval, params):
+        payload = await self._fetch(f"{self.base_url}/v8/finance/chart/{symbol}", params)
+        # Parse off the loop thread so other requests keep flowing
+        return await asyncio.get_running_loop().run_in_executor(self._executor, parse_chart, payload, interval)
+
+    async def history_many(self, symbols, interval="1d", start=None):
+        results = await asyncio.gather(
+            *(self.history(symbol, interval, start) for symbol in symbols), return_exceptions=True
+        )
+        frames = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                print(f"History fetch failed for {symbol}: {result}")
+                result = pd.DataFrame()
+            frames[symbol] = result
+        return frames
+
+    # --- Sync helpers ---
+
+    def search_sync(self, query, quotes=10, news=0):
+        return self.run(self.search(query, quotes, news))
+
+    def history_sync(self, symbol, interval="1d", start=None):
+        return self.run(self.history(symbol, interval, start))
+
+    @property
+    def fetcher(self):
+        """A market_data fetcher (with bulk `fetch_many`) backed by this client."""
+        def fetch(symbol, interval="1d", start=None):
+            return self.history_sync(symbol, interval, start)
+        fetch.fetch_many = lambda symbols, interval="1d", start=None: self.run(
+            self.history_many(list(symbols), interval, start)
+        )
+        return fetch
+
+
+def parse_chart(payload, interval="1d"):
+    """
+    DataFrame (Open, High, Low, Close, Volume, Dividends, Stock Splits) from a
+    /v8/finance/chart payload, matching yfinance's Ticker.history defaults:
+    prices are dividend/split adjusted with adjclose (auto_adjust=True) and
+    corporate actions are columns on their ex-date bar (actions=True).
+    """
+    result = ((payload or {}).get("chart") or {}).get("result") or []
+    if not result or not result[0].get("timestamp"):
+        return pd.DataFrame()
+    result = result[0]
+    quote = result["indicators"]["quote"][0]
+    tz = result.get("meta", {}).get("exchangeTimezoneName") or "UTC"
+    daily = interval.endswith(("d", "wk", "mo"))
+
+    def to_index(timestamps):
+        index = pd.to_datetime(timestamps, unit="s", utc=True).tz_convert(tz)
+        # daily bars are labelled at local midnight, as yfinance does
+        return index.normalize() if daily else index
+
+    index = to_index(result["timestamp"])
+    df = pd.DataFrame({
+        "Open": quote.get("open"),
+        "High": quote.get("high"),
+        "Low": quote.get("low"),
+        "Close": quote.get("close"),
+        "Volume": quote.get("volume"),
+    }, index=index).astype(float)
+
+    adjclose = ((result["indicators"].get("adjclose") or [{}])[0]).get("adjclose")
+    if adjclose is not None:
+        ratio = pd.Series(adjclose, index=index, dtype=float) / df["Close"]
+        for column in ("Open", "High", "Low"):
+            df[column] *= ratio
+        df["Close"] = pd.Series(adjclose, index=index, dtype=float)
+
+    events = result.get("events") or {}
+    for column, key, value in (
+        ("Dividends", "dividends", lambda e: e.get("amount", 0.0)),
+        ("Stock Splits", "splits", lambda e: e["numerator"] / e["denominator"] if e.get("denominator") else 0.0),
+    ):
+        items = list((events.get(key) or {}).values())
+        actions = pd.Series([float(value(e)) for e in items], index=to_index([e["date"] for e in items]), dtype=float)
+        df[column] = actions.groupby(level=0).sum().reindex(index, fill_value=0.0).to_numpy()
+
+    df = df[~df.index.duplicated(keep="last")].dropna(subset=["Close"])
+    df.index.name = "Date"
+    return df
+
+
+# Shared instance used by the app
+client = MarketDataClient()
@@ -0,0 +1,673 @@
+"""
+Process-wide OHLCV bar store.
+
+Every chart, quote, P/L and AI call site reads bars through `get_history`
+instead of calling `yf.Ticker(...).history(...)` itself. Bars are kept per
+(symbol, interval); a `period=` request is answered by slicing what is held,
+and only the missing tail is fetched upstream, in the background, once the
+held bars go stale.
+
+Upstream requests go through market_client's shared client (pooled
+connections, concurrency limits, retries, in-flight coalescing);
+`yfinance_fetcher` stays available as an alternative source for set_fetcher.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import market_client
+from bar_cache import DiskBarCache
+
+# Upper bound on concurrent upstream requests when a fetcher has no bulk mode
+MAX_FANOUT = 8
+
+
+def yfinance_fetcher(symbol, interval="1d", start=None):
+    """Default upstream source. `start=None` means the full available history."""
+    ticker = yf.Ticker(symbol)
+    if start is None:
+        return ticker.history(period="max", interval=interval)
+    return ticker.history(start=start, interval=interval)
+
+
+def yfinance_batch_fetcher(symbols, interval="1d", start=None):
+    """Bulk variant of `yfinance_fetcher`: one yf.download for many symbols."""
+    data = yf.download(
+        list(symbols),
+        start=start,
+        period="max" if start is None else None,
+        interval=interval,
+        group_by="ticker",
+        actions=True,
+        ignore_tz=False,
+        threads=True,
+        progress=False,
+    )
+    frames = {}
+    for symbol in symbols:
+        if data is None or data.empty or symbol not in data.columns.get_level_values(0):
+            frames[symbol] = pd.DataFrame()
+        else:
+            frames[symbol] = data[symbol].dropna(how="all")
+    return frames
+
+
+yfinance_fetcher.fetch_many = yfinance_batch_fetcher
+
+# Default upstream source: the shared MarketDataClient (same frame layout as yfinance)
+default_fetcher = market_client.client.fetcher
+
+
+class FixtureFetcher:
+    """
+    Local fetcher serving pre-loaded frames, for tests and benchmarks.
+    `frames` maps symbol -> DataFrame (or (symbol, interval) -> DataFrame).
+    `latency` simulates the upstream round trip in seconds.
+    """
+    def __init__(self, frames, latency=0.0):
+        self.frames = frames
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, symbol, interval="1d", start=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._lookup(symbol, interval, start)
+
+    def fetch_many(self, symbols, interval="1d", start=None):
+        """Simulates a bulk download: one round trip for all symbols."""
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {symbol: self._lookup(symbol, interval, start) for symbol in symbols}
+
+    def _lookup(self, symbol, interval, start):
+        df = self.frames.get((symbol, interval), self.frames.get(symbol))
+        if df is None:
+            return pd.DataFrame()
+        if start is not None:
+            df = df[df.index >= _localize(pd.Timestamp(start), df.index)]
+        return df.copy()
+
+
+def _localize(ts, index):
+    """Align a naive timestamp with the timezone of `index`."""
+    tz = getattr(index, "tz", None)
+    if tz is not None and ts.tzinfo is None:
+        return ts.tz_localize(tz)
+    if tz is None and ts.tzinfo is not None:
+        return ts.tz_localize(None)
+    return ts
+
+
+def period_start(period, now=None):
+    """
+    Calendar lower bound (naive, day-aligned) that is guaranteed to contain
+    the bars Yahoo would return for `period`. None means full history.
+    """
+    now = pd.Timestamp(now or pd.Timestamp.now()).normalize()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1)
+    if period.endswith("mo"):
+        return now - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("y"):
+        return now - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith("wk"):
+        return now - pd.Timedelta(weeks=int(period[:-2]))
+    if period.endswith("d"):
+        # "Nd" counts trading sessions; pad for weekends and holidays
+        days = int(period[:-1])
+        return now - pd.Timedelta(days=days * 7 // 5 + 5)
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def slice_period(df, period, now=None):
+    """Return the rows of `df` that Yahoo would return for `period`."""
+    if df.empty or period == "max":
+        return df
+    if period.endswith("d") and not period.endswith("wk"):
+        sessions = df.index.normalize().unique()
+        first_session = sessions[-int(period[:-1]):][0]
+        return df[df.index >= first_session]
+    start = period_start(period, now)
+    return df[df.index >= _localize(start, df.index)]
+
+
+def nearest_bars(index, targets):
+    """
+    Positions of the bars closest to each target time, via searchsorted.
+    Ties go to the earlier bar. Returns (positions, gaps as timedelta64).
+    """
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    bars = index.values
+    targets = pd.DatetimeIndex(targets).values
+
+    pos = np.searchsorted(bars, targets)
+    left = np.clip(pos - 1, 0, len(bars) - 1)
+    right = np.clip(pos, 0, len(bars) - 1)
+    gap_left = np.abs(targets - bars[left])
+    gap_right = np.abs(bars[right] - targets)
+    use_left = gap_left <= gap_right
+    return np.where(use_left, left, right), np.where(use_left, gap_left, gap_right)
+
+
+class _Entry:
+    __slots__ = ("bars", "covered_from", "fetched_at", "attempted_at", "lock")
+
+    def __init__(self):
+        self.bars = None
+        self.covered_from = None  # naive Timestamp; None with bars set means full history
+        self.fetched_at = 0.0     # last time upstream actually returned bars
+        self.attempted_at = 0.0   # last fetch attempt, successful or not (retry backoff)
+        self.lock = threading.Lock()
+
+
+class BarStore:
+    """
+    Keeps downloaded bars per (symbol, interval) and serves any period from them.
+
+    tail_ttl: seconds before held bars are considered stale and the tail
+    (last held bar onwards) is re-fetched.
+    min_period: per-interval minimum window fetched on a cold key, so that the
+    quote, P/L, chart and AI lookups for one symbol share a single download.
+    disk: optional DiskBarCache; cold keys are loaded from it before going
+    upstream, and every full or tail fetch is written through to it.
+
+    `get_history` never waits on a tail refresh: stale bars (including bars
+    just loaded from disk) are served as held while a background worker
+    fetches the tail, as QuoteCache does for quotes. Only keys with no bars
+    covering the request are fetched synchronously. `get_many` refreshes
+    stale keys in its own bulk request.
+
+    A failed or empty fetch does not make held bars look fresh: `fetched_at`
+    only moves when upstream returned bars, while the attempt itself still
+    holds off the next retry, tail or full, for `tail_ttl`.
+    """
+    def __init__(self, fetcher=None, tail_ttl=60, min_period=None, disk=None):
+        self.fetcher = fetcher or default_fetcher
+        self.tail_ttl = tail_ttl
+        self.min_period = {"1d": "2y"} if min_period is None else min_period
+        self.disk = disk
+        self.stats = {"hits": 0, "fetches": 0, "tail_fetches": 0, "disk_loads": 0, "revalidations": 0}
+        self._entries = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_FANOUT, thread_name_prefix="bar-revalidate")
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            return entry
+
+    def get_history(self, symbol, period="1mo", interval="1d"):
+        """Drop-in for `yf.Ticker(symbol).history(period=..., interval=...)`."""
+        entry = self._entry((symbol, interval))
+        need_from = period_start(period)
+
+        with entry.lock:
+            self._hydrate(entry, symbol, interval)
+            if entry.bars is None or not self._covers(entry, need_from):
+                # A fetch that just failed (e.g. a get_many bulk request) is not retried per symbol
+                if time.time() - entry.attempted_at > self.tail_ttl:
+                    self._fetch_full(entry, symbol, interval, self._fetch_from(interval, need_from))
+                stale = False
+            else:
+                self.stats["hits"] += 1
+                stale = self._is_stale(entry)
+            bars = entry.bars if entry.bars is not None else pd.DataFrame()
+
+        if stale:
+            self._revalidate(symbol, interval)
+        return slice_period(bars, period).copy()
+
+    def get_many(self, symbols, period="1mo", interval="1d", max_age=None):
+        """
+        `get_history` for many symbols at once. Cold and stale keys are
+        refreshed with at most two bulk requests (full + tail) when the fetcher
+        has `fetch_many`, otherwise with a bounded thread fan-out.
+        `max_age` overrides `tail_ttl` for this call (0 forces a tail refresh).
+        Returns {symbol: DataFrame}.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        need_from = period_start(period)
+        fetch_from = self._fetch_from(interval, need_from)
+
+        cold, stale = [], []
+        for symbol in symbols:
+            entry = self._entry((symbol, interval))
+            with entry.lock:
+                self._hydrate(entry, symbol, interval)
+            if entry.bars is None or not self._covers(entry, need_from):
+                cold.append(symbol)
+            elif self._is_stale(entry, max_age):
+                stale.append(symbol)
+
+        if cold:
+            self._fetch_batch(cold, interval, fetch_from, tail=False)
+        if stale:
+            starts = [self._tail_start(self._entry((s, interval)), interval) for s in stale]
+            starts = [s for s in starts if s is not None]
+            self._fetch_batch(stale, interval, min(starts) if starts else None, tail=True)
+
+        # Anything a batch could not fill falls back to the per-symbol path
+        return {symbol: self.get_history(symbol, period, interval) for symbol in symbols}
+
+
+    def _fetch_batch(self, symbols, interval, start, tail):
+        fetch_many = getattr(self.fetcher, "fetch_many", None)
+        try:
+            if fetch_many is not None:
+                self.stats["tail_fetches" if tail else "fetches"] += 1
+                frames = fetch_many(symbols, interval=interval, start=start)
+            else:
+                self.stats["tail_fetches" if tail else "fetches"] += len(symbols)
+                with ThreadPoolExecutor(max_workers=min(MAX_FANOUT, len(symbols))) as pool:
+                    results = pool.map(lambda s: self.fetcher(s, interval=interval, start=start), symbols)
+                    frames = dict(zip(symbols, results))
+        except Exception as e:
+            print(f"Batch bar fetch failed for {len(symbols)} symbols: {e}")
+            # Back off: the per-symbol fallback should not retry each one right away
+            for symbol in symbols:
+                self._entry((symbol, interval)).attempted_at = time.time()
+            return
+
+        now = time.time()
+        for symbol in symbols:
+            df = frames.get(symbol)
+            entry = self._entry((symbol, interval))
+            with entry.lock:
+                if df is None:
+                    continue  # left for the per-symbol path
+                entry.attempted_at = now
+                if tail:
+                    if df.empty:
+                        continue
+                    entry.bars = self._merge(entry.bars, df)
+                    self._persist(symbol, interval, tail=df)
+                else:
+                    entry.bars = df
+                    entry.covered_from = start
+                    self._persist(symbol, interval, bars=df, covered_from=start)
+                if not df.empty:
+                    entry.fetched_at = now
+
+    def _hydrate(self, entry, symbol, interval):
+        """Fill a cold entry from disk; it keeps the age it had when written (caller holds entry.lock)."""
+        if entry.bars is not None or self.disk is None:
+            return
+        loaded = self.disk.load(symbol, interval)
+        if loaded is not None:
+            entry.bars, entry.covered_from, entry.fetched_at = loaded
+            self.stats["disk_loads"] += 1
+
+    def _persist(self, symbol, interval, bars=None, covered_from=None, tail=None):
+        if self.disk is None:
+            return
+        if tail is not None:
+            self.disk.append(symbol, interval, tail)
+        else:
+            self.disk.write(symbol, interval, bars, covered_from)
+
+    def _fetch_from(self, interval, need_from):
+        """Widen a cold fetch to the interval's `min_period` window."""
+        floor = self.min_period.get(interval)
+        if floor and need_from is not None:
+            floor_from = period_start(floor)
+            return min(need_from, floor_from) if floor_from is not None else None
+        return need_from
+
+    def _is_stale(self, entry, max_age=None):
+        max_age = self.tail_ttl if max_age is None else max_age
+        return time.time() - max(entry.fetched_at, entry.attempted_at) > max_age
+
+    def fetched_at(self, symbol, interval="1d"):
+        """Epoch seconds symbol's bars last came back from upstream (0 if never)."""
+        with self._lock:
+            entry = self._entries.get((symbol, interval))
+        return entry.fetched_at if entry is not None else 0.0
+
+    @staticmethod
+    def _covers(entry, need_from):
+        if entry.covered_from is None:
+            return True
+        return need_from is not None and need_from >= entry.covered_from
+
+    def _fetch_full(self, entry, symbol, interval, need_from):
+        self.stats["fetches"] += 1
+        try:
+            df = self.fetcher(symbol, interval=interval, start=need_from)
+        finally:
+            entry.attempted_at = time.time()
+        if df is None:
+            df = pd.DataFrame()
+        entry.bars = df
+        entry.covered_from = need_from
+        if not df.empty:
+            entry.fetched_at = entry.attempted_at
+        self._persist(symbol, interval, bars=df, covered_from=need_from)
+
+    @staticmethod
+    def _tail_start(entry, interval):
+        if entry.bars.empty:
+            return entry.covered_from
+        if interval.endswith(("m", "h")) and not interval.endswith("mo"):
+            return entry.bars.index[-1].tz_localize(None)
+        return entry.bars.index[-1].tz_localize(None).normalize()
+
+    def _revalidate(self, symbol, interval):
+        """Queue one background tail refresh for the key unless one is already pending."""
+        key = (symbol, interval)
+        with self._lock:
+            if key in self._pending:
+                return
+            self.stats["revalidations"] += 1
+            self._pending[key] = self._executor.submit(self._fetch_tail, symbol, interval)
+
+    def _fetch_tail(self, symbol, interval):
+        """Background tail refresh; the entry lock is not held while upstream answers."""
+        key = (symbol, interval)
+        entry = self._entry(key)
+        try:
+            with entry.lock:
+                if entry.bars is None or not self._is_stale(entry):
+                    return
+                start = self._tail_start(entry, interval)
+            self.stats["tail_fetches"] += 1
+            try:
+                tail = self.fetcher(symbol, interval=interval, start=start)
+            except Exception as e:
+                # Keep serving what we hold; the attempt still holds off the next retry
+                print(f"Bar tail fetch failed for {symbol}: {e}")
+                tail = None
+            with entry.lock:
+                entry.attempted_at = time.time()
+                if tail is not None and not tail.empty:
+                    entry.bars = self._merge(entry.bars, tail)
+                    entry.fetched_at = entry.attempted_at
+                    self._persist(symbol, interval, tail=tail)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def wait(self, timeout=None):
+        """Block until the queued tail refreshes have finished (tests, benchmarks)."""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.result(timeout)
+
+    @staticmethod
+    def _merge(old, new):
+        """Append `new` on top of `old`; bars in `new` replace overlapping ones."""
+        if old is None or old.empty:
+            return new
+        if new is None or new.empty:
+            return old
+        head = old[old.index < _localize(new.index[0], old.index)]
+        return pd.concat([head, new])
+
+    def clear(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == symbol]:
+                    del self._entries[key]
+
+
+class Quote(NamedTuple):
+    """Compact quote record returned by `get_quote`."""
+    symbol: str
+    name: str
+    price: float
+    prev_close: float
+    change: float
+    change_pct: float
+    as_of: float = 0.0  # epoch seconds the price was fetched (0 = unknown)
+
+
+def quote_from_bars(symbol, bars, name=None):
+    """
+    Build a Quote from one daily frame: the last bar is today's price and the
+    bar before it the previous close. None if there are no bars.
+    """
+    if bars is None or bars.empty or "Close" not in bars:
+        return None
+    closes = bars["Close"].to_numpy()
+    price = float(closes[-1])
+    if len(closes) >= 2:
+        prev_close = float(closes[-2])
+        change = price - prev_close
+        change_pct = (change / prev_close) * 100
+    else:
+        prev_close, change, change_pct = price, 0.0, 0.0
+    return Quote(symbol, name or symbol, price, prev_close, change, change_pct)
+
+
+# Shared instance used by the app; daily bars persist across restarts
+default_disk = DiskBarCache()
+bar_store = BarStore(disk=default_disk)
+
+
+class QuoteCache:
+    """
+    Stale-while-revalidate quotes.
+
+    Reads never wait on upstream for a quote they already hold: a quote older
+    than `ttl` seconds is served as is (with its `as_of`) while one background
+    batch refreshes it. Only cold symbols and quotes older than
+    `max_staleness` are fetched synchronously; if that fetch fails the
+    expired quote is dropped rather than served. A quote's `as_of` is when
+    its bars last came back from upstream, not when the refresh ran.
+    """
+    def __init__(self, store=None, ttl=60, max_staleness=900):
+        self.store = store or bar_store
+        self.ttl = ttl
+        self.max_staleness = max_staleness
+        self._quotes = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quote-revalidate")
+        self.stats = {"fresh": 0, "stale": 0, "blocking": 0, "revalidations": 0}
+
+    def get_many(self, symbols):
+        """{symbol: Quote or None}; blocks only for cold or expired symbols."""
+        symbols = list(dict.fromkeys(symbols))
+        now = time.time()
+        blocking, stale = [], []
+        with self._lock:
+            for symbol in symbols:
+                quote = self._quotes.get(symbol)
+                age = now - quote.as_of if quote else None
+                if quote is None or age > self.max_staleness:
+                    blocking.append(symbol)
+                elif age > self.ttl:
+                    stale.append(symbol)
+            self.stats["blocking"] += len(blocking)
+            self.stats["stale"] += len(stale)
+            self.stats["fresh"] += len(symbols) - len(blocking) - len(stale)
+
+        if blocking:
+            self._refresh(blocking)
+            with self._lock:
+                for symbol in blocking:
+                    quote = self._quotes.get(symbol)
+                    if quote and time.time() - quote.as_of > self.max_staleness:
+                        del self._quotes[symbol]
+        if stale:
+            self._revalidate(stale)
+
+        with self._lock:
+            return {symbol: self._quotes.get(symbol) for symbol in symbols}
+
+    def _refresh(self, symbols):
+        try:
+            # Bars the store fetched within `ttl` already make a fresh quote; only older ones go upstream
+            frames = self.store.get_many(symbols, "5d", max_age=self.ttl)
+        except Exception as e:
+            print(f"Quote refresh failed: {e}")
+            return
+        with self._lock:
+            for symbol in symbols:
+                quote = quote_from_bars(symbol, frames.get(symbol))
+                # Keep the last good quote if this round came back empty
+                if quote:
+                    self._quotes[symbol] = quote._replace(as_of=self.store.fetched_at(symbol))
+
+    def _revalidate(self, symbols):
+        with self._lock:
+            todo = [s for s in symbols if s not in self._pending]
+            self._pending.update(todo)
+            self.stats["revalidations"] += bool(todo)
+        if todo:
+            self._executor.submit(self._background_refresh, todo)
+
+    def _background_refresh(self, symbols):
+        try:
+            self._refresh(symbols)
+        finally:
+            with self._lock:
+                self._pending.difference_update(symbols)
+
+    def clear(self):
+        with self._lock:
+            self._quotes.clear()
+
+
+quote_cache = QuoteCache()
+
+
+def set_fetcher(fetcher, persist=None):
+    """
+    Swap the upstream source (e.g. a FixtureFetcher) and drop held bars and quotes.
+    The disk cache stays attached only for the default source unless `persist`
+    says otherwise, so fixture bars never leak into the persisted history.
+    """
+    bar_store.fetcher = fetcher or default_fetcher
+    bar_store.disk = default_disk if (fetcher is None if persist is None else persist) else None
+    bar_store.clear()
+    quote_cache.clear()
+
+
+def get_history(symbol, period="1mo", interval="1d"):
+    return bar_store.get_history(symbol, period, interval)
+
+
+def get_quote(symbol, name=None):
+    """Latest cached Quote for symbol (stale-while-revalidate, see QuoteCache)."""
+    quote = quote_cache.get_many([symbol])[symbol]
+    return quote._replace(name=name) if quote and name else quote
+
+
+def get_quotes(symbols):
+    """
+    Last price and previous close for many symbols from the quote cache
+    (one batched refresh for whatever is cold or expired).
+    Returns a DataFrame indexed by symbol with columns
+    price, prev_close, change, change_pct, as_of (NaN rows for symbols with no data).
+    """
+    symbols = list(dict.fromkeys(symbols))
+    cached = quote_cache.get_many(symbols)
+
+    last = np.full(len(symbols), np.nan)
+    prev = np.full(len(symbols), np.nan)
+    as_of = np.full(len(symbols), np.nan)
+    for i, symbol in enumerate(symbols):
+        quote = cached[symbol]
+        if quote:
+            last[i], prev[i], as_of[i] = quote.price, quote.prev_close, quote.as_of
+
+    quotes = pd.DataFrame({"price": last, "prev_close": prev}, index=pd.Index(symbols, name="symbol"))
+    quotes["change"] = quotes["price"] - quotes["prev_close"]
+    quotes["change_pct"] = quotes["change"] / quotes["prev_close"] * 100
+    quotes["as_of"] = as_of
+    return quotes
+
+
+def key_stats(symbol):
+    """
+    Open, day high/low, previous close and 52-week high/low from the last year
+    of daily bars in the store: {open, day_high, day_low, prev_close,
+    year_high, year_low}, or {} without bars.
+    """
+    bars = get_history(symbol, "1y", "1d")
+    if bars.empty:
+        return {}
+    last = bars.iloc[-1]
+    return {
+        "open": float(last["Open"]),
+        "day_high": float(last["High"]),
+        "day_low": float(last["Low"]),
+        "prev_close": float(bars["Close"].iloc[-2] if len(bars) >= 2 else last["Close"]),
+        "year_high": float(bars["High"].max()),
+        "year_low": float(bars["Low"].min()),
+    }
+
+
+class QuoteSnapshot(NamedTuple):
+    """Immutable set of quotes published by a QuoteRefresher."""
+    quotes: tuple
+    as_of: float
+
+
+class QuoteRefresher:
+    """
+    Background thread that owns the quotes for a fixed set of symbols.
+
+    It refreshes them every `every` seconds with one batched bar request and
+    publishes a new QuoteSnapshot; readers just take `snapshot`, so upstream
+    load is independent of how many sessions are reading.
+    `symbols` maps display name -> symbol.
+    """
+    def __init__(self, symbols, every=10, store=None):
+        self.symbols = dict(symbols)
+        self.every = every
+        self.store = store or bar_store
+        self.snapshot = QuoteSnapshot((), 0.0)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        # Bars fetched within one refresh period (by any reader of the store) are reused
+        frames = self.store.get_many(self.symbols.values(), "5d", max_age=self.every)
+        quotes = []
+        for name, symbol in self.symbols.items():
+            quote = quote_from_bars(symbol, frames.get(symbol), name)
+            if quote:
+                quotes.append(quote._replace(as_of=self.store.fetched_at(symbol)))
+        # Keep serving the last good snapshot if this round came back empty;
+        # the snapshot is as old as its oldest quote
+        if quotes:
+            self.snapshot = QuoteSnapshot(tuple(quotes), min(q.as_of for q in quotes))
+
+    def _run(self):
+        while not self._stop.wait(self.every):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Quote refresh failed: {e}")
+
+    def start(self):
+        """Publish a first snapshot synchronously, then refresh in the background."""
+        if self._thread is None:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Quote refresh failed: {e}")
+            self._thread = threading.Thread(target=self._run, name="quote-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
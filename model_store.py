@@ -0,0 +1,101 @@
+"""
+Persistent per-symbol model store for ai_predictor.
+
+Each trained model is saved to MODEL_DIR together with the date of its last
+training row and the feature schema it was trained on. A model is reused
+(from memory, else from disk) until RETRAIN_AFTER_BARS new training bars
+have arrived or the schema changes.
+"""
+import os
+import re
+import threading
+
+import joblib
+import pandas as pd
+
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+
+# Retrain once this many new bars are available past the training window
+RETRAIN_AFTER_BARS = int(os.getenv("MODEL_RETRAIN_AFTER_BARS", "5"))
+
+_models = {}
+_lock = threading.Lock()
+
+
+def _path(symbol):
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+    return os.path.join(MODEL_DIR, f"{safe}.joblib")
+
+
+def load(symbol):
+    """Stored record for symbol ({model, trained_through, schema}) or None."""
+    with _lock:
+        record = _models.get(symbol)
+    if record is not None:
+        return record
+
+    path = _path(symbol)
+    if not os.path.exists(path):
+        return None
+    try:
+        record = joblib.load(path)
+    except Exception as e:
+        print(f"Model load failed for {symbol}: {e}")
+        return None
+
+    with _lock:
+        _models[symbol] = record
+    return record
+
+
+def save(symbol, model, trained_through, schema):
+    record = {"model": model, "trained_through": pd.Timestamp(trained_through), "schema": schema}
+    with _lock:
+        _models[symbol] = record
+
+    try:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        path = _path(symbol)
+        tmp = f"{path}.tmp"
+        joblib.dump(record, tmp)
+        os.replace(tmp, path)  # atomic: readers never see a half-written file
+    except Exception as e:
+        print(f"Model save failed for {symbol}: {e}")
+    return record
+
+
+def needs_retrain(record, train_index, schema):
+    if record is None or record["schema"] != schema:
+        return True
+    trained_through = record["trained_through"]
+    if getattr(train_index, "tz", None) is not None and trained_through.tzinfo is None:
+        trained_through = trained_through.tz_localize(train_index.tz)
+    new_bars = int((train_index > trained_through).sum())
+    return new_bars >= RETRAIN_AFTER_BARS
+
+
+def get_or_train(symbol, X_train, y_train, train_fn, schema):
+    """
+    Return a model for symbol, reusing the stored one when it is still valid.
+    `train_fn(X, y)` must return a fitted model.
+    """
+    record = load(symbol)
+    if needs_retrain(record, X_train.index, schema):
+        model = train_fn(X_train, y_train)
+        record = save(symbol, model, X_train.index[-1], schema)
+    return record["model"]
+
+
+def clear(symbol=None):
+    """Forget models in memory and on disk."""
+    with _lock:
+        if symbol is None:
+            _models.clear()
+        else:
+            _models.pop(symbol, None)
+    paths = [_path(symbol)] if symbol else (
+        [os.path.join(MODEL_DIR, f) for f in os.listdir(MODEL_DIR)] if os.path.isdir(MODEL_DIR) else []
+    )
+    for path in paths:
+        if path.endswith(".joblib") and os.path.exists(path):
+            os.remove(path)
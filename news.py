@@ -0,0 +1,369 @@
+"""
+News headlines and sentiment, independent of the model cache.
+
+Headlines are fetched per symbol from the Yahoo search endpoint through
+market_client's shared client and kept for NEWS_TTL seconds.
+Stories are stored once, keyed by a hash of their canonical URL (or
+normalized title), so an article tagged with several symbols is parsed and
+scored only once. Scoring is batched: every new title is tokenized into one
+flat token array and scored against the compiled lexicon with numpy,
+with negation ("not", "no", "fails to" ... within NEGATION_WINDOW tokens)
+flipping a term's sign and per-term weights. A symbol's sentiment is the
+recency-weighted mean of its headline scores.
+
+NewsIngestor polls every tracked symbol (any watchlist or portfolio) in the
+background and stores scored headlines in the news_headlines table; symbols
+requested by the UI are fetched on their own as soon as they are asked for.
+stored_sentiment() reads the rolling sentiment back with one indexed query,
+so the prediction path never waits on the network.
+"""
+import hashlib
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import database as db
+import market_client
+
+NEWS_TTL = 900
+# Stories requested per symbol from the search endpoint
+NEWS_COUNT = 10
+# Headlines shown with a prediction
+MAX_HEADLINES = 5
+# A headline's weight halves every HALF_LIFE_HOURS
+HALF_LIFE_HOURS = 24
+NEGATION_WINDOW = 3
+# Headlines older than this do not count towards the stored sentiment
+SENTIMENT_WINDOW_HOURS = 72
+RETENTION_DAYS = 30
+# A symbol is re-requested from the ingestor at most once per REQUEST_INTERVAL seconds
+REQUEST_INTERVAL = NEWS_TTL
+
+# term -> weight; inflected forms (s/ed/ing, see _forms) are added at compile time
+POSITIVE = {
+    "surge": 2.0, "soar": 2.0, "rally": 1.5, "jump": 1.5, "gain": 1.0, "rise": 1.0, "climb": 1.0,
+    "record": 1.0, "bull": 1.0, "bullish": 1.5, "buy": 1.0, "upgrade": 2.0, "outperform": 1.5,
+    "profit": 1.0, "growth": 1.0, "beat": 1.5, "strong": 1.0, "robust": 1.0, "win": 1.0,
+    "boost": 1.0, "expand": 0.5, "dividend": 0.5, "high": 0.5, "upbeat": 1.0, "recover": 1.0,
+}
+NEGATIVE = {
+    "crash": 2.0, "plunge": 2.0, "slump": 1.5, "tumble": 1.5, "drop": 1.0, "fall": 1.0, "decline": 1.0,
+    "loss": 1.0, "bear": 1.0, "bearish": 1.5, "sell": 1.0, "downgrade": 2.0, "underperform": 1.5,
+    "miss": 1.5, "down": 0.5, "weak": 1.0, "risk": 0.5, "probe": 1.5, "fraud": 2.0, "penalty": 1.5,
+    "default": 2.0, "lawsuit": 1.5, "sink": 1.5, "cut": 1.0, "low": 0.5, "warn": 1.5, "concern": 1.0,
+}
+# Forms the suffix rules in _forms cannot produce
+IRREGULAR = {
+    "rise": ["rose", "risen"], "fall": ["fell", "fallen"], "sink": ["sank", "sunk"], "sell": ["sold"],
+    "buy": ["bought"], "win": ["won"], "beat": ["beaten"], "high": ["higher", "highest"],
+    "low": ["lower", "lowest"], "strong": ["stronger", "strongest"], "weak": ["weaker", "weakest"],
+}
+NEGATORS = {"not", "no", "never", "without", "fails", "failed", "despite", "hardly", "isnt", "wont", "didnt"}
+
+_TOKEN = re.compile(r"[a-z]+")
+
+_stories = {}   # story id -> story dict (shared across symbols)
+_symbols = {}   # symbol -> (fetched_at, [story id])
+_lock = threading.Lock()
+_requested = set()  # untracked symbols asked for by the UI, picked up by the ingestor
+_requested_at = {}  # symbol -> epoch seconds of its last accepted request
+
+
+_VOWELS = "aeiou"
+
+
+def _doubles(word):
+    """One-syllable consonant-vowel-consonant words double the last letter: drop -> dropped, cut -> cutting."""
+    return (len(word) >= 3 and word[-1] not in _VOWELS + "wxy" and word[-2] in _VOWELS
+            and word[-3] not in _VOWELS and sum(c in _VOWELS for c in word) == 1)
+
+
+def _forms(word):
+    """word plus its plural / 3rd person, past and -ing forms, and any IRREGULAR ones."""
+    if word.endswith("e"):
+        forms = {word + "s", word + "d", word[:-1] + "ing"}
+    elif word.endswith("y") and word[-2] not in _VOWELS:
+        forms = {word[:-1] + "ies", word[:-1] + "ied", word + "ing"}
+    else:
+        stem = word + word[-1] if _doubles(word) else word
+        plural = word + "es" if word.endswith(("s", "sh", "ch", "x", "z")) else word + "s"
+        forms = {plural, stem + "ed", stem + "ing"}
+    return {word, *forms, *IRREGULAR.get(word, ())}
+
+
+class Lexicon:
+    """Term weights compiled into a vocabulary -> weight array."""
+
+    def __init__(self, positive=POSITIVE, negative=NEGATIVE, negators=NEGATORS):
+        self.vocab = {}
+        weights = [0.0]  # id 0: not in the lexicon
+        for terms, sign in ((positive, 1.0), (negative, -1.0)):
+            for term, weight in terms.items():
+                for form in _forms(term):
+                    if form not in self.vocab:
+                        self.vocab[form] = len(weights)
+                        weights.append(sign * weight)
+        self.weights = np.array(weights)
+        self.negators = frozenset(negators)
+
+    def score(self, titles):
+        """Sentiment in [-1, 1] for each title, computed in one vectorized pass."""
+        tokens = [_TOKEN.findall(title.lower().replace("'", "")) for title in titles]
+        lengths = np.array([len(t) for t in tokens], dtype=np.int64)
+        if not lengths.sum():
+            return np.zeros(len(titles))
+        flat = [token for doc in tokens for token in doc]
+        ids = np.array([self.vocab.get(token, 0) for token in flat], dtype=np.int64)
+        negator = np.array([token in self.negators for token in flat], dtype=np.int64)
+        doc = np.repeat(np.arange(len(titles)), lengths)
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+        # A term is negated when a negator occurs in the previous NEGATION_WINDOW tokens of its title
+        pos = np.arange(len(flat))
+        seen = np.concatenate([[0], np.cumsum(negator)])
+        window_start = np.maximum(pos - NEGATION_WINDOW, starts)
+        negated = seen[pos] - seen[window_start] > 0
+
+        w = self.weights[ids] * np.where(negated, -1.0, 1.0)
+        total = np.bincount(doc, weights=w, minlength=len(titles))
+        magnitude = np.bincount(doc, weights=np.abs(w), minlength=len(titles))
+        # Dampen single weak terms: one 0.5 word is not a strongly bullish headline
+        return total / (magnitude + 1.0)
+
+
+lexicon = Lexicon()
+
+
+def story_id(link, title):
+    """Dedup key: canonical URL (no query/fragment) if present, else the normalized title."""
+    if link:
+        parts = urlsplit(link)
+        key = f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+    else:
+        key = " ".join(_TOKEN.findall(title.lower()))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _parse(item):
+    """Normalize a news item (search endpoint's flat layout or yfinance's `content` layout)."""
+    content = item.get("content") or {}
+    title = item.get("title") or content.get("title") or ""
+    link = (item.get("link")
+            or (content.get("clickThroughUrl") or {}).get("url")
+            or (content.get("canonicalUrl") or {}).get("url")
+            or "")
+    published = item.get("providerPublishTime")
+    if published is None and content.get("pubDate"):
+        published = pd.Timestamp(content["pubDate"]).timestamp()
+    publisher = item.get("publisher") or (content.get("provider") or {}).get("displayName") or ""
+    return {"title": title.strip(), "link": link, "publisher": publisher,
+            "published": float(published or 0)}
+
+
+def _download(symbol):
+    """Raw news items for symbol from the search endpoint (what yfinance's Ticker.news calls)."""
+    def search(query):
+        return market_client.client.search_sync(query, quotes=0, news=NEWS_COUNT).get("news") or []
+
+    news = search(symbol)
+    # Fallback for Indian stocks if no news found directly
+    if not news and ".NS" in symbol:
+        news = search(symbol.replace(".NS", ""))
+    return news
+
+
+def get_headlines(symbol, ttl=NEWS_TTL, fetch=_download):
+    """Deduplicated, scored stories for symbol, newest first; refetched after ttl seconds."""
+    now = time.time()
+    with _lock:
+        cached = _symbols.get(symbol)
+    if cached is not None and now - cached[0] < ttl:
+        ids = cached[1]
+    else:
+        try:
+            items = [_parse(item) for item in fetch(symbol)]
+        except Exception as e:
+            print(f"News Error: {e}")
+            items = []
+        items = [item for item in items if item["title"]]
+        for item in items:
+            item["id"] = story_id(item["link"], item["title"])
+
+        with _lock:
+            new = {item["id"]: item for item in items if item["id"] not in _stories}
+        if new:
+            scores = lexicon.score([item["title"] for item in new.values()])
+            for item, score in zip(new.values(), scores):
+                item["sentiment"] = float(score)
+        ids = list(dict.fromkeys(item["id"] for item in items))
+        with _lock:
+            for story_key, item in new.items():
+                _stories.setdefault(story_key, item)
+            _symbols[symbol] = (now, ids)
+
+    with _lock:
+        stories = [_stories[i] for i in ids if i in _stories]
+    return sorted(stories, key=lambda s: -s["published"])
+
+
+def sentiment(stories, now=None):
+    """Recency-weighted mean headline sentiment in [-1, 1] (0 without stories)."""
+    if not stories:
+        return 0.0
+    now = time.time() if now is None else now
+    scores = np.array([s["sentiment"] for s in stories])
+    age_hours = np.array([max(now - s["published"], 0) if s["published"] else 0 for s in stories]) / 3600
+    weights = 0.5 ** (age_hours / HALF_LIFE_HOURS)
+    return float(np.average(scores, weights=weights)) if weights.sum() > 0 else float(scores.mean())
+
+
+def clear(symbol=None):
+    """Forget cached headlines for symbol (or everything)."""
+    with _lock:
+        if symbol is None:
+            _symbols.clear()
+            _stories.clear()
+        else:
+            _symbols.pop(symbol, None)
+        live = {i for _, ids in _symbols.values() for i in ids}
+        for story_key in [k for k in _stories if k not in live]:
+            del _stories[story_key]
+
+
+def _retain(symbols):
+    """Keep only symbols' cache entries and the stories their latest fetch returned."""
+    keep = set(symbols)
+    with _lock:
+        for symbol in [s for s in _symbols if s not in keep]:
+            del _symbols[symbol]
+        live = {i for _, ids in _symbols.values() for i in ids}
+        for story_key in [k for k in _stories if k not in live]:
+            del _stories[story_key]
+
+
+def stored_sentiment(symbol, window_hours=SENTIMENT_WINDOW_HOURS):
+    """
+    (rolling sentiment, latest MAX_HEADLINES headlines) from the news_headlines
+    table; no network. Symbols with nothing stored are queued for the ingestor.
+    """
+    since = datetime.now() - timedelta(hours=window_hours)
+    series = db.get_sentiment_series(symbol, since)
+    if not series:
+        request(symbol)
+        return 0.0, []
+    stories = [{"published": _epoch(published), "sentiment": score} for published, score in series]
+    headlines = [
+        {"title": row["title"], "link": row["link"], "publisher": row["publisher"],
+         "published": _epoch(row["published_at"]), "sentiment": row["sentiment"]}
+        for row in db.get_headlines(symbol, since, limit=MAX_HEADLINES)
+    ]
+    return sentiment(stories), headlines
+
+
+def _epoch(value):
+    """Epoch seconds for a stored (naive, local time) published_at; SQLite returns strings."""
+    return pd.Timestamp(value).to_pydatetime().timestamp()
+
+
+def request(symbol):
+    """
+    Ask the running ingestor to fetch symbol now. Repeat requests within
+    REQUEST_INTERVAL seconds are ignored, so a symbol with no news is not
+    refetched on every prediction.
+    """
+    now = time.time()
+    with _lock:
+        if now - _requested_at.get(symbol, 0.0) < REQUEST_INTERVAL:
+            return
+        _requested_at[symbol] = now
+        _requested.add(symbol)
+    if ingestor is not None:
+        ingestor.wake()
+
+
+class NewsIngestor:
+    """
+    Background thread that fetches, scores and stores headlines for every
+    symbol from `symbols()` (default: all watchlist and portfolio symbols)
+    plus any requested ones, every `every` seconds. A wake-up between rounds
+    fetches only the requested symbols.
+    """
+    def __init__(self, every=NEWS_TTL, symbols=None, pause=0.5, fetch=_download):
+        self.every = every
+        self.symbols = symbols or db.get_tracked_symbols
+        self.pause = pause
+        self.fetch = fetch
+        self.stats = {"rounds": 0, "wakeups": 0, "symbols": 0, "stored": 0, "errors": 0}
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def ingest(self, requested_only=False):
+        """One full round, or just the pending requested symbols with `requested_only`."""
+        with _lock:
+            requested = sorted(_requested)
+        symbols = requested if requested_only else list(dict.fromkeys([*self.symbols(), *requested]))
+        for symbol in symbols:
+            if self._stop.is_set():
+                break
+            try:
+                # ttl=0: always refetch; stories seen for other symbols are not rescored
+                stories = get_headlines(symbol, ttl=0, fetch=self.fetch)
+                self.stats["stored"] += db.save_headlines(symbol, stories)
+                self.stats["symbols"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"News ingest failed for {symbol}: {e}")
+            with _lock:
+                _requested.discard(symbol)
+            self._stop.wait(self.pause)  # stay polite to the upstream API
+        if requested_only:
+            self.stats["wakeups"] += 1
+            return
+        # Stories still in some symbol's feed stay in memory so the next round does not
+        # rescore them; the rest are already stored and will not come back
+        _retain(symbols)
+        db.prune_headlines(datetime.now() - timedelta(days=RETENTION_DAYS))
+        self.stats["rounds"] += 1
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        next_round = 0.0
+        while not self._stop.is_set():
+            # Clear before reading the requests, so one made while this pass runs
+            # leaves the event set and cuts the wait below short
+            self._wake.clear()
+            try:
+                if time.time() >= next_round:
+                    next_round = time.time() + self.every
+                    self.ingest()
+                else:
+                    self.ingest(requested_only=True)
+            except Exception as e:
+                print(f"News ingest failed: {e}")
+            self._wake.wait(max(next_round - time.time(), 0))
+
+    def start(self):
+        """Start polling; the first round runs in the background right away."""
+        global ingestor
+        if self._thread is None:
+            ingestor = self  # before the first round, so requests made during it wake this thread
+            self._thread = threading.Thread(target=self._run, name="news-ingestor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+# The process's running NewsIngestor, if any (set by start())
+ingestor = None
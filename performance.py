@@ -0,0 +1,252 @@
+"""
+Portfolio performance: daily equity curve, cash flows, time-weighted return
+and XIRR from the transactions ledger and daily closes.
+
+Positions and values are computed on aligned (dates x symbols) NumPy
+matrices. Results are cached per portfolio: when only new trading days or
+trades dated after the cached curve arrive, the last (provisional) row is
+recomputed and new rows are appended instead of replaying the whole history.
+A cached curve is only touched again once the portfolio's transactions scope
+in database.py's read-through cache changes, or its closes are older than
+CLOSES_TTL.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import database as db
+import ledger
+import market_data as md
+
+CURVE_COLUMNS = ["value", "invested", "inflow", "outflow", "daily_return", "twr"]
+
+# The provisional last row only moves when the bar store refreshes its tail
+CLOSES_TTL = 60
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _normalize(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def load_closes(symbols, start):
+    """Daily closes as an aligned (dates x symbols) frame from `start`, forward-filled."""
+    days = (pd.Timestamp.now() - start).days
+    frames = md.bar_store.get_many(symbols, "1mo" if days < 28 else f"{days // 365 + 1}y")
+    columns = {}
+    for symbol in symbols:
+        bars = frames.get(symbol)
+        if bars is None or bars.empty:
+            continue
+        close = bars["Close"]
+        close = close.iloc[close.index.searchsorted(md._localize(start.normalize(), close.index)):]
+        columns[symbol] = close[~close.index.duplicated(keep="last")] if close.index.has_duplicates else close
+    if not columns:
+        return pd.DataFrame(columns=list(symbols))
+    if len({str(close.index.tz) for close in columns.values()}) > 1:
+        # Mixed exchanges: align on local calendar days, not on UTC instants
+        columns = {symbol: close.set_axis(_normalize(close.index)) for symbol, close in columns.items()}
+    closes = pd.concat(columns, axis=1).reindex(columns=list(symbols))
+    closes.index = _normalize(closes.index)
+    closes = closes[~closes.index.duplicated(keep="last")]
+    # Before a symbol's first bar (or without any bars) fall back to its first close
+    return closes.ffill().bfill()
+
+
+def _run(tx, closes, symbols, state):
+    """
+    Equity rows for every date of `closes`, given the trades mapped onto those
+    dates and the state at the end of the day before.
+    Returns (curve, state before the last row, trades on the last row).
+    """
+    dates = closes.index
+    sym_idx = {s: i for i, s in enumerate(symbols)}
+    n, m = len(dates), len(symbols)
+
+    tx_dates = _normalize(tx["date"])
+    # Trades on holidays/weekends count on the next session; trades after the last bar on the last one
+    di = np.minimum(np.searchsorted(dates.to_numpy(), tx_dates.to_numpy(), side="left"), n - 1)
+    si = tx["symbol"].map(sym_idx).to_numpy(dtype=np.int64)
+    qty = tx["quantity"].to_numpy(dtype=np.float64)
+    types = tx["type"].to_numpy()
+    prices = closes[symbols].to_numpy(dtype=np.float64)
+    # Transfers (holdings carried in or removed) move at the day's close, not at their book price
+    is_transfer = (types == db.TRANSFER_IN) | (types == db.TRANSFER_OUT)
+    fill = np.where(is_transfer, np.nan_to_num(prices[di, si]), tx["price"].to_numpy(dtype=np.float64))
+    amount = qty * fill
+    is_buy = (types == "BUY") | (types == db.TRANSFER_IN)
+
+    delta = np.zeros((n, m))
+    np.add.at(delta, (di, si), np.where(is_buy, qty, -qty))
+    inflow = np.zeros(n)
+    outflow = np.zeros(n)
+    transfer_in = np.zeros(n)
+    np.add.at(inflow, di[is_buy], amount[is_buy])
+    np.add.at(outflow, di[~is_buy], amount[~is_buy])
+    np.add.at(transfer_in, di[is_buy & is_transfer], amount[is_buy & is_transfer])
+
+    quantities = state["quantities"] + np.cumsum(delta, axis=0)
+    value = np.nansum(quantities * prices, axis=1)
+
+    # Daily return with buys invested at the start of the day, sells withdrawn at the
+    # end and transfers moved at the close (so they earn nothing on their day)
+    prev_value = np.concatenate(([state["value"]], value[:-1]))
+    base = prev_value + inflow - transfer_in
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = np.where(base > 0, (value + outflow - inflow - prev_value) / base, 0.0)
+    growth = state["growth"] * np.cumprod(1 + daily)
+    invested = state["invested"] + np.cumsum(inflow - outflow)
+
+    curve = pd.DataFrame({
+        "value": value,
+        "invested": invested,
+        "inflow": inflow,
+        "outflow": outflow,
+        "daily_return": daily,
+        "twr": growth - 1,
+    }, index=dates)[CURVE_COLUMNS]
+    before_last = state if n == 1 else {
+        "quantities": quantities[-2], "value": value[-2], "growth": growth[-2], "invested": invested[-2]
+    }
+    return curve, before_last, tx[di == n - 1]
+
+
+def _start_state(m):
+    return {"quantities": np.zeros(m), "value": 0.0, "growth": 1.0, "invested": 0.0}
+
+
+def _entry(symbols, curve, max_id, before_last, tail_trades):
+    # The last row stays provisional: its close moves intraday and later trades may land on it
+    return {
+        "symbols": symbols,
+        "curve": curve,
+        "max_id": max_id,
+        "before_last": before_last,
+        "tail_trades": tail_trades,
+        "version": None,
+        "loaded_at": 0.0,
+        "closes_at": 0.0,
+    }
+
+
+def _full(tx):
+    symbols = sorted(tx["symbol"].unique())
+    closes = load_closes(symbols, _normalize(tx["date"]).min())
+    if closes.empty:
+        return None
+    curve, before_last, tail = _run(tx, closes, symbols, _start_state(len(symbols)))
+    return _entry(symbols, curve, int(tx["id"].max()), before_last, tail)
+
+
+def _extend(entry, new_tx):
+    """Recompute the cached curve's last row and append any newer days."""
+    last_day = entry["curve"].index[-1]
+    closes = load_closes(entry["symbols"], last_day)
+    if closes.empty:
+        return entry
+    tx = pd.concat([entry["tail_trades"], new_tx]) if len(new_tx) else entry["tail_trades"]
+    tail, before_last, tail_trades = _run(tx, closes, entry["symbols"], entry["before_last"])
+    curve = pd.concat([entry["curve"].iloc[:-1], tail])
+    max_id = max(entry["max_id"], int(new_tx["id"].max())) if len(new_tx) else entry["max_id"]
+    return _entry(entry["symbols"], curve, max_id, before_last, tail_trades)
+
+
+def equity_curve(portfolio_id):
+    """
+    Daily equity curve for a portfolio: value, invested (net cash put in),
+    inflow/outflow (buy/sell cash flows, transfers at market value),
+    daily_return and cumulative twr.
+    Empty frame if the portfolio has no trades or no price history.
+    """
+    with _lock:
+        entry = _cache.get(portfolio_id)
+    # Read before loading: a write that lands mid-load bumps it again
+    version = db._cache_version(("transactions", portfolio_id))
+    now = time.time()
+
+    if entry is not None:
+        # Writes from other processes only show up through the read-through TTL
+        changed = entry["version"] != version or now - entry["loaded_at"] > db.CACHE_TTL
+        if not changed and now - entry["closes_at"] <= CLOSES_TTL:
+            return entry["curve"]
+        new_tx = ledger.load_transactions(portfolio_id, after_id=entry["max_id"]) if changed else entry["tail_trades"][:0]
+        backdated = len(new_tx) and (
+            not new_tx["symbol"].isin(entry["symbols"]).all()
+            or (_normalize(new_tx["date"]) < entry["curve"].index[-1]).any()
+        )
+        loaded_at = now if changed else entry["loaded_at"]
+        entry = None if backdated else _extend(entry, new_tx)
+        if entry is not None:
+            entry["loaded_at"] = loaded_at
+
+    if entry is None:
+        tx = ledger.load_transactions(portfolio_id)
+        entry = _full(tx) if len(tx) else None
+        if entry is not None:
+            entry["loaded_at"] = now
+    if entry is None:
+        return pd.DataFrame(columns=CURVE_COLUMNS)
+
+    entry["version"] = version
+    entry["closes_at"] = now
+    with _lock:
+        _cache[portfolio_id] = entry
+    return entry["curve"]
+
+
+def xirr(dates, flows, guess_bounds=(-0.9999, 100.0), tol=1e-10):
+    """
+    Annualized internal rate of return for irregular cash flows (investor
+    view: money in negative, money out positive). NaN if it has no root.
+    """
+    flows = np.asarray(flows, dtype=np.float64)
+    years = (pd.DatetimeIndex(dates) - pd.DatetimeIndex(dates)[0]).days.to_numpy() / 365.0
+
+    def npv(rate):
+        return np.sum(flows / (1 + rate) ** years)
+
+    lo, hi = guess_bounds
+    f_lo, f_hi = npv(lo), npv(hi)
+    if not np.isfinite(f_lo) or not np.isfinite(f_hi) or f_lo * f_hi > 0:
+        return np.nan
+    # Bisection: NPV is monotonic in rate for a conventional invest-then-withdraw series
+    for _ in range(200):
+        mid = (lo + hi) / 2
+        f_mid = npv(mid)
+        if abs(f_mid) < tol or hi - lo < tol:
+            break
+        if f_lo * f_mid < 0:
+            hi = mid
+        else:
+            lo, f_lo = mid, f_mid
+    return mid
+
+
+def summary(curve):
+    """Headline numbers for an equity curve: value, invested, twr and xirr (fractions)."""
+    if curve.empty:
+        return {"value": 0.0, "invested": 0.0, "twr": 0.0, "xirr": np.nan}
+    flows = (curve["outflow"] - curve["inflow"]).to_numpy(copy=True)
+    flows[-1] += curve["value"].iloc[-1]  # liquidate at the last close
+    active = flows != 0
+    return {
+        "value": float(curve["value"].iloc[-1]),
+        "invested": float(curve["invested"].iloc[-1]),
+        "twr": float(curve["twr"].iloc[-1]),
+        "xirr": xirr(curve.index[active], flows[active]) if active.sum() > 1 else np.nan,
+    }
+
+
+def clear(portfolio_id=None):
+    with _lock:
+        if portfolio_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(portfolio_id, None)
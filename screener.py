@@ -0,0 +1,65 @@
+"""
+Batch AI screener: score a whole watchlist, portfolio or the NIFTY universe
+in one job instead of one predict_signal click per symbol.
+
+History for all symbols comes from one bulk bar-store refresh, features are
+built into one stacked (symbol, date) panel, and each symbol's latest bar is
+scored in-process. Models are shared with predict_signal through model_store,
+so only cold or outdated ones are trained (using every core through the
+forest's n_jobs), and a screen also warms the per-symbol AI Insight.
+News sentiment is not part of the screen (only tracked symbols have stored
+headlines); the signal is the technical model probability alone.
+"""
+import pandas as pd
+
+import ai_predictor as ai
+import market_data as md
+import model_store
+
+
+def build_panel(symbols):
+    """Stacked feature panel indexed by (symbol, date) for symbols with enough history."""
+    frames = md.bar_store.get_many(symbols, "2y")
+    parts = {}
+    for symbol, df in frames.items():
+        if len(df) < 200:
+            continue
+        parts[symbol] = ai.build_features(symbol, df)[ai.FEATURES + ['Close', 'Target']]
+    if not parts:
+        return pd.DataFrame(columns=ai.FEATURES + ['Close', 'Target'])
+    return pd.concat(parts, names=['symbol', 'date'])
+
+
+def _score(symbol, features):
+    """Load or train the symbol's model and score its latest bar."""
+    X = features[ai.FEATURES]
+    y = features['Target']
+    model = model_store.get_or_train(symbol, X.iloc[:-5], y.iloc[:-5], ai.train_model, ai.MODEL_SCHEMA)
+    return float(model.predict_proba(X.iloc[[-1]])[0][1])
+
+
+def screen(symbols):
+    """
+    Ranked signal table for symbols: one row per symbol with signal,
+    confidence (%), Close, RSI, MACD and SMA_200, best first.
+    """
+    panel = build_panel(list(dict.fromkeys(symbols)))
+    columns = ['symbol', 'signal', 'confidence', 'Close', 'RSI', 'MACD', 'SMA_200']
+    if panel.empty:
+        return pd.DataFrame(columns=columns)
+
+    scores = {
+        symbol: _score(symbol, group.droplevel(0))
+        for symbol, group in panel.groupby(level=0, sort=False)
+    }
+    return _rank(panel, scores, columns)
+
+
+def _rank(panel, scores, columns):
+    latest = panel.groupby(level=0, sort=False).tail(1).droplevel(1)
+    table = latest[['Close', 'RSI', 'MACD', 'SMA_200']].copy()
+    table['probability'] = pd.Series(scores)
+    table['signal'] = table['probability'].map(ai.classify_signal)
+    table['confidence'] = table['probability'] * 100
+    table = table.sort_values('probability', ascending=False).rename_axis('symbol').reset_index()
+    return table[columns]
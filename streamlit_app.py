@@ -1,3 +1,5 @@
+import io
+import tempfile
 import streamlit as st
 import yfinance as yf
 import pandas as pd
@@ -5,7 +7,16 @@ import plotly.graph_objects as go
 from datetime import datetime
 import database as db
 import ai_predictor as ai
-import requests
+import market_data as md
+import market_client
+import news
+import screener
+import symbol_search
+import trade_import
+import valuation
+import performance
+import chart_data as charts
+import nifty_stocks
 
 # Page Config
 st.set_page_config(
@@ -25,11 +36,8 @@ except Exception as e:
 @st.cache_data(ttl=300)
 def search_yahoo(query):
     try:
-        url = f"https://query2.finance.yahoo.com/v1/finance/search"
-        params = {"q": query, "quotesCount": 10, "newsCount": 0}
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, params=params, headers=headers)
-        data = response.json()
+        # Shared async client: pooled connections, timeout, retries, coalesced duplicates
+        data = market_client.client.search_sync(query, quotes=10)
         
         results = []
         if 'quotes' in data:
@@ -45,129 +53,139 @@ def search_yahoo(query):
         st.error(f"Search Error: {e}")
         return []
 
-@st.cache_data(ttl=60)
+def search_stocks(query):
+    """Local symbol index first; Yahoo search only when nothing matches locally"""
+    return symbol_search.search(query, remote=search_yahoo)
+
+@st.cache_data(ttl=300)
+def get_stock_info(symbol):
+    """yfinance Ticker.info (market cap, volume, ranges, ratios), fetched at most once per TTL; failures raise and are not cached"""
+    return yf.Ticker(symbol).info or {}
+
 def get_stock_data(symbol):
+    """Latest md.Quote for symbol; served from the quote cache, never blocks once warm"""
     try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period="1d")
-        if not hist.empty:
-            price = hist['Close'].iloc[-1]
-            hist_5d = stock.history(period="5d")
-            if len(hist_5d) >= 2:
-                prev_close = hist_5d['Close'].iloc[-2]
-                change = price - prev_close
-                change_pct = (change / prev_close) * 100
-            else:
-                change = 0
-                change_pct = 0
-                
-            return {
-                'symbol': symbol,
-                'name': symbol,
-                'price': price,
-                'change': change,
-                'change_pct': change_pct
-            }
-        return None
+        return md.get_quote(symbol)
     except Exception as e:
         return None
 
+# Timeframe -> exact calendar days back (None = full history)
+TIMEFRAME_DAYS = {
+    "1D": 1,
+    "5D": 5,
+    "1M": 30,
+    "3M": 90,
+    "6M": 180,
+    "1Y": 365,
+    "5Y": 365 * 5,
+    "Max": None
+}
+
 @st.cache_data(ttl=60)
-def get_timeframe_pl(symbol, timeframe):
-    """Calculate P/L for a specific timeframe using exact date calculations"""
+def get_all_timeframe_pl(symbol):
+    """P/L for every timeframe in one pass over the cached max-history frame"""
     try:
         from datetime import datetime, timedelta
+        import numpy as np
         
-        # Map timeframe to exact days
-        days_map = {
-            "1D": 1,
-            "5D": 5,
-            "1M": 30,
-            "3M": 90,
-            "6M": 180,
-            "1Y": 365,
-            "5Y": 365 * 5,
-            "Max": None  # Special case
-        }
+        hist = md.get_history(symbol, 'max')
+        if len(hist) < 2:
+            return {}
         
-        days = days_map.get(timeframe)
-        stock = yf.Ticker(symbol)
+        closes = hist['Close'].to_numpy()
+        current_price = closes[-1]
         
-        if days is None:  # Max period
-            hist = stock.history(period='max')
-            if len(hist) >= 2:
-                start_price = hist['Close'].iloc[0]
-                current_price = hist['Close'].iloc[-1]
-                start_date = hist.index[0]
-        else:
-            # Fetch enough data to ensure we have the exact date
-            # Use 2x the period to be safe, or 2y for long periods
-            if days <= 180:
-                fetch_period = f"{days * 2}d"
-            else:
-                fetch_period = "2y"
-            
-            hist = stock.history(period=fetch_period)
-            
-            if len(hist) < 2:
-                return None
-            
-            # Calculate target date (exactly N days ago)
-            target_date = datetime.now() - timedelta(days=days)
-            
-            # Find closest trading day to target date
-            closest_date = None
-            min_diff = timedelta(days=999)
-            
-            for date in hist.index:
-                date_naive = date.to_pydatetime().replace(tzinfo=None)
-                diff = abs(date_naive - target_date)
-                if diff < min_diff:
-                    min_diff = diff
-                    closest_date = date
-            
-            if closest_date is None:
-                return None
-            
-            # Validation: Check if we found a date within reasonable range (7 days)
-            date_diff_days = min_diff.days
-            if date_diff_days > 7:
-                # Data quality issue - date is too far from target
-                return None
-            
-            start_price = hist.loc[closest_date, 'Close']
-            current_price = hist['Close'].iloc[-1]
-            start_date = closest_date
+        # Closest trading day to exactly N days ago, for all timeframes at once
+        timeframes = [tf for tf, days in TIMEFRAME_DAYS.items() if days is not None]
+        now = datetime.now()
+        targets = [now - timedelta(days=TIMEFRAME_DAYS[tf]) for tf in timeframes]
+        positions, gaps = md.nearest_bars(hist.index, targets)
+        gap_days = gaps // np.timedelta64(1, 'D')
         
-        # Calculate P/L
-        price_change = current_price - start_price
-        pct_change = (price_change / start_price) * 100
+        results = {}
+        for tf, pos, gap in zip(timeframes, positions, gap_days):
+            # Validation: date too far from target (> 7 days) is a data quality issue
+            if gap > 7:
+                continue
+            results[tf] = (pos, hist.index[pos])
+        results["Max"] = (0, hist.index[0])
         
-        return {
-            'start_price': start_price,
-            'current_price': current_price,
-            'change': price_change,
-            'change_pct': pct_change,
-            'period': timeframe,
-            'start_date': start_date,
-            'data_quality': 'verified'
-        }
+        pl = {}
+        for tf, (pos, start_date) in results.items():
+            start_price = closes[pos]
+            price_change = current_price - start_price
+            pl[tf] = {
+                'start_price': start_price,
+                'current_price': current_price,
+                'change': price_change,
+                'change_pct': (price_change / start_price) * 100,
+                'period': tf,
+                'start_date': start_date,
+                'data_quality': 'verified'
+            }
+        return pl
     except Exception as e:
-        return None
+        return {}
+
+def get_timeframe_pl(symbol, timeframe):
+    """Calculate P/L for a specific timeframe using exact date calculations"""
+    return get_all_timeframe_pl(symbol).get(timeframe)
+
+MARKET_INDICES = {
+    'NIFTY 50': '^NSEI',
+    'SENSEX': '^BSESN',
+    'BANK NIFTY': '^NSEBANK'
+}
+
+@st.cache_resource
+def get_index_refresher():
+    """One process-wide refresher thread shared by every session"""
+    return md.QuoteRefresher(MARKET_INDICES, every=10).start()
+
+@st.cache_resource
+def get_news_ingestor():
+    """One process-wide news ingestion thread; AI Insight reads what it stores"""
+    return news.NewsIngestor().start()
+
+get_news_ingestor()
 
 def get_market_indices():
-    indices = {
-        'NIFTY 50': '^NSEI',
-        'SENSEX': '^BSESN',
-        'BANK NIFTY': '^NSEBANK'
-    }
-    data = []
-    for name, symbol in indices.items():
-        info = get_stock_data(symbol)
-        if info:
-            info['name'] = name
-            data.append(info)
-    return data
+    # Read the latest published snapshot; never blocks on upstream
+    return list(get_index_refresher().snapshot.quotes)
+
+def staleness_badge(as_of, fresh_for=None):
+    """Caption showing how old a quote timestamp (epoch seconds) is"""
+    if not as_of or pd.isna(as_of):
+        return "⚪ No live data"
+    fresh_for = fresh_for or md.quote_cache.ttl
+    age = datetime.now().timestamp() - as_of
+    stamp = datetime.fromtimestamp(as_of).strftime('%H:%M:%S')
+    if age <= fresh_for:
+        return f"🟢 Live · as of {stamp}"
+    if age <= md.quote_cache.max_staleness:
+        return f"🟡 Delayed {age:.0f}s · as of {stamp} · refreshing"
+    return f"🔴 Stale · as of {stamp}"
+
+@st.cache_data(ttl=3600)
+def screen_symbols(symbols):
+    """Ranked AI signal table for a tuple of symbols (one batch job)"""
+    return screener.screen(list(symbols))
+
+def display_screen_results(table):
+    if table.empty:
+        st.info("Not enough history to screen these symbols.")
+        return
+    st.dataframe(
+        table.style.format({
+            'confidence': '{:.1f}%',
+            'Close': '₹{:,.2f}',
+            'RSI': '{:.1f}',
+            'MACD': '{:.2f}',
+            'SMA_200': '₹{:,.2f}'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
 
 def display_ai_insight(p):
     """Reusable function to display AI prediction details"""
@@ -197,15 +215,20 @@ def display_ai_insight(p):
 def render_market_indices_fragment():
     """Auto-refreshing market indices only - updates every 10 seconds without affecting other content"""
     indices = get_market_indices()
+    if not indices:
+        st.caption("Market indices unavailable right now")
+        return
     
     cols = st.columns(len(indices))
     for i, index in enumerate(indices):
         with cols[i]:
             st.metric(
-                label=index['name'],
-                value=f"₹{index['price']:,.2f}",
-                delta=f"{index['change_pct']:.2f}%"
+                label=index.name,
+                value=f"₹{index.price:,.2f}",
+                delta=f"{index.change_pct:.2f}%"
             )
+    # The refresher publishes every 10s; allow a few missed rounds before flagging
+    st.caption(staleness_badge(get_index_refresher().snapshot.as_of, fresh_for=30))
 
 def render_dashboard():
     st.title("📊 Market Dashboard")
@@ -223,15 +246,20 @@ def render_dashboard():
 def render_market_indices_fragment():
     """Auto-refreshing market indices only - updates every 10 seconds without affecting other content"""
     indices = get_market_indices()
+    if not indices:
+        st.caption("Market indices unavailable right now")
+        return
     
     cols = st.columns(len(indices))
     for i, index in enumerate(indices):
         with cols[i]:
             st.metric(
-                label=index['name'],
-                value=f"₹{index['price']:,.2f}",
-                delta=f"{index['change_pct']:.2f}%"
+                label=index.name,
+                value=f"₹{index.price:,.2f}",
+                delta=f"{index.change_pct:.2f}%"
             )
+    # The refresher publishes every 10s; allow a few missed rounds before flagging
+    st.caption(staleness_badge(get_index_refresher().snapshot.as_of, fresh_for=30))
 
 def render_stock_search_section():
     """Static stock search section that doesn't re-render"""
@@ -246,7 +274,7 @@ def render_stock_search_section():
         st.session_state["dashboard_search_res"] = {}
         
     if search_query and search_query != st.session_state.get("last_dashboard_search", ""):
-        results = search_yahoo(search_query)
+        results = search_stocks(search_query)
         if results:
             st.session_state["dashboard_search_res"] = {f"{r['symbol']} - {r['name']}": r['symbol'] for r in results}
         else:
@@ -281,11 +309,8 @@ def render_stock_search_section():
             # SECTION 1: CHART WITH TIMEFRAME SELECTOR (FIRST - MOST IMPORTANT)
             # ========================================
             
-            # Get additional data from yfinance for chart
+            # Chart and details (bars from the bar store, info from the cached get_stock_info)
             try:
-                stock = yf.Ticker(stock_symbol)
-                
-                
                 # Interactive Chart Section
                 st.markdown("---")
                 st.markdown("**📈 Select Timeframe**")
@@ -404,6 +429,10 @@ def render_stock_search_section():
                             delta=f"{pl_data['change_pct']:.2f}%"
                         )
                     
+                    # Every period's return, from the same cached frame
+                    all_pl = get_all_timeframe_pl(stock_symbol)
+                    st.caption(" | ".join(f"{tf}: {p['change_pct']:+.2f}%" for tf, p in all_pl.items()))
+                    
                     # Data quality indicator
                     if pl_data.get('data_quality') == 'verified':
                         st.caption("✅ Data verified with exact date calculation")
@@ -431,35 +460,40 @@ def render_stock_search_section():
                 chart_period = period_map[selected_tf]
                 
                 try:
-                    # Fetch data
-                    stock = yf.Ticker(stock_symbol)
-                    chart_data = stock.history(period=chart_period)
+                    # Fetch data (served from the shared bar store)
+                    chart_data = md.get_history(stock_symbol, chart_period)
                     
                     if not chart_data.empty:
+                        # Candles/MA fitted to the chart width (weekly/monthly bars for long ranges)
+                        plot = charts.candles(stock_symbol, chart_period)
+                        bars = plot['bars']
+                        
                         # Create candlestick chart
                         fig = go.Figure(data=[go.Candlestick(
-                            x=chart_data.index,
-                            open=chart_data['Open'],
-                            high=chart_data['High'],
-                            low=chart_data['Low'],
-                            close=chart_data['Close'],
+                            x=bars.index,
+                            open=bars['Open'],
+                            high=bars['High'],
+                            low=bars['Low'],
+                            close=bars['Close'],
                             name=stock_symbol
                         )])
                         
                         # Add moving average
-                        if len(chart_data) >= 20:
-                            ma20 = chart_data['Close'].rolling(window=20).mean()
+                        if not plot['ma'].empty:
                             fig.add_trace(go.Scatter(
-                                x=chart_data.index,
-                                y=ma20,
+                                x=plot['ma'].index,
+                                y=plot['ma'],
                                 mode='lines',
                                 name='MA20',
                                 line=dict(color='orange', width=1)
                             ))
                         
                         # Update layout
+                        title = f"{stock_symbol} - {selected_tf} Chart"
+                        if plot['label']:
+                            title += f" ({plot['label']} candles)"
                         fig.update_layout(
-                            title=f"{stock_symbol} - {selected_tf} Chart",
+                            title=title,
                             yaxis_title="Price (₹)",
                             xaxis_title="Date",
                             template="plotly_dark",
@@ -564,11 +598,14 @@ def render_stock_search_section():
                 
                 # Price Information
                 col1, col2, col3, col4 = st.columns(4)
-                col1.metric("Current Price", f"₹{stock_data['price']:,.2f}")
-                col2.metric("Change", f"₹{stock_data['change']:,.2f}", f"{stock_data['change_pct']:+.2f}%")
+                col1.metric("Current Price", f"₹{stock_data.price:,.2f}")
+                col2.metric("Change", f"₹{stock_data.change:,.2f}", f"{stock_data.change_pct:+.2f}%")
                 
-                # Get info for additional metrics
-                info = stock.info
+                # Get info for additional metrics (cached across reruns and sessions)
+                try:
+                    info = get_stock_info(stock_symbol)
+                except Exception as e:
+                    info = {}
                 
                 # Market Cap and Volume
                 if 'marketCap' in info:
@@ -646,27 +683,16 @@ def render_stock_search_section():
                         with c_qty:
                             q_qty = st.number_input("Qty", min_value=1, value=1, key="qa_qty")
                         with c_price:
-                            q_price = st.number_input("Price", min_value=0.0, value=float(stock_data['price']), key="qa_price")
+                            q_price = st.number_input("Price", min_value=0.0, value=float(stock_data.price), key="qa_price")
                         
                         if st.button("💰 Buy / Add", key="qa_add_pf"):
                             pf_id = pf_names[selected_pf]
-                            # Add transaction
-                            db.add_transaction(pf_id, stock_symbol, "BUY", q_qty, q_price, datetime.now())
-                            
-                            # Update holdings with weighted average
-                            holdings = db.get_portfolio_holdings(pf_id)
-                            current_holding = next((h for h in holdings if h['symbol'] == stock_symbol), None)
-                            
-                            if current_holding:
-                                new_qty = current_holding['quantity'] + q_qty
-                                total_cost = (float(current_holding['quantity']) * float(current_holding['avg_price'])) + (q_qty * q_price)
-                                new_avg = total_cost / new_qty
+                            # Transaction + weighted-average holding update in one DB transaction
+                            ok, msg = db.record_trade(pf_id, stock_symbol, "BUY", q_qty, q_price, datetime.now())
+                            if ok:
+                                st.success(f"Bought {q_qty} {stock_symbol} in {selected_pf}!")
                             else:
-                                new_qty = q_qty
-                                new_avg = q_price
-                                
-                            db.update_portfolio_holding(pf_id, stock_symbol, new_qty, new_avg)
-                            st.success(f"Bought {q_qty} {stock_symbol} in {selected_pf}!")
+                                st.error(msg)
                     else:
                         st.info("No portfolios found. Create one in Portfolio tab.")
                 
@@ -690,6 +716,12 @@ def render_stock_search_section():
     st.markdown("---")
     st.subheader("📈 Market Trends")
     
+    if st.button("🤖 Screen NIFTY Universe", key="screen_nifty"):
+        with st.spinner(f"Scoring {len(nifty_stocks.STOCKS)} stocks..."):
+            st.session_state["nifty_screen"] = screen_symbols(tuple(s['symbol'] for s in nifty_stocks.STOCKS))
+    if "nifty_screen" in st.session_state:
+        display_screen_results(st.session_state["nifty_screen"])
+    
     st.markdown("---")
     render_nifty_dashboard()
 
@@ -713,10 +745,9 @@ def render_nifty_dashboard():
     }
     
     # Fetch Data
-    nifty = yf.Ticker("^NSEI")
     tf = st.session_state.nifty_timeframe
     params = tf_map[tf]
-    hist = nifty.history(period=params['period'], interval=params['interval'])
+    hist = md.get_history("^NSEI", params['period'], params['interval'])
     
     if hist.empty:
         st.error("No data available for NIFTY 50")
@@ -724,7 +755,8 @@ def render_nifty_dashboard():
 
     # Current Metrics
     current_price = hist['Close'].iloc[-1]
-    prev_close = nifty.info.get('previousClose', hist['Close'].iloc[0])
+    stats = md.key_stats("^NSEI")
+    prev_close = stats.get('prev_close', hist['Close'].iloc[0])
     
     # Calculate change based on timeframe
     if tf == '1D':
@@ -761,10 +793,11 @@ def render_nifty_dashboard():
     # Chart
     fig = go.Figure()
     
-    # Area Chart
+    # Area Chart (LTTB-downsampled to the chart width)
+    area = charts.line("^NSEI", params['period'], params['interval'])
     fig.add_trace(go.Scatter(
-        x=hist.index, 
-        y=hist['Close'],
+        x=area.index, 
+        y=area,
         mode='lines',
         fill='tozeroy',
         line=dict(color='#34a853' if change >= 0 else '#ea4335', width=2),
@@ -801,16 +834,15 @@ def render_nifty_dashboard():
     st.plotly_chart(fig, use_container_width=True)
     
     # Stats Grid
-    info = nifty.info
     st.markdown("### Key Statistics")
     c1, c2, c3, c4, c5, c6 = st.columns(6)
     
-    c1.metric("Open", f"{info.get('open', 0):,.2f}")
-    c2.metric("High", f"{info.get('dayHigh', 0):,.2f}")
-    c3.metric("Low", f"{info.get('dayLow', 0):,.2f}")
-    c4.metric("Prev Close", f"{info.get('previousClose', 0):,.2f}")
-    c5.metric("52W High", f"{info.get('fiftyTwoWeekHigh', 0):,.2f}")
-    c6.metric("52W Low", f"{info.get('fiftyTwoWeekLow', 0):,.2f}")
+    c1.metric("Open", f"{stats.get('open', 0):,.2f}")
+    c2.metric("High", f"{stats.get('day_high', 0):,.2f}")
+    c3.metric("Low", f"{stats.get('day_low', 0):,.2f}")
+    c4.metric("Prev Close", f"{stats.get('prev_close', 0):,.2f}")
+    c5.metric("52W High", f"{stats.get('year_high', 0):,.2f}")
+    c6.metric("52W Low", f"{stats.get('year_low', 0):,.2f}")
 
 @st.fragment(run_every=30)
 def render_watchlist_data(watchlist_id):
@@ -819,15 +851,13 @@ def render_watchlist_data(watchlist_id):
         st.info("Watchlist is empty.")
         return
 
-    data = []
-    for sym in watchlist_items:
-        d = get_stock_data(sym)
-        if d:
-            data.append(d)
+    # One batched quote refresh for the whole list
+    df = md.get_quotes(watchlist_items).dropna(subset=['price']).reset_index()
+    df['name'] = df['symbol']
     
-    if data:
-        df = pd.DataFrame(data)
-        st.caption(f"Prices updating... {datetime.now().strftime('%H:%M:%S')}")
+    if not df.empty:
+        # Oldest quote on the list decides the badge
+        st.caption(staleness_badge(df['as_of'].min()))
         
         for _, row in df.iterrows():
             with st.container():
@@ -880,7 +910,7 @@ def render_watchlist():
                 st.session_state[f"search_res_{current_id}"] = {}
                 
             if search_query and search_query != st.session_state.get(f"last_search_{current_id}", ""):
-                results = search_yahoo(search_query)
+                results = search_stocks(search_query)
                 if results:
                     st.session_state[f"search_res_{current_id}"] = {f"{r['symbol']} - {r['name']}": r['symbol'] for r in results}
                 else:
@@ -907,6 +937,13 @@ def render_watchlist():
                             st.error("Failed")
             
             st.divider()
+            if st.button("🤖 Screen Watchlist", key=f"screen_wl_{current_id}"):
+                with st.spinner("Scoring all stocks in this watchlist..."):
+                    items = db.get_watchlist_items(current_id)
+                    st.session_state[f"wl_screen_{current_id}"] = screen_symbols(tuple(items))
+            if f"wl_screen_{current_id}" in st.session_state:
+                display_screen_results(st.session_state[f"wl_screen_{current_id}"])
+            
             render_watchlist_data(current_id)
 
     with tabs[-1]:
@@ -942,35 +979,11 @@ def render_portfolio():
             current_id = pf_ids[name]
             
             portfolio_items = db.get_portfolio_holdings(current_id)
-            total_invested = 0
-            current_value = 0
-            portfolio_data = []
-            
-            for item in portfolio_items:
-                quote = get_stock_data(item['symbol'])
-                current_price = quote['price'] if quote else float(item['avg_price'])
-                
-                invested = item['quantity'] * float(item['avg_price'])
-                curr_val = item['quantity'] * current_price
-                pnl = curr_val - invested
-                pnl_pct = (pnl / invested) * 100 if invested else 0
-                
-                total_invested += invested
-                current_value += curr_val
-                
-                portfolio_data.append({
-                    'Symbol': item['symbol'],
-                    'Qty': item['quantity'],
-                    'Avg Price': float(item['avg_price']),
-                    'LTP': current_price,
-                    'Invested': invested,
-                    'Current': curr_val,
-                    'P&L': pnl,
-                    'P&L %': pnl_pct
-                })
-
-            total_pnl = current_value - total_invested
-            total_pnl_pct = (total_pnl / total_invested) * 100 if total_invested else 0
+            holdings = valuation.holdings_frame(portfolio_items)
+            valued = valuation.value_holdings(holdings, md.get_quotes(holdings['symbol']))
+            totals = valuation.portfolio_totals(valued)
+            current_value, total_invested = totals['current'], totals['invested']
+            total_pnl, total_pnl_pct = totals['pnl'], totals['pnl_pct']
 
             c1, c2, c3 = st.columns(3)
             c1.metric("Current Value", f"₹{current_value:,.2f}", delta=None)
@@ -979,49 +992,43 @@ def render_portfolio():
             
             st.divider()
 
-            subtab1, subtab2, subtab3 = st.tabs(["📊 Holdings", "➕ Add Transaction", "📜 History"])
+            subtab1, subtab2, subtab3, subtab4 = st.tabs(["📊 Holdings", "➕ Add Transaction", "📜 History", "📈 Performance"])
             
             with subtab1:
-                if portfolio_data:
-                    h1, h2, h3, h4, h5, h6, h7, h8, h9 = st.columns([1.5, 1, 1.2, 1.2, 1.2, 1.2, 1.2, 0.5, 0.5])
-                    h1.markdown("**Symbol**")
-                    h2.markdown("**Qty**")
-                    h3.markdown("**Avg Price**")
-                    h4.markdown("**LTP**")
-                    h5.markdown("**Invested**")
-                    h6.markdown("**Current**")
-                    h7.markdown("**P&L**")
-                    h8.markdown("")
-                    h9.markdown("")
+                if not valued.empty:
+                    # One table element for the whole portfolio instead of a column row per holding
+                    st.dataframe(
+                        valued.rename(columns={
+                            'symbol': 'Symbol', 'quantity': 'Qty', 'avg_price': 'Avg Price', 'ltp': 'LTP',
+                            'invested': 'Invested', 'current': 'Current', 'pnl': 'P&L', 'pnl_pct': 'P&L %',
+                            'day_change': 'Day Change'
+                        }).style.format({
+                            'Avg Price': '₹{:,.2f}', 'LTP': '₹{:,.2f}', 'Invested': '₹{:,.2f}',
+                            'Current': '₹{:,.2f}', 'P&L': '₹{:,.2f}', 'P&L %': '{:.2f}%', 'Day Change': '₹{:,.2f}'
+                        }).map(
+                            lambda v: f"color: {'green' if v >= 0 else 'red'}", subset=['P&L', 'P&L %', 'Day Change']
+                        ),
+                        use_container_width=True,
+                        hide_index=True
+                    )
                     
-                    st.divider()
+                    a1, a2, a3 = st.columns([3, 1, 1], vertical_alignment="bottom")
+                    selected = a1.selectbox("Holding", valued['symbol'], key=f"port_sel_{current_id}")
                     
-                    for item in portfolio_data:
-                        c1, c2, c3, c4, c5, c6, c7, c8, c9 = st.columns([1.5, 1, 1.2, 1.2, 1.2, 1.2, 1.2, 0.5, 0.5])
-                        
-                        c1.markdown(f"**{item['Symbol']}**")
-                        c2.write(f"{item['Qty']}")
-                        c3.write(f"₹{item['Avg Price']:,.2f}")
-                        c4.write(f"₹{item['LTP']:,.2f}")
-                        c5.write(f"₹{item['Invested']:,.2f}")
-                        c6.write(f"₹{item['Current']:,.2f}")
-                        
-                        pnl_color = "green" if item['P&L'] >= 0 else "red"
-                        c7.markdown(f":{pnl_color}[₹{item['P&L']:,.2f} ({item['P&L %']:.2f}%)]")
-                        
-                        if c8.button("🤖", key=f"ai_port_{current_id}_{item['Symbol']}", help="AI Insight"):
-                            with st.spinner("Analyzing..."):
-                                pred = ai.predict_signal(item['Symbol'])
-                                st.session_state[f"pred_port_{current_id}_{item['Symbol']}"] = pred
+                    if a2.button("🤖 AI Insight", key=f"ai_port_{current_id}"):
+                        with st.spinner("Analyzing..."):
+                            pred = ai.predict_signal(selected)
+                            st.session_state[f"pred_port_{current_id}_{selected}"] = pred
 
-                        if c9.button("🗑️", key=f"del_port_{current_id}_{item['Symbol']}", help="Delete from Portfolio"):
-                            db.update_portfolio_holding(current_id, item['Symbol'], 0, 0)
+                    if a3.button("🗑️ Remove", key=f"del_port_{current_id}", help="Delete from Portfolio"):
+                        ok, msg = db.remove_holding(current_id, selected)
+                        if ok:
                             st.rerun()
-                        
-                        if f"pred_port_{current_id}_{item['Symbol']}" in st.session_state:
-                            display_ai_insight(st.session_state[f"pred_port_{current_id}_{item['Symbol']}"])
-                        
-                        st.divider()
+                        else:
+                            st.error(msg)
+                    
+                    if f"pred_port_{current_id}_{selected}" in st.session_state:
+                        display_ai_insight(st.session_state[f"pred_port_{current_id}_{selected}"])
                 else:
                     st.info("Your portfolio is empty. Add a trade to get started!")
 
@@ -1034,7 +1041,7 @@ def render_portfolio():
                     st.session_state[f"trade_res_{current_id}"] = {}
                     
                 if search_q and search_q != st.session_state.get(f"last_trade_search_{current_id}", ""):
-                    res = search_yahoo(search_q)
+                    res = search_stocks(search_q)
                     if res:
                         st.session_state[f"trade_res_{current_id}"] = {f"{r['symbol']} - {r['name']}": r['symbol'] for r in res}
                     else:
@@ -1060,7 +1067,7 @@ def render_portfolio():
                     if trade_symbol:
                         q_data = get_stock_data(trade_symbol)
                         if q_data:
-                            current_ltp = q_data['price']
+                            current_ltp = q_data.price
                     
                     price = c3.number_input("Price (₹)", min_value=0.0, value=current_ltp, format="%.2f")
                     
@@ -1075,37 +1082,53 @@ def render_portfolio():
                         else:
                             dt = datetime.combine(date, time)
                             
-                            db.add_transaction(current_id, trade_symbol, action, qty, price, dt)
-                            
-                            current_holding = next((x for x in portfolio_items if x['symbol'] == trade_symbol), None)
-                            current_qty = current_holding['quantity'] if current_holding else 0
-                            current_avg = float(current_holding['avg_price']) if current_holding else 0.0
-                            
-                            if action == "BUY":
-                                new_qty = current_qty + qty
-                                if new_qty > 0:
-                                    new_avg = ((current_qty * current_avg) + (qty * price)) / new_qty
-                                else:
-                                    new_avg = 0
-                                db.update_portfolio_holding(current_id, trade_symbol, new_qty, new_avg)
-                                st.success(f"Bought {qty} {trade_symbol} at ₹{price}")
-                                
-                            elif action == "SELL":
-                                if current_qty >= qty:
-                                    new_qty = current_qty - qty
-                                    db.update_portfolio_holding(current_id, trade_symbol, new_qty, current_avg)
-                                    st.success(f"Sold {qty} {trade_symbol} at ₹{price}")
-                                else:
-                                    st.error(f"Insufficient Quantity! You only have {current_qty}.")
-                                    
-                            st.rerun()
+                            # Transaction + holding update as one atomic statement pair
+                            ok, msg = db.record_trade(current_id, trade_symbol, action, qty, price, dt)
+                            if ok:
+                                st.success(msg)
+                                st.rerun()
+                            else:
+                                st.error(msg)
+
+                with st.expander("📥 Import Tradebook (CSV / XLSX)"):
+                    st.caption("Upload your broker's tradebook or contract-note export. Columns such as symbol, trade type, quantity, price and trade date are detected automatically.")
+                    upload = st.file_uploader("Tradebook", type=["csv", "xlsx"], key=f"trade_upload_{current_id}")
+                    if upload is not None:
+                        try:
+                            parsed = trade_import.parse_tradebook(trade_import.read_file(upload, upload.name))
+                            valid, errors = trade_import.validate(parsed, current_id)
+                        except Exception as e:
+                            st.error(f"Could not read tradebook: {e}")
+                        else:
+                            st.write(f"{len(valid)} valid trade(s), {len(errors)} rejected")
+                            if not errors.empty:
+                                st.dataframe(errors, use_container_width=True)
+                            if not valid.empty:
+                                st.dataframe(valid.head(100), use_container_width=True)
+                                if st.button(f"Import {len(valid)} Trades", key=f"trade_import_{current_id}"):
+                                    with st.spinner("Importing..."):
+                                        ok, msg = trade_import.import_trades(current_id, valid)
+                                    if ok:
+                                        st.success(msg)
+                                        st.session_state[f"hist_cursors_{current_id}"] = [None]
+                                        st.rerun()
+                                    else:
+                                        st.error(msg)
 
             with subtab3:
                 st.subheader("Transaction History")
                 try:
-                    history = db.get_transactions(current_id)
+                    # Keyset paging: a stack of cursors, one per page visited
+                    cursor_key = f"hist_cursors_{current_id}"
+                    if cursor_key not in st.session_state:
+                        st.session_state[cursor_key] = [None]
+                    cursors = st.session_state[cursor_key]
+                    
+                    history, next_cursor = db.get_transactions_page(current_id, before=cursors[-1], page_size=50)
                     if history:
                         hdf = pd.DataFrame(history)
+                        hdf['date'] = pd.to_datetime(hdf['date'])
+                        hdf['price'] = hdf['price'].astype(float)
                         st.dataframe(
                             hdf[['date', 'symbol', 'type', 'quantity', 'price']].style.format({
                                 'price': '₹{:,.2f}',
@@ -1113,11 +1136,59 @@ def render_portfolio():
                             }),
                             use_container_width=True
                         )
+                        
+                        n1, n2, n3 = st.columns([1, 2, 1])
+                        if n1.button("◀ Newer", key=f"hist_newer_{current_id}", disabled=len(cursors) == 1):
+                            cursors.pop()
+                            st.rerun()
+                        n2.caption(f"Page {len(cursors)}")
+                        if n3.button("Older ▶", key=f"hist_older_{current_id}", disabled=next_cursor is None):
+                            cursors.append(next_cursor)
+                            st.rerun()
+                        
+                        def export_csv(pid=current_id):
+                            # Rows are streamed into a spooled file, which bounds memory only while the CSV
+                            # is written; st.download_button then reads the whole file into memory
+                            buf = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+                            text_buf = io.TextIOWrapper(buf, encoding="utf-8", newline="")
+                            db.export_transactions(pid, text_buf, format="csv")
+                            text_buf.flush()
+                            text_buf.detach()
+                            buf.seek(0)
+                            return buf
+                        
+                        st.download_button(
+                            "⬇️ Export Full History (CSV)",
+                            data=export_csv,
+                            file_name=f"transactions_{name}.csv",
+                            mime="text/csv",
+                            key=f"hist_export_{current_id}"
+                        )
                     else:
                         st.info("No transactions found.")
                 except Exception as e:
                     st.error(f"Error fetching history: {e}")
 
+            with subtab4:
+                try:
+                    curve = performance.equity_curve(current_id)
+                    if curve.empty:
+                        st.info("Record some trades to see performance.")
+                    else:
+                        perf = performance.summary(curve)
+                        m1, m2, m3 = st.columns(3)
+                        m1.metric("Time-Weighted Return", f"{perf['twr'] * 100:.2f}%")
+                        m2.metric("XIRR (annualized)", f"{perf['xirr'] * 100:.2f}%" if pd.notna(perf['xirr']) else "N/A")
+                        m3.metric("Net Invested", f"₹{perf['invested']:,.2f}")
+                        
+                        fig = go.Figure()
+                        fig.add_trace(go.Scatter(x=curve.index, y=curve['value'], name="Portfolio Value", line=dict(color='#00d4aa')))
+                        fig.add_trace(go.Scatter(x=curve.index, y=curve['invested'], name="Net Invested", line=dict(color='#888', dash='dash')))
+                        fig.update_layout(height=400, template="plotly_dark", margin=dict(l=0, r=0, t=30, b=0), hovermode="x unified")
+                        st.plotly_chart(fig, use_container_width=True)
+                except Exception as e:
+                    st.error(f"Error computing performance: {e}")
+
     with tabs[-1]:
         st.subheader("Create New Portfolio")
         with st.form("new_pf_form"):
@@ -0,0 +1,337 @@
+"""
+Compiled symbol master: the whole listings universe in one memory-mapped file.
+
+Layout (little-endian, every section 8-byte aligned):
+    MAGIC | uint64 header length | JSON header | sections
+
+  strings, string_offsets   interned string table, sorted, so string ids
+                            compare like the strings themselves
+  symbol, name, exch,       one uint32 string id per row (array-backed
+  isin, sector, name_norm   columns, no per-row Python objects); name_norm
+                            is the normalized name ('tata motors ltd')
+  name_chars                name length in characters per row (uint16), the
+                            rank_key tie-break; string offsets count bytes
+  symbol_ids/symbol_rows    rows sorted by exact symbol id
+  key_ids/key_rows          rows sorted by base-symbol key id ('reliance')
+  token_ids/token_offsets/  name token -> rows postings (CSR)
+  token_rows
+  gram_codes/gram_offsets/  trigram -> rows postings (CSR) for fuzzy search;
+  gram_rows                 NAME_STOPWORDS are left out of the trigram text
+
+Row arrays are uint16 when the universe has fewer than 65536 rows.
+A prefix query is two bisects over the string table (compared as raw UTF-8
+bytes, no decoding), giving a range of string ids, then np.searchsorted on
+the sorted id arrays; scoring is vectorized over the candidate rows and only
+the returned rows are decoded. Opening the file maps it read-only, so every
+worker process shares the same pages.
+
+Build with `python build_symbol_master.py`.
+"""
+import bisect
+import json
+import os
+import re
+
+import numpy as np
+
+SYMBOL_MASTER_BIN = os.getenv("SYMBOL_MASTER_BIN", os.path.join("data", "symbols.bin"))
+
+MAGIC = b"SYMMSTR3"
+COLUMNS = ("symbol", "name", "exch", "isin", "sector")
+# Company-name filler that would put most rows in the same trigram postings
+NAME_STOPWORDS = {"ltd", "limited", "the", "and", "co", "company", "corp", "corporation", "inc", "pvt", "private"}
+
+# Bound on candidates scored per query, so one-letter queries stay cheap
+MAX_SCAN = 200
+FUZZY_CUTOFF = 0.3
+
+EXCHANGE_SUFFIX = {"NSE": ".NS", "BSE": ".BO"}
+SUFFIX_EXCHANGE = {".NS": "NSE", ".BO": "BSE"}
+
+_GRAM_CHARS = " 0123456789abcdefghijklmnopqrstuvwxyz"
+_GRAM_CODE = {c: i for i, c in enumerate(_GRAM_CHARS)}
+
+
+def normalize(text):
+    return re.sub(r"[^a-z0-9]+", " ", str(text).lower()).strip()
+
+
+def base_symbol(symbol):
+    """'RELIANCE.NS' -> 'reliance' (search key without the exchange suffix)."""
+    return normalize(symbol.rsplit(".", 1)[0] if "." in symbol else symbol).replace(" ", "")
+
+
+def trigrams(text):
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def gram_text(key, name):
+    """Text indexed for fuzzy search: base symbol plus the normalized name without NAME_STOPWORDS."""
+    words = [w for w in normalize(name).split() if w not in NAME_STOPWORDS]
+    return " ".join([key, *words])
+
+
+def gram_code(gram):
+    a, b, c = (_GRAM_CODE[ch] for ch in gram)
+    return (a * 37 + b) * 37 + c
+
+
+def exchange_of(symbol):
+    """Exchange implied by a Yahoo suffix ('TCS.NS' -> 'NSE')."""
+    return SUFFIX_EXCHANGE.get(symbol[symbol.rfind("."):], "N/A") if "." in symbol else "N/A"
+
+
+def rank_key(score, entry):
+    """Sort key shared by every index: best score, then shortest name."""
+    return (-score, len(entry["name"]), entry["symbol"])
+
+
+def build(entries, path=SYMBOL_MASTER_BIN):
+    """Compile {symbol, name, exch, isin, sector} entries into `path`; returns row count."""
+    rows, seen = [], set()
+    for entry in entries:
+        symbol = str(entry.get("symbol") or "").strip().upper()
+        if not symbol or symbol in seen:
+            continue
+        seen.add(symbol)
+        rows.append({
+            "symbol": symbol,
+            "name": str(entry.get("name") or symbol).strip(),
+            "exch": str(entry.get("exch") or exchange_of(symbol)).strip(),
+            "isin": str(entry.get("isin") or "").strip(),
+            "sector": str(entry.get("sector") or "").strip(),
+        })
+
+    keys = [base_symbol(r["symbol"]) for r in rows]
+    names = [normalize(r["name"]) for r in rows]
+    tokens = [set(n.split()) for n in names]
+    strings = sorted({r[c] for r in rows for c in COLUMNS} | set(keys) | set(names) | set().union(*tokens))
+    ids = {s: i for i, s in enumerate(strings)}
+    encoded = [s.encode() for s in strings]
+    row_dtype = np.uint16 if len(rows) < 2 ** 16 else np.uint32
+
+    sections = {
+        "strings": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "string_offsets": np.concatenate([[0], np.cumsum([len(b) for b in encoded])]).astype(np.uint32),
+    }
+    for column in COLUMNS:
+        sections[column] = np.array([ids[r[column]] for r in rows], dtype=np.uint32)
+    sections["name_norm"] = np.array([ids[n] for n in names], dtype=np.uint32)
+    sections["name_chars"] = np.array([min(len(r["name"]), 2 ** 16 - 1) for r in rows], dtype=np.uint16)
+
+    def sorted_pairs(keys, row_ids):
+        keys, row_ids = np.asarray(keys, dtype=np.int64), np.asarray(row_ids, dtype=np.int64)
+        order = np.lexsort((row_ids, keys))
+        return keys[order], row_ids[order].astype(row_dtype)
+
+    def postings(keys, row_ids, key_dtype):
+        """CSR postings: sorted unique keys, offsets into rows, rows."""
+        keys, row_ids = sorted_pairs(keys, row_ids)
+        unique, starts = np.unique(keys, return_index=True)
+        return unique.astype(key_dtype), np.append(starts, len(keys)).astype(np.uint32), row_ids
+
+    sections["symbol_ids"], sections["symbol_rows"] = sorted_pairs(sections["symbol"], np.arange(len(rows)))
+    sections["symbol_ids"] = sections["symbol_ids"].astype(np.uint32)
+    sections["key_ids"], sections["key_rows"] = sorted_pairs([ids[k] for k in keys], np.arange(len(rows)))
+    sections["key_ids"] = sections["key_ids"].astype(np.uint32)
+
+    sections["token_ids"], sections["token_offsets"], sections["token_rows"] = postings(
+        [ids[t] for ts in tokens for t in ts], [i for i, ts in enumerate(tokens) for _ in ts], np.uint32)
+
+    grams = [{gram_code(g) for g in trigrams(gram_text(k, n))} for k, n in zip(keys, names)]
+    sections["gram_codes"], sections["gram_offsets"], sections["gram_rows"] = postings(
+        [c for gs in grams for c in gs], [i for i, gs in enumerate(grams) for _ in gs], np.uint16)
+
+    # Header offsets are relative to the end of the (padded) header
+    layout, offset = {}, 0
+    for name, array in sections.items():
+        layout[name] = [array.dtype.str, offset, len(array)]
+        offset += _aligned(array.nbytes)
+    header = json.dumps({"rows": len(rows), "strings": len(strings), "sections": layout}).encode()
+    header += b" " * (_aligned(len(MAGIC) + 8 + len(header)) - len(MAGIC) - 8 - len(header))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"  # per process: two workers may build at once
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for array in sections.values():
+            data = array.tobytes()
+            f.write(data + b"\0" * (_aligned(len(data)) - len(data)))
+    os.replace(tmp, path)  # atomic: running workers keep their old mapping
+    return len(rows)
+
+
+def _aligned(n):
+    return (n + 7) // 8 * 8
+
+
+class SymbolMaster:
+    """Read-only view over a compiled symbol master (see module docstring)."""
+
+    def __init__(self, path=SYMBOL_MASTER_BIN):
+        self.path = path
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a compiled symbol master")
+        size = int(buf[len(MAGIC):len(MAGIC) + 8].view(np.uint64)[0])
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(buf[start:start + size]))
+        base = start + size
+
+        self.rows = header["rows"]
+        # Plain ndarray views: slicing an np.memmap costs a Python-level __array_finalize__ per call
+        data = buf.view(np.ndarray)
+        for name, (dtype, offset, count) in header["sections"].items():
+            dtype = np.dtype(dtype)
+            lo = base + offset
+            setattr(self, "_" + name, data[lo:lo + count * dtype.itemsize].view(dtype))
+        self._all_strings = range(header["strings"])
+
+    def __len__(self):
+        return self.rows
+
+    # --- String table ---
+
+    def _bytes(self, i):
+        o = self._string_offsets
+        return self._strings[o[i]:o[i + 1]].tobytes()
+
+    def string(self, i):
+        return self._bytes(i).decode()
+
+    def _string_range(self, prefix):
+        """[lo, hi) of string ids starting with prefix (UTF-8 byte order is code point order)."""
+        prefix = prefix.encode()
+        lo = bisect.bisect_left(self._all_strings, prefix, key=self._bytes)
+        hi = bisect.bisect_left(self._all_strings, prefix + b"\xff", lo=lo, key=self._bytes)
+        return lo, hi
+
+    def _string_id(self, text):
+        lo, hi = self._string_range(text)
+        return lo if lo < hi and self._bytes(lo) == text.encode() else None
+
+    @staticmethod
+    def _rows_in(sorted_ids, rows, lo, hi):
+        a, b = np.searchsorted(sorted_ids, [lo, hi])
+        return rows[a:b]
+
+    @staticmethod
+    def _postings(keys, offsets, rows, lo, hi):
+        """Rows of every CSR key in [lo, hi); keys are sorted, so they are one slice."""
+        a, b = np.searchsorted(keys, [lo, hi])
+        return rows[offsets[a]:offsets[b]]
+
+    # --- Lookup ---
+
+    def entry(self, row):
+        return {column: self.string(getattr(self, "_" + column)[row]) for column in COLUMNS}
+
+    def get(self, symbol):
+        """Entry for an exact symbol ('RELIANCE.NS'), or None."""
+        i = self._string_id(symbol.strip().upper())
+        if i is None:
+            return None
+        rows = self._rows_in(self._symbol_ids, self._symbol_rows, i, i + 1)
+        return self.entry(int(rows[0])) if len(rows) else None
+
+    def scored(self, query, fuzzy=False, limit=None):
+        """
+        [(score, entry)] for query, scored like symbol_search.SymbolIndex.
+        With limit, only the best `limit` rows are decoded into entries.
+        """
+        q = normalize(query)
+        if not q or not self.rows:
+            return []
+        compact = q.replace(" ", "")
+        hits = []  # (rows, scores) arrays; a row keeps its best score
+
+        if fuzzy:
+            grams = trigrams(compact if len(q.split()) == 1 else q)
+            codes = np.array(sorted(gram_code(g) for g in grams), dtype=np.int64)
+            at = np.minimum(np.searchsorted(self._gram_codes, codes), len(self._gram_codes) - 1)
+            at = at[self._gram_codes[at] == codes]
+            if len(at):
+                postings = [self._gram_rows[self._gram_offsets[j]:self._gram_offsets[j + 1]] for j in at]
+                similarity = np.bincount(np.concatenate(postings), minlength=self.rows) / len(grams)
+                # Rows under the cutoff would be dropped anyway; ranking only the rest is much cheaper
+                rows = np.flatnonzero(similarity >= FUZZY_CUTOFF)
+                rows = rows[np.argsort(-similarity[rows], kind="stable")[:MAX_SCAN]]
+                hits.append((rows, 50 * similarity[rows]))
+        else:
+            exact = self._string_id(query.strip().upper())
+            if exact is not None:
+                rows = self._rows_in(self._symbol_ids, self._symbol_rows, exact, exact + 1)
+                hits.append((rows, np.full(len(rows), 100.0)))
+
+            lo, hi = self._string_range(compact)
+            a, b = np.searchsorted(self._key_ids, [lo, hi])
+            b = min(b, a + MAX_SCAN)
+            exact_key = lo if lo < hi and self._bytes(lo) == compact.encode() else -1
+            hits.append((self._key_rows[a:b], np.where(self._key_ids[a:b] == exact_key, 90.0, 80.0)))
+
+            # Every query token must prefix some token of the company name
+            matched = None
+            for token in q.split():
+                rows = self._postings(self._token_ids, self._token_offsets, self._token_rows,
+                                      *self._string_range(token))
+                if matched is None:
+                    matched = rows
+                else:
+                    # Membership masks over all rows: linear, unlike sorting both lists
+                    both = np.zeros(self.rows, dtype=bool)
+                    both[matched] = True
+                    hit = np.zeros(self.rows, dtype=bool)
+                    hit[rows] = True
+                    matched = np.flatnonzero(both & hit)
+                if not len(matched):
+                    break
+            if matched is not None:
+                matched = matched[:MAX_SCAN]
+                # Normalized names sort like strings, so "starts with q" is an id range
+                lo, hi = self._string_range(q)
+                name_ids = self._name_norm[matched]
+                hits.append((matched, np.where((name_ids >= lo) & (name_ids < hi), 70.0, 60.0)))
+
+        if not hits:
+            return []
+        rows = np.concatenate([r for r, _ in hits]).astype(np.int64)
+        values = np.concatenate([v for _, v in hits])
+        best = np.lexsort((-values, rows))
+        first = np.ones(len(best), dtype=bool)
+        first[1:] = rows[best][1:] != rows[best][:-1]
+        rows, values = rows[best][first], values[best][first]
+        if limit is not None and len(rows) > limit:
+            # Same order as rank_key: names are ranked by length, symbol ids sort like symbols
+            top = np.lexsort((self._symbol[rows], self._name_chars[rows], -values))[:limit]
+            rows, values = rows[top], values[top]
+        return [(float(value), self.entry(int(row))) for row, value in zip(rows, values)]
+
+    def search(self, query, limit=10, remote=None):
+        """
+        Best matches as [{symbol, name, exch, isin, sector}], most relevant
+        first. On a miss (no exact, prefix or token match) `remote(query)`'s
+        hits are returned if it has any; fuzzy matches only otherwise.
+        """
+        hits = self.scored(query, limit=limit)
+        if not hits and remote is not None:
+            found = remote(query) or []
+            if found:
+                return found[:limit]
+        hits = hits or self.scored(query, fuzzy=True, limit=limit)
+        return [entry for _, entry in sorted(hits, key=lambda h: rank_key(*h))[:limit]]
+
+
+def open_master(path=SYMBOL_MASTER_BIN):
+    """Map the compiled master at path, or None when it has not been built."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return SymbolMaster(path)
+    except Exception as e:
+        print(f"Symbol master open failed: {e}")
+        return None
@@ -0,0 +1,248 @@
+"""
+Local symbol search over the symbol master.
+
+The full listings universe comes from the compiled, memory-mapped master
+(symbol_master, SYMBOL_MASTER_BIN). When it has not been built, the listings
+file at SYMBOL_MASTER_PATH (NSE/BSE exports: SYMBOL / NAME OF COMPANY style
+columns) is compiled into it on first start; only if that fails is the CSV
+indexed in memory instead. A small in-memory SymbolIndex on top holds
+nifty_stocks.STOCKS and remote hits. Prefix, token and fuzzy queries on
+symbol and company name are answered locally; a query with no exact, prefix
+or token match is a miss and goes to the remote search, whose hits are
+merged back so the next query is local. Fuzzy (trigram) matches are only
+served when the remote search has nothing.
+"""
+import bisect
+import heapq
+import os
+import threading
+from collections import Counter
+
+import pandas as pd
+
+import nifty_stocks
+import symbol_master
+from symbol_master import (
+    EXCHANGE_SUFFIX, FUZZY_CUTOFF, MAX_SCAN, base_symbol, exchange_of, gram_text, normalize, rank_key, trigrams,
+)
+
+SYMBOL_MASTER_PATH = os.getenv("SYMBOL_MASTER_PATH", os.path.join("data", "symbols.csv"))
+
+
+class SymbolIndex:
+    def __init__(self, entries=()):
+        self.symbols = []
+        self.names = []
+        self.exchanges = []
+        self._by_symbol = {}
+        self._symbol_keys = []   # sorted (base symbol, id)
+        self._token_keys = []    # sorted (name token, id)
+        self._trigrams = {}      # trigram -> [id]
+        self._lock = threading.Lock()
+        self.add(entries)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def add(self, entries):
+        """Add {symbol, name, exch} entries; symbols already indexed are skipped."""
+        with self._lock:
+            added = 0
+            symbol_keys, token_keys = [], []
+            for entry in entries:
+                symbol = str(entry["symbol"]).strip().upper()
+                if not symbol or symbol in self._by_symbol:
+                    continue
+                name = str(entry.get("name") or symbol).strip()
+                exch = entry.get("exch") or exchange_of(symbol)
+                i = len(self.symbols)
+                self.symbols.append(symbol)
+                self.names.append(name)
+                self.exchanges.append(exch)
+                self._by_symbol[symbol] = i
+
+                base = base_symbol(symbol)
+                symbol_keys.append((base, i))
+                token_keys.extend((token, i) for token in set(normalize(name).split()))
+                for gram in trigrams(gram_text(base, name)):
+                    self._trigrams.setdefault(gram, []).append(i)
+                added += 1
+            # One sort per batch instead of an insort per entry
+            if added:
+                self._symbol_keys = sorted(self._symbol_keys + symbol_keys)
+                self._token_keys = sorted(self._token_keys + token_keys)
+            return added
+
+    def _entry(self, i):
+        return {"symbol": self.symbols[i], "name": self.names[i], "exch": self.exchanges[i]}
+
+    def get(self, symbol):
+        """Entry for an exact symbol ('RELIANCE.NS'), or None."""
+        i = self._by_symbol.get(symbol.strip().upper())
+        return None if i is None else self._entry(i)
+
+    @staticmethod
+    def _prefix_ids(keys, prefix):
+        ids = []
+        start = bisect.bisect_left(keys, (prefix,))
+        # Bounded slice: slicing to the end would copy the rest of the list on every query
+        for key, i in keys[start:start + MAX_SCAN]:
+            if not key.startswith(prefix):
+                break
+            ids.append(i)
+        return ids
+
+    def scored(self, query, fuzzy=False, limit=None):
+        """[(score, entry)] for query (best `limit` only); fuzzy=True runs only the trigram pass."""
+        q = normalize(query)
+        if not q:
+            return []
+        compact = q.replace(" ", "")
+        tokens = q.split()
+        scores = {}
+
+        def score(i, value):
+            if value > scores.get(i, 0):
+                scores[i] = value
+
+        if fuzzy:
+            # Trigram overlap (typos, missing letters)
+            grams = trigrams(compact if len(tokens) == 1 else q)
+            hits = Counter()
+            for gram in grams:
+                hits.update(self._trigrams.get(gram, ()))
+            # Rank only the ids over the cutoff (same top MAX_SCAN as most_common, far fewer to heap)
+            close = [(i, shared / len(grams)) for i, shared in hits.items() if shared / len(grams) >= FUZZY_CUTOFF]
+            for i, similarity in heapq.nlargest(MAX_SCAN, close, key=lambda hit: hit[1]):
+                score(i, 50 * similarity)
+        else:
+            # Exact and prefix matches on the symbol
+            exact = self._by_symbol.get(query.strip().upper())
+            if exact is not None:
+                score(exact, 100)
+            for i in self._prefix_ids(self._symbol_keys, compact):
+                score(i, 90 if base_symbol(self.symbols[i]) == compact else 80)
+
+            # Every query token must prefix some token of the company name
+            matched = None
+            for token in tokens:
+                ids = set(self._prefix_ids(self._token_keys, token))
+                matched = ids if matched is None else matched & ids
+                if not matched:
+                    break
+            for i in matched or ():
+                score(i, 70 if normalize(self.names[i]).startswith(q) else 60)
+
+        hits = [(value, self._entry(i)) for i, value in scores.items()]
+        return hits if limit is None else sorted(hits, key=lambda h: rank_key(*h))[:limit]
+
+    def search(self, query, limit=10, remote=None):
+        """
+        Best matches as [{symbol, name, exch}], most relevant first. On a miss
+        (no exact, prefix or token match) `remote(query)` is consulted and its
+        hits are added; fuzzy matches are served only when it has none.
+        """
+        hits = self.scored(query)
+        if not hits and remote is not None:
+            found = remote(query) or []
+            if found:
+                self.add(found)
+                return found[:limit]
+        return _rank(hits or self.scored(query, fuzzy=True), limit)
+
+
+def _rank(hits, limit):
+    """Entries from [(score, entry)], best first, one per symbol."""
+    ranked, seen = [], set()
+    for _, entry in sorted(hits, key=lambda h: rank_key(*h)):
+        if entry["symbol"] not in seen:
+            seen.add(entry["symbol"])
+            ranked.append(entry)
+    return ranked[:limit]
+
+
+def load_master(path=SYMBOL_MASTER_PATH):
+    """Entries from an NSE/BSE listings CSV (missing file -> [])."""
+    if not path or not os.path.exists(path):
+        return []
+    try:
+        df = pd.read_csv(path, dtype=str)
+    except Exception as e:
+        print(f"Symbol master load failed: {e}")
+        return []
+    cols = {normalize(c).replace(" ", ""): c for c in df.columns}
+    symbol = cols.get("symbol") or cols.get("tradingsymbol") or cols.get("securityid")
+    name = cols.get("nameofcompany") or cols.get("name") or cols.get("companyname") or cols.get("securityname")
+    exch = cols.get("exchange") or cols.get("exch")
+    isin = cols.get("isinnumber") or cols.get("isinno") or cols.get("isin")
+    sector = cols.get("industry") or cols.get("sector")
+    if symbol is None:
+        print(f"Symbol master {path} has no symbol column")
+        return []
+
+    entries = []
+    for values in df.fillna("").to_dict("records"):
+        sym = values[symbol].strip().upper()
+        if not sym:
+            continue
+        exchange = (values[exch].strip().upper() if exch else "") or "NSE"
+        if "." not in sym:
+            sym += EXCHANGE_SUFFIX.get(exchange, ".NS")
+        entries.append({
+            "symbol": sym,
+            "name": (values[name].strip() if name else "") or sym,
+            "exch": exchange,
+            "isin": values[isin].strip() if isin else "",
+            "sector": values[sector].strip() if sector else "",
+        })
+    return entries
+
+
+def open_master(csv_path=SYMBOL_MASTER_PATH, bin_path=symbol_master.SYMBOL_MASTER_BIN):
+    """
+    The compiled master at bin_path. When it is missing (or has an older
+    layout) and the listings CSV exists, the CSV is compiled to bin_path
+    first. None without either, or if the build fails.
+    """
+    master = symbol_master.open_master(bin_path)
+    if master is not None or not csv_path or not os.path.exists(csv_path):
+        return master
+    try:
+        symbol_master.build([*nifty_stocks.STOCKS, *load_master(csv_path)], bin_path)
+    except OSError as e:
+        print(f"Symbol master build failed: {e}")
+        return None
+    return symbol_master.open_master(bin_path)
+
+
+# Compiled master (built from the listings CSV if needed); the CSV is only
+# indexed in memory when it could not be compiled
+master = open_master()
+index = SymbolIndex(nifty_stocks.STOCKS)
+if master is None:
+    index.add(load_master())
+
+
+def lookup(symbol):
+    """Entry for an exact symbol from the compiled master or the in-memory index, or None."""
+    entry = master.get(symbol) if master is not None else None
+    return entry or index.get(symbol)
+
+
+def search(query, limit=10, remote=None):
+    """
+    Local search (compiled master + in-memory index). On a miss (no exact,
+    prefix or token match) `remote(query)` (returning [{symbol, name, exch}])
+    is consulted once and its hits are merged into the in-memory index; the
+    local fuzzy matches are served only when it finds nothing.
+    """
+    sources = [index] if master is None else [master, index]
+    hits = [hit for source in sources for hit in source.scored(query, limit=limit)]
+    if hits:
+        return _rank(hits, limit)
+    if remote is not None:
+        found = remote(query) or []
+        if found:
+            index.add(found)
+            return found[:limit]
+    return _rank([hit for source in sources for hit in source.scored(query, fuzzy=True, limit=limit)], limit)
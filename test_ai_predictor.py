@@ -0,0 +1,48 @@
+"""
+AI predictor feature tests (no network; synthetic history).
+Run: python test_ai_predictor.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+
+import ai_predictor as ai
+
+
+def make_history(days=600):
+    rng = np.random.default_rng(7)
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days, tz="Asia/Kolkata")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    return pd.DataFrame({
+        "Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+        "Volume": rng.integers(1e5, 1e6, days).astype(float),
+    }, index=idx)
+
+
+def test_features_do_not_depend_on_history_start():
+    df = make_history()
+    # Same bars, windows starting 150 sessions apart (as a sliding 2y window or a disk cache gives)
+    full = ai.build_features("FULL.TEST", df)
+    late = ai.build_features("LATE.TEST", df.iloc[150:])
+    common = late.index[late.index.isin(full.index)][-200:]
+    np.testing.assert_allclose(late.loc[common, "OBV_Flow"], full.loc[common, "OBV_Flow"])
+    assert "OBV" not in ai.FEATURES
+
+
+def test_zero_volume_history_keeps_its_rows():
+    df = make_history().assign(Volume=0.0)  # indices report no volume
+    features = ai.build_features("INDEX.TEST", df)
+    assert len(features) > 300
+    assert (features["OBV_Flow"] == 0).all()
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("AI PREDICTOR TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
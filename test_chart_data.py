@@ -0,0 +1,134 @@
+"""
+Chart payload tests: LTTB against a textbook one-bucket-at-a-time version,
+and candle aggregation against per-period OHLC computed by hand (no network;
+bars come from a FixtureFetcher).
+Run: python test_chart_data.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import math
+
+import numpy as np
+import pandas as pd
+
+import chart_data
+import market_data as md
+
+
+def make_bars(days=400, seed=5, end="2024-06-28"):
+    idx = pd.bdate_range(end=pd.Timestamp(end), periods=days, tz="Asia/Kolkata")
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    open_ = close * (1 + rng.normal(0, 0.005, days))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * 1.01,
+        "Low": np.minimum(open_, close) * 0.99,
+        "Close": close,
+        "Volume": rng.integers(1_000, 10_000, days).astype(float),
+    }, index=idx)
+
+
+def reference_lttb(x, y, threshold):
+    """Steinarsson's LTTB, one bucket at a time."""
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    keep, a = [0], 0
+    for i in range(threshold - 2):
+        next_start = math.floor((i + 1) * every) + 1
+        next_end = min(math.floor((i + 2) * every) + 1, n)
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = None, -1.0
+        for j in range(math.floor(i * every) + 1, next_start):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    return keep + [n - 1]
+
+
+def test_lttb_matches_reference_and_keeps_endpoints():
+    rng = np.random.default_rng(1)
+    for n, threshold in [(10, 3), (1000, 97), (1001, 500), (5000, 1200)]:
+        x = np.arange(n, dtype=float)
+        y = np.cumsum(rng.normal(0, 1, n))
+        keep = chart_data.lttb(x, y, threshold)
+        assert len(keep) == threshold and keep[0] == 0 and keep[-1] == n - 1
+        assert (np.diff(keep) > 0).all()
+        assert keep.tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+
+    # Nothing to reduce: every position comes back
+    assert chart_data.lttb(np.arange(5), np.ones(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_downsample_keeps_the_extremes():
+    bars = make_bars()
+    close = bars["Close"]
+    reduced = chart_data.downsample(close, 60)
+    assert len(reduced) == 60
+    assert reduced.index[0] == close.index[0] and reduced.index[-1] == close.index[-1]
+    assert close.idxmax() in reduced.index and close.idxmin() in reduced.index
+
+    # Warm-up NaNs (e.g. a moving average) are dropped before reducing
+    ma = close.rolling(20).mean()
+    assert chart_data.downsample(ma, 1000).equals(ma.dropna())
+
+
+def test_weekly_candles_aggregate_each_week():
+    bars = make_bars(days=60)
+    weekly = chart_data.resample_ohlc(bars, "W")
+    weeks = bars.index.tz_localize(None).to_period("W")
+    assert len(weekly) == weeks.nunique()
+
+    for label, row in weekly.iterrows():
+        week = bars[weeks == label.tz_localize(None).to_period("W")]
+        assert label == week.index[0]  # labelled with the period's first bar
+        assert row["Open"] == week["Open"].iloc[0] and row["Close"] == week["Close"].iloc[-1]
+        assert row["High"] == week["High"].max() and row["Low"] == week["Low"].min()
+        assert row["Volume"] == week["Volume"].sum()
+
+
+def test_fit_candles_picks_the_finest_rule_in_budget():
+    bars = make_bars(days=400)
+    fitted, label = chart_data.fit_candles(bars, 400)
+    assert fitted is bars and label is None
+
+    fitted, label = chart_data.fit_candles(bars, 100)
+    assert label == "Weekly" and len(fitted) <= 100
+    fitted, label = chart_data.fit_candles(bars, 30)
+    assert label == "Monthly" and len(fitted) <= 30
+    # Past the coarsest rule the yearly bars are returned whatever the budget
+    fitted, label = chart_data.fit_candles(bars, 1)
+    assert label == "Yearly" and len(fitted) == 3  # Dec 2022 - Jun 2024
+
+
+def test_cached_payload_follows_the_last_close():
+    chart_data.clear()
+    bars = make_bars(end=pd.Timestamp.now().normalize())
+    md.set_fetcher(md.FixtureFetcher({"AAA.NS": bars}))
+    first = chart_data.candles("AAA.NS", "2y", width=300)
+    assert first["source_bars"] == len(bars) and first["label"] == "Weekly"
+    assert chart_data.candles("AAA.NS", "2y", width=300) is first
+
+    # The same history at another width is a separate payload
+    assert chart_data.candles("AAA.NS", "2y", width=1500)["label"] is None
+
+    # An intraday update moves the last close: same length and last bar, new payload
+    updated = bars.copy()
+    updated.iloc[-1, updated.columns.get_loc("Close")] += 1.0
+    key = ("candles", "AAA.NS", "2y", "1d", 300)
+    again = chart_data._cached(key, updated, lambda d: chart_data.prepare_candles(d, 300))
+    assert again is not first and again["bars"]["Close"].iloc[-1] == updated["Close"].iloc[-1]
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("CHART DATA TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
@@ -0,0 +1,80 @@
+"""
+Holding upsert tests against a temporary SQLite file (the default database).
+Run: python test_holdings.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime, timedelta
+
+import database as db
+import ledger
+from testutil import fresh_db
+
+
+def test_weighted_average_with_whole_rupee_prices():
+    fresh_db()
+    now = datetime(2024, 3, 5, 10)
+    assert db.record_trade(1, "TCS.NS", "BUY", 1, 2500.0, now)[0]
+    assert db.record_trade(1, "TCS.NS", "BUY", 2, 2601.0, now + timedelta(minutes=1))[0]
+    holding = db.get_portfolio_holdings(1)[0]
+    assert holding["quantity"] == 3
+    assert abs(float(holding["avg_price"]) - (2500 + 2 * 2601) / 3) < 0.01
+
+
+def test_unit_lots_match_ledger():
+    fresh_db()
+    start = datetime(2024, 1, 1)
+    for i, price in enumerate(range(10, 130)):
+        assert db.record_trade(1, "ITC.NS", "BUY", 1, float(price), start + timedelta(days=i))[0]
+    holding = db.get_portfolio_holdings(1)[0]
+    assert abs(float(holding["avg_price"]) - 69.5) < 0.01
+    assert (ledger.reconcile(1)["status"] == "ok").all()
+
+
+def test_history_page_is_cached_until_a_trade_is_recorded():
+    fresh_db()
+    now = datetime(2024, 3, 5, 10)
+    assert db.record_trade(1, "TCS.NS", "BUY", 1, 2500.0, now)[0]
+    rows, cursor = db.get_transactions_page(1, page_size=1)
+    assert len(rows) == 1 and cursor is None
+
+    hits = db.cache_stats()["hits"]
+    assert db.get_transactions_page(1, page_size=1)[0] == rows
+    assert db.cache_stats()["hits"] == hits + 1
+
+    assert db.record_trade(1, "TCS.NS", "BUY", 1, 2600.0, now + timedelta(minutes=1))[0]
+    rows, cursor = db.get_transactions_page(1, page_size=1)
+    assert rows[0]["price"] == 2600.0 and cursor is not None
+    older, cursor = db.get_transactions_page(1, before=cursor, page_size=1)
+    assert older[0]["price"] == 2500.0 and cursor is None
+
+
+def test_invalidation_frees_cached_pages():
+    fresh_db()
+    start = datetime(2024, 3, 5, 10)
+    for i in range(5):
+        assert db.record_trade(1, "TCS.NS", "BUY", 1, 2500.0 + i, start + timedelta(minutes=i))[0]
+        # Page through the whole history after every write: one entry per cursor
+        cursor = None
+        while True:
+            rows, cursor = db.get_transactions_page(1, before=cursor, page_size=1)
+            if cursor is None:
+                break
+        db.get_portfolio_holdings(1)
+    # Only the pages of the latest version are held, not those of every earlier one
+    assert db.cache_stats()["entries"] == 5 + 1
+
+    db.add_transaction(1, "TCS.NS", "SELL", 1, 2600.0, start + timedelta(hours=1))
+    assert db.cache_stats()["entries"] == 1  # the holdings entry
+    assert not any(key[0] == "transactions" for key in db._cache)
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("HOLDINGS TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
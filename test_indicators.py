@@ -0,0 +1,102 @@
+"""
+Indicator engine tests: batch and incremental values must match the `ta`
+calls predict_signal used before (no network; bars are synthetic).
+Run: python test_indicators.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+import ta
+
+import indicators
+
+
+def make_bars(n, seed=7):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp("2024-06-28"), periods=n, tz="Asia/Kolkata")
+    close = 1000 + rng.standard_normal(n).cumsum() * 10
+    return pd.DataFrame({
+        'Open': close,
+        'High': close + rng.random(n) * 10,
+        'Low': close - rng.random(n) * 10,
+        'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, n).astype(float),
+    }, index=idx)
+
+
+def ta_indicators(df):
+    """The feature block predict_signal used before the indicator engine."""
+    out = pd.DataFrame(index=df.index)
+    out['SMA_50'] = ta.trend.sma_indicator(df['Close'], window=50)
+    out['SMA_200'] = ta.trend.sma_indicator(df['Close'], window=200)
+    out['EMA_20'] = ta.trend.ema_indicator(df['Close'], window=20)
+    out['MACD'] = ta.trend.macd(df['Close'])
+    out['MACD_Signal'] = ta.trend.macd_signal(df['Close'])
+    out['RSI'] = ta.momentum.rsi(df['Close'], window=14)
+    out['Stoch_K'] = ta.momentum.stoch(df['High'], df['Low'], df['Close'], window=14, smooth_window=3)
+    out['BB_Upper'] = ta.volatility.bollinger_hband(df['Close'], window=20, window_dev=2)
+    out['BB_Lower'] = ta.volatility.bollinger_lband(df['Close'], window=20, window_dev=2)
+    out['ATR'] = ta.volatility.average_true_range(df['High'], df['Low'], df['Close'], window=14)
+    out['OBV'] = ta.volume.on_balance_volume(df['Close'], df['Volume'])
+    return out
+
+
+def assert_matches_ta(got, df):
+    want = ta_indicators(df)
+    for col in indicators.COLUMNS:
+        a, b = got[col].to_numpy(dtype=np.float64), want[col].to_numpy(dtype=np.float64)
+        assert (np.isnan(a) == np.isnan(b)).all(), f"NaN layout differs for {col}"
+        mask = ~np.isnan(b)
+        assert np.allclose(a[mask], b[mask], rtol=1e-9, atol=1e-6), col
+
+
+def test_batch_matches_ta():
+    for n in (30, 250):  # shorter and longer than the slowest window
+        df = make_bars(n)
+        assert_matches_ta(indicators.compute_indicators(df), df)
+
+
+def test_incremental_updates_match_ta():
+    bars = make_bars(300)
+    engine = indicators.IndicatorEngine()
+    for end in range(260, 301):  # a cold start, then one new bar per call
+        df = bars.iloc[:end]
+        assert_matches_ta(engine.update("AAA.NS", df), df)
+    assert engine._symbols["AAA.NS"]["committed_ts"] == bars.index[-2]
+
+
+def test_live_bar_revisions_are_not_committed():
+    bars = make_bars(260)
+    engine = indicators.IndicatorEngine()
+    engine.update("AAA.NS", bars)
+    state = engine._symbols["AAA.NS"]["state"]
+    for bump in (5.0, -12.0, 3.0):  # the last bar ticks intraday
+        live = bars.copy()
+        live.iloc[-1, live.columns.get_loc('Close')] += bump
+        live.iloc[-1, live.columns.get_loc('High')] += max(bump, 0.0)
+        live.iloc[-1, live.columns.get_loc('Low')] += min(bump, 0.0)
+        assert_matches_ta(engine.update("AAA.NS", live), live)
+    assert engine._symbols["AAA.NS"]["state"] is state and state.n == len(bars) - 1
+
+
+def test_rewritten_history_rebuilds():
+    bars = make_bars(260)
+    engine = indicators.IndicatorEngine()
+    engine.update("AAA.NS", bars)
+
+    # A dividend adjustment rescales every close before the committed bar
+    adjusted = bars.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] *= 0.98
+    assert_matches_ta(engine.update("AAA.NS", adjusted), adjusted)
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("INDICATOR TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
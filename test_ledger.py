@@ -0,0 +1,105 @@
+"""
+Ledger replay tests: average-cost and FIFO results on hand-worked histories
+(no database; transactions are built as DataFrames).
+Run: python test_ledger.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+
+import ledger
+
+
+def tx(*rows):
+    return pd.DataFrame(rows, columns=["symbol", "type", "quantity", "price"])
+
+
+def close(a, b):
+    return abs(a - b) < 1e-9
+
+
+def test_sell_consumes_fifo_lots_partially():
+    result = ledger.replay(tx(
+        ("AAA.NS", "BUY", 10, 100.0),
+        ("AAA.NS", "BUY", 10, 200.0),
+        ("AAA.NS", "SELL", 15, 300.0),   # the whole first lot and half of the second
+        ("AAA.NS", "SELL", 2, 250.0),    # from what is left of the second lot
+    )).loc["AAA.NS"]
+    assert result["quantity"] == 3 and result["oversold"] == 0
+
+    # Average cost: 150 throughout
+    assert close(result["avg_cost"], 150.0) and close(result["cost_basis"], 450.0)
+    assert close(result["realized_pnl"], 15 * 150.0 + 2 * 100.0)
+
+    # FIFO: 10@100 + 5@200 go first, then 2@200; 3@200 remain
+    assert close(result["fifo_realized_pnl"], (4500.0 - 2000.0) + (500.0 - 400.0))
+    assert close(result["fifo_avg_cost"], 200.0) and close(result["fifo_cost_basis"], 600.0)
+
+
+def test_oversell_is_flagged():
+    result = ledger.replay(tx(
+        ("AAA.NS", "BUY", 5, 100.0),
+        ("AAA.NS", "SELL", 8, 120.0),
+        ("BBB.NS", "BUY", 1, 50.0),
+    ))
+    assert result.loc["AAA.NS", "oversold"] == 1 and result.loc["AAA.NS", "quantity"] == -3
+    assert result.loc["AAA.NS", "cost_basis"] == 0.0 and result.loc["AAA.NS", "fifo_cost_basis"] == 0.0
+    assert result.loc["BBB.NS", "oversold"] == 0
+
+
+def test_closed_position_resets_the_average():
+    result = ledger.replay(tx(
+        ("AAA.NS", "BUY", 10, 100.0),
+        ("AAA.NS", "SELL", 10, 150.0),
+        ("AAA.NS", "BUY", 4, 200.0),    # a new episode: nothing carries over from the first
+        ("AAA.NS", "SELL", 1, 210.0),
+    )).loc["AAA.NS"]
+    assert result["quantity"] == 3
+    assert close(result["avg_cost"], 200.0) and close(result["fifo_avg_cost"], 200.0)
+    assert close(result["realized_pnl"], 500.0 + 10.0)
+    assert close(result["fifo_realized_pnl"], 500.0 + 10.0)
+
+    # Flat at the end: no quantity, no cost left behind
+    flat = ledger.replay(tx(("AAA.NS", "BUY", 3, 10.0), ("AAA.NS", "SELL", 3, 12.0))).loc["AAA.NS"]
+    assert flat["quantity"] == 0
+    assert flat["avg_cost"] == flat["cost_basis"] == flat["fifo_avg_cost"] == flat["fifo_cost_basis"] == 0.0
+
+
+def test_long_history_survives_rebasing():
+    # Thousands of small partial sells decay the running sell ratio past
+    # e^-LOG_BLOCK, so the average-cost scan is rebased several times
+    rows = [("AAA.NS", "BUY", 1_000_000, 10.0)]
+    qty, avg, realized = 1_000_000, 10.0, 0.0
+    rng = np.random.default_rng(11)
+    for i in range(3000):
+        if i % 3 == 0:
+            q, p = int(rng.integers(1, 50_000)), float(rng.uniform(5, 15))
+            rows.append(("AAA.NS", "BUY", q, p))
+            avg = (qty * avg + q * p) / (qty + q)
+            qty += q
+        else:
+            q, p = max(1, qty // 4), float(rng.uniform(5, 15))
+            rows.append(("AAA.NS", "SELL", q, p))
+            realized += q * (p - avg)
+            qty -= q
+    result = ledger.replay(tx(*rows)).loc["AAA.NS"]
+    assert result["quantity"] == qty
+    assert abs(result["avg_cost"] - avg) < 1e-6 * avg
+    assert abs(result["realized_pnl"] - realized) < 1e-6 * abs(realized)
+
+
+def test_empty_history():
+    result = ledger.replay(tx())
+    assert result.empty and "fifo_avg_cost" in result.columns
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("LEDGER TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
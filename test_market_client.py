@@ -0,0 +1,181 @@
+"""
+Market client tests against the local FakeMarketServer (no network):
+coalescing of identical in-flight requests, retries on 503/timeouts, and
+parse_chart matching yfinance's Ticker.history shape.
+Run: python test_market_client.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import asyncio
+
+import pandas as pd
+
+from fake_market_server import FakeMarketServer
+from market_client import MarketDataClient, MarketDataError, parse_chart
+
+CHART = "/v8/finance/chart/TCS.NS"
+
+
+def serve(**kwargs):
+    server = FakeMarketServer(**kwargs).start()
+    return server, MarketDataClient(base_url=server.url, backoff=0.01)
+
+
+def shutdown(server, client):
+    client.close()
+    server.stop()
+
+
+def test_identical_requests_share_one_upstream_call():
+    server, client = serve(latency=0.3)
+    try:
+        async def burst():
+            return await asyncio.gather(*(client.history("TCS.NS") for _ in range(5)),
+                                        *(client.search("tata") for _ in range(3)))
+
+        results = client.run(burst())
+        assert server.hits[CHART] == 1 and server.hits["/v1/finance/search"] == 1
+        assert client.stats["coalesced"] == 6
+        frames = results[:5]
+        assert all(df.equals(frames[0]) for df in frames) and len({id(df) for df in frames}) == 5
+
+        # Nothing in flight any more: the next call goes upstream again
+        client.history_sync("TCS.NS")
+        assert server.hits[CHART] == 2
+    finally:
+        shutdown(server, client)
+
+
+def test_503s_are_retried():
+    server, client = serve(fail_next=2)
+    client.retries = 3
+    try:
+        assert not client.history_sync("TCS.NS").empty
+        assert server.hits[CHART] == 3 and client.stats["retries"] == 2
+    finally:
+        shutdown(server, client)
+
+
+def test_error_once_retries_run_out():
+    server, client = serve(fail_rate=1.0)
+    client.retries = 2
+    try:
+        try:
+            client.history_sync("TCS.NS")
+            assert False, "expected MarketDataError"
+        except MarketDataError as e:
+            assert "after 3 attempts" in str(e) and "503" in str(e)
+        assert server.hits[CHART] == 3 and client.stats["failures"] == 1
+
+        # Other 4xx are not retried
+        server.fail_rate = 0.0
+        try:
+            client.run(client.get_json("/nowhere"))
+            assert False, "expected MarketDataError"
+        except MarketDataError:
+            pass
+        assert server.hits["/nowhere"] == 1
+    finally:
+        shutdown(server, client)
+
+
+def test_timeouts_are_retried_then_raise():
+    server, client = serve(latency=0.5)
+    client.timeout, client.retries = 0.1, 1
+    try:
+        try:
+            client.history_sync("TCS.NS")
+            assert False, "expected MarketDataError"
+        except MarketDataError as e:
+            assert "after 2 attempts" in str(e)
+        assert server.hits[CHART] == 2
+    finally:
+        shutdown(server, client)
+
+
+def test_start_returns_bars_from_start_on():
+    server, client = serve()
+    try:
+        full = client.history_sync("TCS.NS")
+        tail = client.history_sync("TCS.NS", start=full.index[-10])
+        pd.testing.assert_frame_equal(tail, full.iloc[-10:])
+    finally:
+        shutdown(server, client)
+
+
+def test_max_history_is_an_explicit_window():
+    # yfinance never sends range=max: Yahoo can answer it with coarser bars than asked for
+    server, client = serve()
+    try:
+        assert not client.history_sync("TCS.NS").empty
+        client.history_sync("TCS.NS", interval="5m")
+        (_, daily), (_, intraday) = server.queries
+        assert "range" not in daily and "range" not in intraday
+        assert int(daily["period2"]) - int(daily["period1"]) == 3122064000
+        assert int(intraday["period2"]) - int(intraday["period1"]) == 5184000
+    finally:
+        shutdown(server, client)
+
+
+def ist(day, time="09:15"):
+    return int(pd.Timestamp(f"{day} {time}", tz="Asia/Kolkata").timestamp())
+
+
+def chart(timestamps, close, adjclose=None, events=None):
+    result = {
+        "meta": {"exchangeTimezoneName": "Asia/Kolkata"},
+        "timestamp": timestamps,
+        "indicators": {"quote": [{"open": [c and c - 1 for c in close], "high": [c and c + 2 for c in close],
+                                  "low": [c and c - 2 for c in close], "close": close,
+                                  "volume": [1000] * len(close)}]},
+    }
+    if adjclose is not None:
+        result["indicators"]["adjclose"] = [{"adjclose": adjclose}]
+    if events is not None:
+        result["events"] = events
+    return {"chart": {"result": [result], "error": None}}
+
+
+def test_parse_chart_matches_yfinance_history():
+    days = ["2024-03-04", "2024-03-05", "2024-03-06", "2024-03-07"]
+    stamps = [ist(d) for d in days]
+    df = parse_chart(chart(
+        stamps,
+        close=[100.0, 110.0, 120.0, None],  # a bar without a close is dropped
+        adjclose=[50.0, 55.0, 120.0, None],
+        events={
+            "dividends": {str(stamps[1]): {"amount": 2.5, "date": stamps[1]}},
+            "splits": {str(stamps[2]): {"numerator": 2, "denominator": 1, "date": stamps[2]}},
+        },
+    ))
+
+    # Daily bars are labelled at local midnight
+    assert df.index.equals(pd.DatetimeIndex(days[:3], tz="Asia/Kolkata", name="Date"))
+    assert list(df.columns) == ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+    # OHLC scaled by adjclose / close
+    assert df["Close"].tolist() == [50.0, 55.0, 120.0]
+    assert df["Open"].tolist() == [49.5, 54.5, 119.0]
+    assert df["High"].tolist() == [51.0, 56.0, 122.0]
+    assert df["Volume"].tolist() == [1000.0] * 3
+    assert df["Dividends"].tolist() == [0.0, 2.5, 0.0]
+    assert df["Stock Splits"].tolist() == [0.0, 0.0, 2.0]
+
+
+def test_parse_chart_intraday_and_empty():
+    stamps = [ist("2024-03-04", "09:15"), ist("2024-03-04", "09:20")]
+    df = parse_chart(chart(stamps, close=[100.0, 101.0]), interval="5m")
+    assert df.index.equals(pd.DatetimeIndex(["2024-03-04 09:15", "2024-03-04 09:20"], tz="Asia/Kolkata", name="Date"))
+    assert df["Dividends"].tolist() == [0.0, 0.0]
+    assert parse_chart({"chart": {"result": None, "error": {"code": "Not Found"}}}).empty
+    assert parse_chart(None).empty
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("MARKET CLIENT TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
@@ -0,0 +1,142 @@
+"""
+Bar store and quote freshness tests (no network; bars come from a FixtureFetcher
+and a temporary disk cache).
+Run: python test_market_data.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import market_data as md
+from bar_cache import DiskBarCache
+
+
+def make_bars(days=30):
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days, tz="Asia/Kolkata")
+    close = np.linspace(100, 130, days)
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Volume": np.full(days, 1000.0)}, index=idx)
+
+
+class Down:
+    """Fetcher for an upstream outage: every call fails."""
+    def __call__(self, symbol, interval="1d", start=None):
+        raise ConnectionError("upstream down")
+
+    def fetch_many(self, symbols, interval="1d", start=None):
+        raise ConnectionError("upstream down")
+
+
+def test_failed_tail_does_not_refresh_fetched_at():
+    store = md.BarStore(md.FixtureFetcher({"AAA.NS": make_bars()}), tail_ttl=0)
+    store.get_history("AAA.NS", "1mo")
+    fetched_at = store.fetched_at("AAA.NS")
+    assert fetched_at > 0
+
+    store.fetcher = Down()
+    time.sleep(0.01)
+    assert not store.get_history("AAA.NS", "1mo").empty  # held bars are still served
+    store.get_many(["AAA.NS"], "5d", max_age=0)
+    assert store.fetched_at("AAA.NS") == fetched_at
+
+    # An empty answer is no fresher than a failed one
+    store.fetcher = md.FixtureFetcher({})
+    store.get_many(["AAA.NS"], "5d", max_age=0)
+    assert store.fetched_at("AAA.NS") == fetched_at
+
+
+def test_failed_bulk_fetch_is_not_retried_per_symbol():
+    calls = []
+
+    class CountingDown(Down):
+        def __call__(self, symbol, interval="1d", start=None):
+            calls.append(symbol)
+            return super().__call__(symbol, interval, start)
+
+        def fetch_many(self, symbols, interval="1d", start=None):
+            calls.append(tuple(symbols))
+            return super().fetch_many(symbols, interval, start)
+
+    store = md.BarStore(CountingDown(), tail_ttl=60)
+    frames = store.get_many(["AAA.NS", "BBB.NS"], "1mo")
+    assert all(df.empty for df in frames.values())
+    assert calls == [("AAA.NS", "BBB.NS")]
+    assert store.get_history("AAA.NS", "1mo").empty and len(calls) == 1
+
+
+def test_restart_serves_disk_bars_without_waiting_on_the_tail():
+    bars = make_bars()
+    disk = DiskBarCache(tempfile.mkdtemp())
+    disk.write("AAA.NS", "1d", bars.iloc[:-1], None)
+    fetcher = md.FixtureFetcher({"AAA.NS": bars}, latency=0.5)
+    store = md.BarStore(fetcher, tail_ttl=0, disk=disk)
+
+    start = time.perf_counter()
+    served = store.get_history("AAA.NS", "max")
+    assert time.perf_counter() - start < 0.25  # not blocked on the 0.5 s tail fetch
+    assert len(served) == len(bars) - 1
+
+    store.wait()
+    assert fetcher.calls == 1 and store.stats["revalidations"] == 1
+    assert store.get_history("AAA.NS", "max").index[-1] == bars.index[-1]
+
+
+def test_expired_quote_is_dropped_during_outage():
+    store = md.BarStore(md.FixtureFetcher({"AAA.NS": make_bars()}))
+    cache = md.QuoteCache(store, ttl=0, max_staleness=0.05)
+    quote = cache.get_many(["AAA.NS"])["AAA.NS"]
+    assert quote and quote.as_of == store.fetched_at("AAA.NS")
+
+    store.fetcher = Down()
+    time.sleep(0.1)
+    assert cache.get_many(["AAA.NS"])["AAA.NS"] is None
+
+
+def test_refresher_snapshot_keeps_its_age_during_outage():
+    store = md.BarStore(md.FixtureFetcher({"AAA.NS": make_bars(), "BBB.NS": make_bars()}))
+    refresher = md.QuoteRefresher({"A": "AAA.NS", "B": "BBB.NS"}, store=store)
+    refresher.refresh()
+    as_of = refresher.snapshot.as_of
+    assert as_of > 0 and len(refresher.snapshot.quotes) == 2
+
+    store.fetcher = Down()
+    time.sleep(0.01)
+    refresher.refresh()
+    assert refresher.snapshot.as_of == as_of
+
+
+def test_quotes_reuse_fresh_bars_in_the_store():
+    fetcher = md.FixtureFetcher({"AAA.NS": make_bars(), "BBB.NS": make_bars()})
+    store = md.BarStore(fetcher)
+    store.get_many(["AAA.NS", "BBB.NS"], "1mo")
+    assert fetcher.calls == 1
+
+    # Cold quotes and a refresher round are built from the held bars, not a forced tail fetch
+    cache = md.QuoteCache(store, ttl=60)
+    assert all(cache.get_many(["AAA.NS", "BBB.NS"]).values())
+    refresher = md.QuoteRefresher({"A": "AAA.NS", "B": "BBB.NS"}, every=10, store=store)
+    refresher.refresh()
+    assert len(refresher.snapshot.quotes) == 2
+    assert fetcher.calls == 1
+
+    # Bars older than the quote TTL are refreshed
+    cache.ttl = 0
+    time.sleep(0.01)
+    cache.clear()
+    cache.get_many(["AAA.NS"])
+    assert fetcher.calls == 2
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("MARKET DATA TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
@@ -0,0 +1,184 @@
+"""
+News ingestion tests (no network; headlines come from a stub fetch and are
+stored in a temporary SQLite file).
+Run: python test_news.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import time
+
+import database as db
+import news
+from testutil import fresh_db
+
+
+def test_inflected_headlines_are_scored():
+    scores = news.lexicon.score([
+        "Reliance shares dropped 5%",
+        "TCS stock fell sharply",
+        "Infosys rallies as IT stocks rallied",
+        "Brokerage cutting targets on weak demand",
+        "HDFC Bank winning streak continues",
+        "Markets sank, Nifty lower",
+    ])
+    assert scores[0] < 0 and scores[1] < 0
+    assert scores[2] > 0
+    assert scores[3] < 0
+    assert scores[4] > 0
+    assert scores[5] < 0
+
+
+def test_negation_flips_sentiment():
+    positive, negated, failed, negative_negated = news.lexicon.score([
+        "Wipro shares jump",
+        "Wipro shares did not jump",
+        "Wipro fails to beat estimates",
+        "No fraud found at Adani Ports",
+    ])
+    assert positive > 0
+    assert negated < 0
+    assert failed < 0
+    assert negative_negated > 0
+    # Negation only reaches NEGATION_WINDOW tokens back
+    assert news.lexicon.score(["not a bad quarter says analyst as shares jump"])[0] > 0
+
+
+def test_tracked_symbols_are_distinct_across_watchlists_and_holdings():
+    fresh_db()
+    db.create_watchlist("Main", 1)
+    watchlist_id = db.get_watchlists(1)[0]["id"]
+    for symbol in ["TCS.NS", "INFY.NS", "ITC.NS"]:
+        db.add_to_watchlist(watchlist_id, symbol)
+    db.update_portfolio_holding(1, "INFY.NS", 5, 1500.0)
+    db.update_portfolio_holding(1, "SBIN.NS", 2, 800.0)
+    assert db.get_tracked_symbols() == ["INFY.NS", "ITC.NS", "SBIN.NS", "TCS.NS"]
+
+
+def test_download_goes_through_the_market_client():
+    queries = []
+
+    def search_sync(query, quotes=10, news=0):
+        queries.append((query, quotes, news))
+        items = [{"uuid": "1", "title": "Tata Motors rallies", "publisher": "Test",
+                  "link": "https://example.com/tm", "providerPublishTime": 1700000000}]
+        return {"quotes": [], "news": items if query == "TATAMOTORS" else []}
+
+    original = news.market_client.client.search_sync
+    news.market_client.client.search_sync = search_sync
+    try:
+        items = [news._parse(item) for item in news._download("TATAMOTORS.NS")]
+    finally:
+        news.market_client.client.search_sync = original
+    assert queries == [("TATAMOTORS.NS", 0, news.NEWS_COUNT), ("TATAMOTORS", 0, news.NEWS_COUNT)]
+    assert items == [{"title": "Tata Motors rallies", "link": "https://example.com/tm",
+                      "publisher": "Test", "published": 1700000000.0}]
+
+
+def stub_fetch(calls):
+    def fetch(symbol):
+        calls.append(symbol)
+        return [{"title": f"{symbol} shares surge", "link": f"https://example.com/{symbol}",
+                 "publisher": "Test", "providerPublishTime": time.time()}]
+    return fetch
+
+
+def reset_requests():
+    with news._lock:
+        news._requested.clear()
+        news._requested_at.clear()
+
+
+def test_wakeup_fetches_only_requested_symbols():
+    fresh_db()
+    reset_requests()
+    calls = []
+    ingestor = news.NewsIngestor(symbols=lambda: ["AAA.NS", "BBB.NS"], pause=0, fetch=stub_fetch(calls))
+    news.request("CCC.NS")
+    ingestor.ingest(requested_only=True)
+    assert calls == ["CCC.NS"]
+    assert ingestor.stats["wakeups"] == 1 and ingestor.stats["rounds"] == 0
+
+    calls.clear()
+    ingestor.ingest()
+    assert calls == ["AAA.NS", "BBB.NS"]  # CCC.NS was served; it is no longer pending
+
+
+def test_repeat_requests_are_rate_limited():
+    fresh_db()
+    reset_requests()
+    calls = []
+    ingestor = news.NewsIngestor(symbols=lambda: [], pause=0, fetch=stub_fetch(calls))
+    news.request("CCC.NS")
+    ingestor.ingest(requested_only=True)
+    # Within REQUEST_INTERVAL a symbol is not queued again
+    news.request("CCC.NS")
+    ingestor.ingest(requested_only=True)
+    assert calls == ["CCC.NS"]
+
+    with news._lock:
+        news._requested_at["CCC.NS"] -= news.REQUEST_INTERVAL
+    news.request("CCC.NS")
+    ingestor.ingest(requested_only=True)
+    assert calls == ["CCC.NS", "CCC.NS"]
+
+
+def test_request_during_a_round_is_served_before_the_next_round():
+    fresh_db()
+    reset_requests()
+    calls = []
+
+    def fetch(symbol):
+        if symbol == "AAA.NS":
+            news.request("CCC.NS")  # arrives while the round is running
+        return stub_fetch(calls)(symbol)
+
+    ingestor = news.NewsIngestor(every=60, symbols=lambda: ["AAA.NS"], pause=0, fetch=fetch).start()
+    try:
+        deadline = time.time() + 5
+        while "CCC.NS" not in calls and time.time() < deadline:
+            time.sleep(0.01)
+        assert "CCC.NS" in calls
+    finally:
+        ingestor.stop()
+        ingestor._thread.join(5)
+        news.ingestor = None
+
+
+def test_rounds_do_not_rescore_stories_still_in_the_feed():
+    fresh_db()
+    reset_requests()
+    news.clear()
+    feed = {"AAA.NS": ["Alpha shares surge", "Alpha wins order"], "BBB.NS": ["Beta stock falls"]}
+
+    def fetch(symbol):
+        return [{"title": title, "link": f"https://example.com/{title}", "publisher": "Test",
+                 "providerPublishTime": time.time()} for title in feed[symbol]]
+
+    scored = []
+    score = news.lexicon.score
+    news.lexicon.score = lambda titles: scored.extend(titles) or score(titles)
+    try:
+        ingestor = news.NewsIngestor(symbols=lambda: list(feed), pause=0, fetch=fetch)
+        ingestor.ingest()
+        assert sorted(scored) == sorted(t for titles in feed.values() for t in titles)
+
+        scored.clear()
+        feed["AAA.NS"] = ["Alpha shares surge", "Alpha beats estimates"]
+        ingestor.ingest()
+        assert scored == ["Alpha beats estimates"]
+        # The story that left the feed is evicted; it is already in the database
+        assert len(news._stories) == 3
+        assert ingestor.stats["stored"] == 4
+    finally:
+        news.lexicon.score = score
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("NEWS TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
@@ -0,0 +1,118 @@
+"""
+Performance tests: the incrementally extended equity curve must match a full
+recompute (no network; bars come from a FixtureFetcher, trades from a
+temporary SQLite file).
+Run: python test_performance.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+import pandas as pd
+
+import database as db
+import ledger
+import market_data as md
+import performance
+from testutil import fresh_db
+
+
+def setup_bars(days=60):
+    idx = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days, tz="Asia/Kolkata")
+    rng = np.random.default_rng(3)
+    frames = {}
+    for symbol in ["AAA.NS", "BBB.NS"]:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+        frames[symbol] = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                                       "Volume": np.full(days, 1000.0)}, index=idx)
+    md.set_fetcher(md.FixtureFetcher(frames))
+    return idx.tz_localize(None)
+
+
+def trade(symbol, type, quantity, price, date):
+    assert db.record_trade(1, symbol, type, quantity, price, date.to_pydatetime())[0]
+
+
+def full_recompute(portfolio_id):
+    performance.clear(portfolio_id)
+    return performance.equity_curve(portfolio_id)
+
+
+def assert_same(curve, expected):
+    pd.testing.assert_frame_equal(curve, expected, check_freq=False)
+    got, want = performance.summary(curve), performance.summary(expected)
+    assert abs(got["twr"] - want["twr"]) < 1e-12
+    assert abs(got["xirr"] - want["xirr"]) < 1e-9
+
+
+def test_incremental_curve_matches_full_recompute():
+    fresh_db()
+    performance.clear()
+    days = setup_bars()
+    trade("AAA.NS", "BUY", 10, 100.0, days[5])
+    trade("BBB.NS", "BUY", 5, 200.0, days[20])
+    trade("AAA.NS", "SELL", 4, 110.0, days[40])
+    first = performance.equity_curve(1)
+    assert len(first) == len(days) - 5
+
+    # Trades on the provisional last day extend the cached curve
+    trade("BBB.NS", "BUY", 3, 190.0, days[-1])
+    trade("AAA.NS", "SELL", 6, 120.0, days[-1] + pd.Timedelta(hours=11))
+    incremental = performance.equity_curve(1)
+    assert_same(incremental, full_recompute(1))
+
+
+def test_unchanged_portfolio_skips_the_ledger():
+    fresh_db()
+    performance.clear()
+    days = setup_bars()
+    trade("AAA.NS", "BUY", 10, 100.0, days[5])
+    curve = performance.equity_curve(1)
+
+    calls = []
+    load = ledger.load_transactions
+    ledger.load_transactions = lambda *args, **kwargs: calls.append(args) or load(*args, **kwargs)
+    try:
+        assert performance.equity_curve(1) is curve
+        # Expired closes recompute the last row without re-reading trades
+        with performance._lock:
+            performance._cache[1]["closes_at"] = 0.0
+        assert_same(performance.equity_curve(1), curve)
+        assert calls == []
+
+        trade("AAA.NS", "SELL", 2, 105.0, days[-1])
+        performance.equity_curve(1)
+        assert len(calls) == 1
+    finally:
+        ledger.load_transactions = load
+
+
+def test_removing_a_holding_leaves_twr_unchanged():
+    fresh_db()
+    performance.clear()
+    days = setup_bars()
+    trade("AAA.NS", "BUY", 10, 100.0, days[5])
+    trade("BBB.NS", "BUY", 5, 200.0, days[10])
+    before = full_recompute(1)
+
+    # Removed at its average price (200), valued by the curve at that day's close
+    assert db.remove_holding(1, "BBB.NS", date=days[30].to_pydatetime())[0]
+    after = full_recompute(1)
+    removed = days[30]
+    closes = performance.load_closes(["AAA.NS", "BBB.NS"], days[0])
+    pd.testing.assert_series_equal(after["twr"][:removed], before["twr"][:removed], check_freq=False)
+    assert abs(after.loc[removed, "outflow"] - 5 * closes.loc[removed, "BBB.NS"]) < 1e-6
+
+    # From then on only AAA is held: the return is AAA's own
+    expected = closes["AAA.NS"].pct_change()[removed:].iloc[1:]
+    assert np.allclose(after["daily_return"][removed:].iloc[1:], expected)
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("PERFORMANCE TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
@@ -0,0 +1,94 @@
+"""
+Symbol master tests: the compiled, memory-mapped index must rank like the
+in-memory SymbolIndex (no network; listings are written to a temporary dir).
+Run: python test_symbol_master.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import csv
+import os
+import tempfile
+
+import symbol_master
+import symbol_search
+
+ENTRIES = [
+    {"symbol": "TATAMOTORS.NS", "name": "Tata Motors Ltd"},
+    {"symbol": "TATASTEEL.NS", "name": "Tata Steel Ltd"},
+    {"symbol": "TATAPOWER.NS", "name": "Tata Power Company Ltd"},
+    {"symbol": "TATAELXSI.NS", "name": "Tata Elxsi Ltd"},
+    {"symbol": "RELIANCE.NS", "name": "Reliance Industries Ltd"},
+    {"symbol": "NESTLEZ.NS", "name": "Nestlé Indiä Ltd"},
+    {"symbol": "NESTLEA.NS", "name": "Nestle Indiaa Ltd"},
+]
+
+
+def compiled(entries=ENTRIES):
+    path = os.path.join(tempfile.mkdtemp(), "symbols.bin")
+    symbol_master.build(entries, path)
+    return symbol_master.SymbolMaster(path)
+
+
+def test_search_matches_symbol_index():
+    master, index = compiled(), symbol_search.SymbolIndex(ENTRIES)
+    # exact symbol, symbol prefix, name tokens, name prefix, typo (fuzzy pass), no match
+    for query in ["TATASTEEL.NS", "tata", "TATAP", "steel", "tata power", "reliance ind", "relaince", "zzzz"]:
+        for limit in (1, 3, 10):
+            got = [e["symbol"] for e in master.search(query, limit=limit)]
+            want = [e["symbol"] for e in index.search(query, limit=limit)]
+            assert got == want, (query, limit, got, want)
+
+
+def test_get_round_trips_every_column():
+    master = compiled([*ENTRIES, {"symbol": "tcs.bo", "name": "Tata Consultancy Services Ltd",
+                                  "isin": "INE467B01029", "sector": "IT"},
+                       {"symbol": "TCS.BO", "name": "duplicate, dropped"}])
+    assert len(master) == len(ENTRIES) + 1
+    assert master.get(" tcs.bo ") == {"symbol": "TCS.BO", "name": "Tata Consultancy Services Ltd",
+                                      "exch": "BSE", "isin": "INE467B01029", "sector": "IT"}
+    assert master.get("TATAMOTORS.NS")["exch"] == "NSE"
+    assert master.get("TATA.NS") is None and master.get("UNKNOWN") is None
+
+
+def test_stale_or_missing_file_is_not_opened():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "symbols.bin")
+    assert symbol_master.open_master(path) is None
+    with open(path, "wb") as f:
+        f.write(b"SYMMSTR2" + bytes(64))  # an older layout
+    assert symbol_master.open_master(path) is None
+
+
+def test_names_are_ranked_by_characters_not_bytes():
+    # 'Nestlé Indiä Ltd' is 16 characters but 18 UTF-8 bytes; it must rank before
+    # the 17-character 'Nestle Indiaa Ltd' exactly as SymbolIndex ranks it
+    master = compiled()
+    expected = [e["symbol"] for e in symbol_search.SymbolIndex(ENTRIES).search("nestle", limit=1)]
+    assert expected == ["NESTLEZ.NS"]
+    assert [e["symbol"] for e in master.search("nestle", limit=1)] == expected
+
+
+def test_listings_csv_is_compiled_on_first_open():
+    directory = tempfile.mkdtemp()
+    listings = os.path.join(directory, "symbols.csv")
+    with open(listings, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["SYMBOL", "NAME OF COMPANY"])
+        writer.writerow(["SMALLCAP", "Smallcap Industries Ltd"])
+    path = os.path.join(directory, "symbols.bin")
+
+    master = symbol_search.open_master(listings, path)
+    assert master is not None and os.path.exists(path)
+    assert master.get("SMALLCAP.NS")["name"] == "Smallcap Industries Ltd"
+    assert master.get("RELIANCE.NS") is not None  # NIFTY stocks are compiled in too
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("SYMBOL MASTER TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
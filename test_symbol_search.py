@@ -0,0 +1,89 @@
+"""
+Symbol search tests: local exact/prefix/token hits are served without the
+remote search; anything else (including fuzzy-only matches) is a miss that
+reaches `remote`, whose hits are merged into the index (no network; remote
+is a stub).
+Run: python test_symbol_search.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from contextlib import contextmanager
+
+import nifty_stocks
+import symbol_search
+import test_symbol_master
+
+IRCTC = [{"symbol": "IRCTC.NS", "name": "Indian Railway Catering And Tourism Corporation Ltd", "exch": "NSE"}]
+
+
+class StubRemote:
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        return self.results
+
+
+@contextmanager
+def nifty_only():
+    """Point symbol_search at a fresh NIFTY-only index with no compiled master (the shipped state)."""
+    saved = symbol_search.master, symbol_search.index
+    symbol_search.master = None
+    symbol_search.index = symbol_search.SymbolIndex(nifty_stocks.STOCKS)
+    try:
+        yield
+    finally:
+        symbol_search.master, symbol_search.index = saved
+
+
+def test_fuzzy_only_query_reaches_remote():
+    with nifty_only():
+        # 'IRCTC' only matches ITC.NS through trigrams; that must not stop the remote search
+        assert symbol_search.index.scored("IRCTC", fuzzy=True) and not symbol_search.index.scored("IRCTC")
+        remote = StubRemote(IRCTC)
+        assert [e["symbol"] for e in symbol_search.search("IRCTC", remote=remote)] == ["IRCTC.NS"]
+        assert remote.queries == ["IRCTC"]
+
+        # Merged into the index: the next query is answered locally
+        assert [e["symbol"] for e in symbol_search.search("irctc", remote=remote)] == ["IRCTC.NS"]
+        assert remote.queries == ["IRCTC"]
+
+
+def test_local_hits_do_not_reach_remote():
+    with nifty_only():
+        remote = StubRemote(IRCTC)
+        assert symbol_search.search("RELIANCE.NS", remote=remote)[0]["symbol"] == "RELIANCE.NS"
+        assert symbol_search.search("infos", remote=remote)[0]["symbol"] == "INFY.NS"
+        assert remote.queries == []
+
+
+def test_fuzzy_matches_are_served_when_remote_has_none():
+    with nifty_only():
+        remote = StubRemote([])
+        assert symbol_search.search("relaince", remote=remote)[0]["symbol"] == "RELIANCE.NS"
+        assert remote.queries == ["relaince"]
+        # And without a remote search at all
+        assert symbol_search.search("relaince")[0]["symbol"] == "RELIANCE.NS"
+
+
+def test_index_and_master_search_consult_remote_on_a_miss():
+    entries = test_symbol_master.ENTRIES
+    for source in (symbol_search.SymbolIndex(entries), test_symbol_master.compiled(entries)):
+        remote = StubRemote(IRCTC)
+        assert [e["symbol"] for e in source.search("tata power", remote=remote)] == ["TATAPOWER.NS"]
+        assert [e["symbol"] for e in source.search("relaince", remote=remote)] == ["IRCTC.NS"]
+        assert remote.queries == ["relaince"]
+        assert source.search("relaince", remote=StubRemote([]))[0]["symbol"] == "RELIANCE.NS"
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("SYMBOL SEARCH TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
@@ -0,0 +1,127 @@
+"""
+Tradebook import tests (no network; database tests use a temporary SQLite file).
+Run: python test_trade_import.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime
+
+import pandas as pd
+
+import database as db
+import ledger
+import symbol_search
+import trade_import as ti
+from testutil import fresh_db
+
+
+def test_iso_tradebook_dates():
+    # Zerodha tradebook: ISO trade_date and order_execution_time
+    raw = pd.DataFrame({
+        "symbol": ["RELIANCE", "TCS"],
+        "trade_date": ["2024-03-05", "2024-11-04"],
+        "trade_type": ["buy", "sell"],
+        "quantity": [10, 5],
+        "price": [2500.0, 3900.0],
+        "order_execution_time": ["2024-03-05 09:15:02", "2024-11-04T14:01:30"],
+    })
+    df = ti.parse_tradebook(raw)
+    assert df["date"].tolist() == [pd.Timestamp("2024-03-05 09:15:02"), pd.Timestamp("2024-11-04 14:01:30")]
+
+
+def test_dayfirst_tradebook_dates():
+    raw = pd.DataFrame({
+        "Scrip": ["INFY", "ITC", "SBIN"],
+        "Side": ["B", "S", "B"],
+        "Qty": [1, 2, 3],
+        "Rate": [1500, 450, 800],
+        "Trade Date": ["05/03/2024", "05-03-2024 10:00", "2024-03-05"],
+    })
+    df = ti.parse_tradebook(raw)
+    assert (df["date"].dt.normalize() == pd.Timestamp("2024-03-05")).all()
+    assert df["date"].iloc[1] == pd.Timestamp("2024-03-05 10:00")
+
+
+
+def fills(*rows):
+    return pd.DataFrame(
+        [{"symbol": "RELIANCE.NS", "type": t, "quantity": q, "price": 2500.0,
+          "date": pd.Timestamp("2024-03-05 09:15:02")} for t, q in rows]
+    )
+
+
+def test_identical_fills_are_kept():
+    fresh_db()
+    # Two partial fills with the same price and timestamp, then a sell of 15
+    ok, msg = ti.import_trades(1, fills(("BUY", 10), ("BUY", 10), ("SELL", 15)))
+    assert ok, msg
+    holdings = db.get_portfolio_holdings(1)
+    assert [(h["symbol"], h["quantity"]) for h in holdings] == [("RELIANCE.NS", 5)]
+
+
+def test_reimport_skips_recorded_rows_by_count():
+    fresh_db()
+    assert ti.import_trades(1, fills(("BUY", 10), ("BUY", 10)))[0]
+    ok, msg = ti.import_trades(1, fills(("BUY", 10), ("BUY", 10)))
+    assert not ok and "already recorded" in msg
+    # Same file with one more identical fill: only the extra one is new
+    ok, msg = ti.import_trades(1, fills(("BUY", 10), ("BUY", 10), ("BUY", 10)))
+    assert ok, msg
+    assert db.get_portfolio_holdings(1)[0]["quantity"] == 30
+
+
+def test_repeated_trade_ids_are_dropped():
+    fresh_db()
+    trades = fills(("BUY", 10), ("BUY", 10), ("BUY", 10)).assign(trade_id=["T1", "T1", "T2"])
+    assert ti.import_trades(1, trades)[0]
+    assert db.get_portfolio_holdings(1)[0]["quantity"] == 20
+
+
+def test_symbols_are_validated_against_the_symbol_master():
+    symbol_search.index.add([{"symbol": "SMALLCAP.NS", "name": "Smallcap Industries Ltd"}])
+    raw = pd.DataFrame({"symbol": ["SMALLCAP", "NOSUCHCO"], "type": ["BUY", "BUY"], "quantity": [1, 1],
+                        "price": [10.0, 10.0], "date": ["2024-03-05", "2024-03-05"]})
+    valid, errors = ti.validate(ti.parse_tradebook(raw), check_remote=False)
+    assert valid["symbol"].tolist() == ["SMALLCAP.NS"]
+    assert errors["reason"].tolist() == ["unknown symbol"]
+
+
+def test_holdings_older_than_the_ledger_survive_an_import():
+    fresh_db()
+    db.update_portfolio_holding(1, "RELIANCE.NS", 10, 2400.0)  # entered by hand, no transactions
+    ok, msg = ti.import_trades(1, fills(("SELL", 4)))
+    assert ok, msg
+    assert [(h["symbol"], h["quantity"]) for h in db.get_portfolio_holdings(1)] == [("RELIANCE.NS", 6)]
+    assert (ledger.reconcile(1)["status"] == "ok").all()
+
+
+def test_removed_holding_is_not_resurrected_by_an_import():
+    fresh_db()
+    assert db.record_trade(1, "RELIANCE.NS", "BUY", 10, 2400.0, datetime(2024, 1, 2))[0]
+    assert db.remove_holding(1, "RELIANCE.NS")[0]
+    assert db.get_portfolio_holdings(1) == []
+    # The removal is a ledger adjustment, not a trade in the History tab
+    assert [row["type"] for row in db.get_transactions_page(1)[0]] == ["BUY"]
+
+    assert ti.import_trades(1, fills(("BUY", 5)))[0]
+    assert [(h["symbol"], h["quantity"]) for h in db.get_portfolio_holdings(1)] == [("RELIANCE.NS", 5)]
+    assert (ledger.reconcile(1)["status"] == "ok").all()
+
+    # Removed before Remove recorded a SELL: the import closes the stale position first
+    fresh_db()
+    assert db.record_trade(1, "RELIANCE.NS", "BUY", 10, 2400.0, datetime(2024, 1, 2))[0]
+    db.update_portfolio_holding(1, "RELIANCE.NS", 0, 0)
+    ok, msg = ti.import_trades(1, fills(("BUY", 5)))
+    assert ok and "balanced the ledger" in msg, msg
+    assert [(h["symbol"], h["quantity"]) for h in db.get_portfolio_holdings(1)] == [("RELIANCE.NS", 5)]
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("TRADE IMPORT TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
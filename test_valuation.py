@@ -0,0 +1,95 @@
+"""
+Valuation tests: value_holdings must agree with the per-holding loop it
+replaced (no network; quotes are built as get_quotes-shaped frames).
+Run: python test_valuation.py   (or pytest)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+import valuation
+
+HOLDINGS = [
+    {"symbol": "TCS.NS", "quantity": 3, "avg_price": Decimal("3400.50")},
+    {"symbol": "INFY.NS", "quantity": 10, "avg_price": Decimal("1500.00")},
+    {"symbol": "ITC.NS", "quantity": 25, "avg_price": Decimal("410.25")},   # no quote
+    {"symbol": "FREE.NS", "quantity": 5, "avg_price": Decimal("0.00")},     # bonus shares, nothing invested
+]
+
+
+def quotes(prices, changes=None):
+    """Quotes frame shaped like market_data.get_quotes (price and, optionally, change)."""
+    frame = pd.DataFrame({"price": pd.Series(prices, dtype=np.float64)}).rename_axis("symbol")
+    if changes is not None:
+        frame["change"] = pd.Series(changes, dtype=np.float64)
+    return frame
+
+
+def loop_valuation(holdings, prices):
+    """Reference: the portfolio page's original one-holding-at-a-time valuation."""
+    rows, total_invested, current_value = [], 0, 0
+    for item in holdings:
+        ltp = prices.get(item["symbol"])
+        current_price = ltp if ltp is not None and pd.notna(ltp) else float(item["avg_price"])
+        invested = item["quantity"] * float(item["avg_price"])
+        curr_val = item["quantity"] * current_price
+        pnl = curr_val - invested
+        rows.append((item["symbol"], current_price, invested, curr_val, pnl, (pnl / invested) * 100 if invested else 0))
+        total_invested += invested
+        current_value += curr_val
+    return rows, total_invested, current_value
+
+
+def test_matches_the_per_holding_loop():
+    prices = {"TCS.NS": 3550.0, "INFY.NS": 1432.5, "ITC.NS": np.nan, "FREE.NS": 120.0}
+    valued = valuation.value_holdings(HOLDINGS, quotes(prices))
+    assert list(valued.columns) == valuation.VALUATION_COLUMNS
+
+    rows, invested, current = loop_valuation(HOLDINGS, prices)
+    for (symbol, ltp, inv, cur, pnl, pnl_pct), got in zip(rows, valued.itertuples(index=False)):
+        assert got.symbol == symbol
+        assert np.isclose(got.ltp, ltp) and np.isclose(got.invested, inv) and np.isclose(got.current, cur)
+        assert np.isclose(got.pnl, pnl) and np.isclose(got.pnl_pct, pnl_pct)
+
+    totals = valuation.portfolio_totals(valued)
+    assert np.isclose(totals["invested"], invested) and np.isclose(totals["current"], current)
+    assert np.isclose(totals["pnl_pct"], (current - invested) / invested * 100)
+
+
+def test_unquoted_holding_is_valued_at_cost():
+    valued = valuation.value_holdings(HOLDINGS, quotes({"TCS.NS": 3550.0})).set_index("symbol")
+    assert valued.loc["ITC.NS", "ltp"] == 410.25
+    assert valued.loc["ITC.NS", "pnl"] == 0.0 and valued.loc["ITC.NS", "pnl_pct"] == 0.0
+    assert valued.loc["FREE.NS", "pnl_pct"] == 0.0   # no division by a zero cost
+
+
+def test_day_change_follows_quantity():
+    prices = {"TCS.NS": 3550.0, "INFY.NS": 1432.5}
+    valued = valuation.value_holdings(HOLDINGS, quotes(prices, {"TCS.NS": 12.0, "INFY.NS": -4.5})).set_index("symbol")
+    assert valued.loc["TCS.NS", "day_change"] == 36.0
+    assert valued.loc["INFY.NS", "day_change"] == -45.0
+    assert valued.loc["ITC.NS", "day_change"] == 0.0
+    assert valuation.portfolio_totals(valued)["day_change"] == -9.0
+
+    # Quotes without a change column contribute no day change
+    assert (valuation.value_holdings(HOLDINGS, quotes(prices))["day_change"] == 0.0).all()
+
+
+def test_empty_portfolio():
+    valued = valuation.value_holdings([], quotes({}))
+    assert valued.empty
+    assert valuation.portfolio_totals(valued) == {"invested": 0.0, "current": 0.0, "pnl": 0.0, "pnl_pct": 0, "day_change": 0.0}
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("VALUATION TESTS")
+    print("=" * 70)
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"[OK] {name}")
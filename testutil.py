@@ -0,0 +1,22 @@
+"""
+Shared helpers for the test_*.py scripts.
+"""
+import os
+import tempfile
+
+from sqlalchemy import text
+
+import database as db
+
+
+def fresh_db():
+    """Point database.py at an empty SQLite file with one user and one portfolio (id 1)."""
+    db.engine = db._create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+    db.metadata.create_all(db.engine)
+    with db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, username) VALUES (1, 'test')"))
+        conn.execute(text("INSERT INTO portfolio_names (id, user_id, name) VALUES (1, 1, 'Test')"))
+    # Results cached against the previous engine must not leak into this one
+    with db._cache_lock:
+        db._cache.clear()
+        db._cache_keys.clear()
@@ -0,0 +1,238 @@
+"""
+Bulk trade import from broker tradebooks / contract notes (CSV or XLSX).
+
+parse_tradebook() maps the broker's column names onto symbol, type,
+quantity, price and date; validate() checks every row and the symbols
+against the symbol master; import_trades() writes all transactions with one
+executemany and rebuilds the affected holdings once from the ledger, all in
+a single database transaction. Holdings the ledger does not explain
+(entered before trades were recorded) are carried in as TRANSFER_IN
+adjustments first, so the rebuild keeps them.
+"""
+import pandas as pd
+from sqlalchemy import text
+
+import database as db
+import ledger
+import market_data as md
+import symbol_search
+
+# Broker header -> canonical column (matched case-insensitively, spaces/underscores ignored)
+COLUMN_ALIASES = {
+    "symbol": ["symbol", "tradingsymbol", "scrip", "scripname", "scripcode", "stock", "stockname", "instrument", "ticker"],
+    "type": ["type", "tradetype", "buysell", "transactiontype", "side", "action", "b/s"],
+    "quantity": ["quantity", "qty", "tradedqty", "tradequantity", "shares"],
+    "price": ["price", "rate", "tradeprice", "tradedprice", "avgprice", "averageprice", "netrate"],
+    # Most precise first; rows missing a timestamp fall back to the next match
+    "date": ["orderexecutiontime", "executiontime", "tradedatetime", "datetime", "tradetime", "tradedate", "date"],
+    "exchange": ["exchange", "exch", "exchangename"],
+    # Unique per fill (order ids are shared by partial fills, so they are not used)
+    "trade_id": ["tradeid", "tradeno", "tradenumber"],
+}
+
+TYPE_ALIASES = {"BUY": "BUY", "B": "BUY", "PURCHASE": "BUY", "SELL": "SELL", "S": "SELL", "SALE": "SELL"}
+EXCHANGE_SUFFIX = {"NSE": ".NS", "BSE": ".BO"}
+
+
+def _key(name):
+    return str(name).strip().lower().replace(" ", "").replace("_", "").replace("-", "").replace(".", "")
+
+
+def read_file(file, filename=None):
+    """Raw DataFrame from a CSV or XLSX upload (path or file-like)."""
+    name = (filename or getattr(file, "name", "") or str(file)).lower()
+    if name.endswith((".xlsx", ".xls")):
+        return pd.read_excel(file)  # needs openpyxl
+    return pd.read_csv(file)
+
+
+def _parse_dates(values):
+    """
+    ISO dates/timestamps (2024-03-05, 2024-03-05 09:15:02) as written; other
+    strings are read day-first (05/03/2024 is 5 March), as Indian brokers export them.
+    """
+    dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    rest = dates.isna() & values.notna()
+    if rest.any():
+        dates[rest] = pd.to_datetime(values[rest].astype(str), errors="coerce", dayfirst=True, format="mixed")
+    return dates
+
+
+def parse_tradebook(raw):
+    """
+    Normalize a broker export to columns symbol, type, quantity, price, date.
+    Rows that cannot be parsed keep NaN/None and are reported by validate().
+    """
+    lookup = {_key(col): col for col in raw.columns}
+    picked = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        matches = [lookup[_key(alias)] for alias in aliases if _key(alias) in lookup]
+        if matches:
+            picked[canonical] = matches if canonical == "date" else matches[0]
+    missing = [c for c in ("symbol", "type", "quantity", "price", "date") if c not in picked]
+    if missing:
+        raise ValueError(f"Tradebook is missing column(s): {', '.join(missing)}")
+
+    df = pd.DataFrame(index=raw.index)
+    symbols = raw[picked["symbol"]].astype(str).str.strip().str.upper()
+    exchange = raw[picked["exchange"]].astype(str).str.strip().str.upper() if "exchange" in picked else pd.Series("NSE", index=raw.index)
+    suffix = exchange.map(EXCHANGE_SUFFIX).fillna(".NS")
+    # Brokers export bare tradingsymbols; the app stores Yahoo symbols
+    bare = ~symbols.str.contains(".", regex=False)
+    df["symbol"] = symbols.where(~bare, symbols + suffix)
+    df["type"] = raw[picked["type"]].astype(str).str.strip().str.upper().map(TYPE_ALIASES)
+    df["quantity"] = pd.to_numeric(raw[picked["quantity"]], errors="coerce")
+    df["price"] = pd.to_numeric(raw[picked["price"]], errors="coerce")
+    dates = [_parse_dates(raw[col]) for col in picked["date"]]
+    df["date"] = dates[0]
+    for fallback in dates[1:]:
+        df["date"] = df["date"].fillna(fallback)
+    if "trade_id" in picked:
+        df["trade_id"] = raw[picked["trade_id"]].astype(str).str.strip().where(raw[picked["trade_id"]].notna())
+    return df
+
+
+def validate(df, portfolio_id=None, check_remote=True):
+    """
+    Split parsed trades into (valid, errors). `errors` is a DataFrame of
+    rejected rows with a `reason` column (row numbers are 1-based file rows).
+    Symbols must be in the symbol master (or the portfolio's current holdings).
+    Only when no listings master is available are the rest verified with one
+    bulk history fetch, if check_remote is set.
+    """
+    reasons = pd.Series("", index=df.index, dtype=object)
+
+    def flag(mask, reason):
+        reasons[mask & (reasons == "")] = reason
+
+    flag(df["type"].isna(), "type must be BUY or SELL")
+    flag(df["quantity"].isna() | (df["quantity"] <= 0) | (df["quantity"] % 1 != 0), "quantity must be a positive whole number")
+    flag(df["price"].isna() | (df["price"] <= 0), "price must be positive")
+    flag(df["date"].isna(), "unreadable date")
+
+    candidates = set(df.loc[reasons == "", "symbol"])
+    universe = {s for s in candidates if symbol_search.lookup(s) is not None}
+    if portfolio_id is not None:
+        universe |= {h["symbol"] for h in db.get_portfolio_holdings(portfolio_id)}
+    unknown = sorted(candidates - universe)
+    if unknown and check_remote and symbol_search.master is None:
+        frames = md.bar_store.get_many(unknown, "5d")
+        universe |= {s for s, bars in frames.items() if bars is not None and not bars.empty}
+    flag(~df["symbol"].isin(universe), "unknown symbol")
+
+    errors = df[reasons != ""].assign(reason=reasons[reasons != ""])
+    errors.index = errors.index + 2  # header is row 1
+    valid = df[reasons == ""].copy()
+    valid["quantity"] = valid["quantity"].astype(int)
+    return valid, errors
+
+
+def _drop_duplicates(conn, portfolio_id, trades):
+    """
+    Drop trades already recorded (re-imported files). Identical rows are
+    legitimate (partial fills at the same price and time), so rows are
+    matched by count: a file with three copies of a fill the database holds
+    once imports two. Repeated broker trade ids within the file are dropped.
+    """
+    if "trade_id" in trades:
+        trades = trades[trades["trade_id"].isna() | ~trades["trade_id"].duplicated()]
+    existing = pd.read_sql(
+        text("SELECT symbol, type, quantity, price, date FROM transactions WHERE portfolio_id = :portfolio_id AND date >= :start AND date <= :end"),
+        conn,
+        params={"portfolio_id": portfolio_id, "start": trades["date"].min().to_pydatetime(), "end": trades["date"].max().to_pydatetime()},
+    )
+    if existing.empty:
+        return trades
+    keys = ["symbol", "type", "quantity", "price", "date"]
+    existing["date"] = pd.to_datetime(existing["date"])
+    existing["price"] = existing["price"].astype(float).round(2)
+    have = existing.groupby(keys).size().rename("_have").reset_index()
+    probe = trades[keys].assign(price=trades["price"].round(2))
+    probe["_n"] = probe.groupby(keys).cumcount()
+    # A left merge keeps the row order of `probe`
+    probe = probe.merge(have, on=keys, how="left")
+    recorded = (probe["_n"] < probe["_have"].fillna(0)).to_numpy()
+    return trades[~recorded]
+
+
+def _opening_balances(conn, portfolio_id, trades):
+    """
+    Transactions that make the ledger agree with the current holdings of the
+    imported symbols before the new trades land. A holding larger than the
+    ledger explains (entered before trades were recorded) gets a TRANSFER_IN
+    at its average price, dated just before the symbol's first trade; a
+    position the ledger still holds but the holdings do not (removed without
+    a sell) gets a TRANSFER_OUT at ledger average cost after its last trade.
+    These are ledger adjustments, not fills.
+    """
+    symbols = sorted(trades["symbol"].unique())
+    tx = ledger.load_transactions(portfolio_id, conn)
+    tx = tx[tx["symbol"].isin(symbols)]
+    replayed = ledger.replay(tx)
+    dates = pd.to_datetime(tx["date"], format="ISO8601")
+    held = pd.read_sql(
+        text("SELECT symbol, quantity, avg_price FROM portfolio_holdings WHERE portfolio_id = :portfolio_id"),
+        conn,
+        params={"portfolio_id": portfolio_id},
+    ).set_index("symbol")
+    first_import = trades.groupby("symbol")["date"].min()
+
+    rows = []
+    for symbol in symbols:
+        held_qty = int(held["quantity"].get(symbol, 0))
+        ledger_qty = int(replayed["quantity"].get(symbol, 0))
+        recorded = dates[(tx["symbol"] == symbol).to_numpy()]
+        if held_qty > ledger_qty:
+            first = min(recorded.min(), first_import[symbol]) if len(recorded) else first_import[symbol]
+            rows.append({"portfolio_id": portfolio_id, "symbol": symbol, "type": db.TRANSFER_IN, "quantity": held_qty - ledger_qty,
+                         "price": round(float(held["avg_price"][symbol]), 2),
+                         "date": (first - pd.Timedelta(seconds=1)).to_pydatetime()})
+        elif ledger_qty > held_qty:
+            rows.append({"portfolio_id": portfolio_id, "symbol": symbol, "type": db.TRANSFER_OUT, "quantity": ledger_qty - held_qty,
+                         "price": round(float(replayed["avg_cost"][symbol]), 2),
+                         "date": (recorded.max() + pd.Timedelta(seconds=1)).to_pydatetime()})
+    return rows
+
+
+def import_trades(portfolio_id, trades, method="average"):
+    """
+    Write validated trades and rebuild the affected holdings in one transaction.
+    Returns (success, message). Nothing is written if any symbol would be
+    oversold once the new trades are merged into the existing ledger.
+    """
+    if trades.empty:
+        return False, "No valid trades to import."
+
+    trades = trades.sort_values("date", kind="stable")
+    symbols = sorted(trades["symbol"].unique())
+    try:
+        with db.engine.begin() as conn:
+            trades = _drop_duplicates(conn, portfolio_id, trades)
+            if trades.empty:
+                return False, "All trades in this file are already recorded."
+
+            opening = _opening_balances(conn, portfolio_id, trades)
+            rows = [
+                {"portfolio_id": portfolio_id, "symbol": r.symbol, "type": r.type, "quantity": int(r.quantity),
+                 "price": round(float(r.price), 2), "date": r.date.to_pydatetime()}
+                for r in trades.itertuples(index=False)
+            ]
+            conn.execute(
+                text("INSERT INTO transactions (portfolio_id, symbol, type, quantity, price, date) VALUES (:portfolio_id, :symbol, :type, :quantity, :price, :date)"),
+                opening + rows
+            )
+
+            replayed = ledger.replay(ledger.load_transactions(portfolio_id, conn))
+            oversold = replayed.index[(replayed["oversold"] > 0) & replayed.index.isin(symbols)]
+            if len(oversold):
+                raise ValueError(f"Sells exceed holdings for {', '.join(oversold)}")
+
+            ledger.rebuild_holdings(portfolio_id, method, symbols, conn)
+    except Exception as e:
+        return False, f"Import failed: {e}"
+    finally:
+        db._invalidate(("holdings", portfolio_id), ("transactions", portfolio_id), ("transactions", None))
+    msg = f"Imported {len(rows)} trades across {len(symbols)} symbols"
+    if opening:
+        msg += f" (balanced the ledger to current holdings for {', '.join(sorted({r['symbol'] for r in opening}))})"
+    return True, msg
@@ -0,0 +1,64 @@
+"""
+Portfolio valuation with column arithmetic.
+
+value_holdings() values every holding in one pass over a holdings frame and
+a quotes frame (as returned by market_data.get_quotes); portfolio totals are
+reductions over the result.
+"""
+import numpy as np
+import pandas as pd
+
+VALUATION_COLUMNS = ["symbol", "quantity", "avg_price", "ltp", "invested", "current", "pnl", "pnl_pct", "day_change"]
+
+
+def holdings_frame(holdings):
+    """DataFrame (symbol, quantity, avg_price as float) from database.get_portfolio_holdings rows."""
+    df = pd.DataFrame(holdings, columns=["symbol", "quantity", "avg_price"])
+    df["quantity"] = df["quantity"].astype(np.int64)
+    df["avg_price"] = df["avg_price"].astype(np.float64)  # Decimal -> float once, for the whole column
+    return df
+
+
+def value_holdings(holdings, quotes):
+    """
+    Value holdings against quotes (indexed by symbol with price and, optionally, change).
+    Symbols without a quote are valued at their average price, as before.
+    Returns one row per holding with ltp, invested, current, pnl, pnl_pct and day_change.
+    """
+    if not isinstance(holdings, pd.DataFrame):
+        holdings = holdings_frame(holdings)
+    out = holdings[["symbol", "quantity", "avg_price"]].reset_index(drop=True)
+
+    price = quotes["price"].reindex(out["symbol"]).to_numpy(dtype=np.float64)
+    change = quotes["change"].reindex(out["symbol"]).to_numpy(dtype=np.float64) if "change" in quotes else np.zeros(len(out))
+    qty = out["quantity"].to_numpy(dtype=np.float64)
+    avg = out["avg_price"].to_numpy(dtype=np.float64)
+
+    ltp = np.where(np.isnan(price), avg, price)
+    invested = qty * avg
+    current = qty * ltp
+    pnl = current - invested
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(invested != 0, pnl / invested * 100, 0.0)
+
+    out["ltp"] = ltp
+    out["invested"] = invested
+    out["current"] = current
+    out["pnl"] = pnl
+    out["pnl_pct"] = pnl_pct
+    out["day_change"] = qty * np.nan_to_num(change)
+    return out[VALUATION_COLUMNS]
+
+
+def portfolio_totals(valued):
+    """Invested, current value, P&L and P&L% for a value_holdings() frame."""
+    invested = float(valued["invested"].sum())
+    current = float(valued["current"].sum())
+    pnl = current - invested
+    return {
+        "invested": invested,
+        "current": current,
+        "pnl": pnl,
+        "pnl_pct": (pnl / invested) * 100 if invested else 0,
+        "day_change": float(valued["day_change"].sum()),
+    }